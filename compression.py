@@ -0,0 +1,313 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+from typing import NamedTuple
+
+import anyio
+from starlette.requests import Request
+from starlette.responses import FileResponse, Response
+
+try:
+    import brotli
+except ImportError:
+    # gzip is used alone when the Brotli package isn't installed
+    brotli = None
+
+# Text formats worth compressing; images, archives and video are already compressed
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+
+
+def is_compressible(media_type: str):
+    return bool(media_type) and media_type.split(";")[0].strip().lower().startswith(COMPRESSIBLE_TYPES)
+
+
+def negotiate_encoding(accept_encoding: str):
+    """Best supported content coding the client accepts: "br", "gzip" or None"""
+    accepted = {}
+    for part in (accept_encoding or "").lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        quality = 1.0
+        match = re.search(r"q=([0-9.]+)", params)
+        if match:
+            try:
+                quality = float(match.group(1))
+            except ValueError:
+                quality = 0.0
+        accepted[coding] = quality
+
+    def allowed(coding):
+        return accepted.get(coding, accepted.get("*", 0.0)) > 0
+
+    if brotli is not None and allowed("br"):
+        return "br"
+    if allowed("gzip"):
+        return "gzip"
+    return None
+
+
+def compress(data: bytes, encoding: str, fast: bool = False):
+    """Compress with the given coding, fast trades ratio for speed on dynamic responses"""
+    if encoding == "br":
+        return brotli.compress(data, quality=4 if fast else 11)
+    return gzip.compress(data, compresslevel=5 if fast else 9, mtime=0)
+
+
+def _etag_matches(request_headers, etag: str):
+    if_none_match = request_headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    # Weak comparison, as If-None-Match requires
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+class StaticAsset(NamedTuple):
+    path: str
+    mtime_ns: int
+    size: int
+    media_type: str
+    etag: str
+    # content coding ("identity", "gzip", "br") -> body
+    variants: dict
+    validator: object = None
+
+    def response(self, request_headers, method: str = "GET", cache_control: str = "no-cache"):
+        """Response with the smallest variant the client accepts, or 304 when it's current"""
+        encoding = negotiate_encoding(request_headers.get("accept-encoding"))
+        if encoding not in self.variants:
+            encoding = "identity"
+        # Each encoding is a different representation, so it gets its own strong ETag
+        etag = self.etag if encoding == "identity" else f'{self.etag[:-1]}-{encoding}"'
+        headers = {"etag": etag, "cache-control": cache_control, "vary": "Accept-Encoding"}
+        if _etag_matches(request_headers, etag):
+            return Response(status_code=304, headers=headers)
+        if encoding != "identity":
+            headers["content-encoding"] = encoding
+        body = self.variants[encoding]
+        if method == "HEAD":
+            headers["content-length"] = str(len(body))
+            return Response(status_code=200, headers=headers, media_type=self.media_type)
+        return Response(content=body, headers=headers, media_type=self.media_type)
+
+
+class StaticAssetCache:
+    """Static files held in memory with gzip and brotli variants built once
+
+    A file is read and compressed the first time it's requested and again
+    only when its mtime or size changes, so editing a file on disk still
+    takes effect without a restart. Compressed variants are kept only when
+    they're actually smaller.
+    """
+
+    def __init__(self, min_compress_size: int = 512, max_file_size: int = 8 * 1024 * 1024):
+        self.min_compress_size = min_compress_size
+        self.max_file_size = max_file_size
+        self._assets = {}
+        self._lock = threading.Lock()
+
+    def get(self, path: str, transform=None, validator=None):
+        """Cached asset for path, transform(bytes) -> bytes is applied before compressing
+
+        A transformed asset that depends on other files passes a validator
+        (any comparable value) that changes when they do. Returns None for
+        files too large to hold in memory.
+        """
+        stat_result = os.stat(path)
+        with self._lock:
+            asset = self._assets.get(path)
+        if (asset is not None and asset.mtime_ns == stat_result.st_mtime_ns
+                and asset.size == stat_result.st_size and asset.validator == validator):
+            return asset
+        if stat_result.st_size > self.max_file_size:
+            return None
+
+        with open(path, "rb") as f:
+            body = f.read()
+        if transform is not None:
+            body = transform(body)
+        media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        if media_type == "application/javascript":
+            # Response adds the charset to text/* types itself
+            media_type += "; charset=utf-8"
+
+        variants = {"identity": body}
+        if len(body) >= self.min_compress_size and is_compressible(media_type):
+            for encoding in ("br", "gzip"):
+                if encoding == "br" and brotli is None:
+                    continue
+                compressed = compress(body, encoding)
+                if len(compressed) < len(body):
+                    variants[encoding] = compressed
+
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        asset = StaticAsset(path, stat_result.st_mtime_ns, stat_result.st_size,
+                            media_type, etag, variants, validator)
+        with self._lock:
+            self._assets[path] = asset
+        return asset
+
+    @staticmethod
+    def directory_signature(directory: str):
+        """Hash of the names, sizes and mtimes of every file below directory"""
+        digest = hashlib.sha1()
+        for root, _, files in os.walk(directory):
+            for name in sorted(files):
+                try:
+                    stat_result = os.stat(os.path.join(root, name))
+                except OSError:
+                    continue
+                digest.update(f"{root}/{name}|{stat_result.st_size}|{stat_result.st_mtime_ns}\n".encode())
+        return digest.hexdigest()
+
+    def version(self, path: str):
+        """Short content hash of a file, used as its cache-busting query string"""
+        try:
+            return self.get(path).etag[1:13]
+        except (OSError, AttributeError):
+            return None
+
+    def get_stats(self):
+        with self._lock:
+            assets = list(self._assets.values())
+        return {
+            "assets": len(assets),
+            "bytes": sum(len(a.variants["identity"]) for a in assets),
+            "gzip_bytes": sum(len(a.variants.get("gzip", a.variants["identity"])) for a in assets),
+            "br_bytes": (
+                sum(len(a.variants.get("br", a.variants["identity"])) for a in assets)
+                if brotli is not None else None
+            ),
+        }
+
+
+class CachedStaticFiles:
+    """ASGI app serving a directory from a StaticAssetCache
+
+    Requests carrying a ?v= version (index.html links every asset with its
+    content hash) are cached by the browser for a year; anything else is
+    revalidated with its ETag on each use.
+    """
+
+    def __init__(self, directory: str, cache: StaticAssetCache):
+        self.directory = os.path.abspath(directory)
+        self.cache = cache
+
+    async def __call__(self, scope, receive, send):
+        request = Request(scope)
+        if request.method not in ("GET", "HEAD"):
+            response = Response("Method Not Allowed", status_code=405)
+        else:
+            # stat, and on a miss the read and compression, stay off the event loop
+            response = await anyio.to_thread.run_sync(self._response, request)
+        await response(scope, receive, send)
+
+    def _response(self, request):
+        # Mount passes the path below the mount point, like it does for StaticFiles
+        path = os.path.abspath(os.path.join(self.directory, request.scope["path"].lstrip("/")))
+        if os.path.commonpath([path, self.directory]) != self.directory or not os.path.isfile(path):
+            return Response("Not Found", status_code=404)
+        asset = self.cache.get(path)
+        if asset is None:
+            return FileResponse(path)
+        cache_control = (
+            "public, max-age=31536000, immutable" if "v" in request.query_params else "no-cache"
+        )
+        return asset.response(request.headers, request.method, cache_control)
+
+
+class JSONCompressionMiddleware:
+    """Compress complete text/JSON responses above a size threshold
+
+    Only single-message bodies are compressed: streamed downloads, ranged
+    file responses and ZIP streams pass through untouched, as do responses
+    that already have a Content-Encoding and paths in excluded_paths (base64
+    screenshots and thumbnails gain little from compression and cost a lot
+    of CPU per frame).
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, excluded_paths=(),
+                 offload_size: int = 256 * 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.excluded_paths = tuple(excluded_paths)
+        # Bodies from this size up are compressed on a worker thread, a multi-megabyte
+        # listing takes tens of milliseconds even at the fast level
+        self.offload_size = offload_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.excluded_paths):
+            await self.app(scope, receive, send)
+            return
+        headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope["headers"]}
+        encoding = negotiate_encoding(headers.get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if passthrough or start_message is None:
+                await send(message)
+                return
+            if message["type"] != "http.response.body":
+                # zerocopysend, pathsend and the like: pass the response through untouched,
+                # after the start message that was held back
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            response_headers = {
+                k.decode("latin-1").lower(): v.decode("latin-1")
+                for k, v in start_message.get("headers", [])
+            }
+            body = message.get("body", b"")
+            if (message.get("more_body", False)
+                    or "content-encoding" in response_headers
+                    or not is_compressible(response_headers.get("content-type", ""))
+                    or len(body) < self.minimum_size):
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            if len(body) >= self.offload_size:
+                compressed = await anyio.to_thread.run_sync(compress, body, encoding, True)
+            else:
+                compressed = compress(body, encoding, fast=True)
+            new_headers = [
+                (k, v) for k, v in start_message.get("headers", [])
+                if k.lower() not in (b"content-length", b"etag", b"vary")
+            ]
+            new_headers += [
+                (b"content-encoding", encoding.encode("latin-1")),
+                (b"content-length", str(len(compressed)).encode("latin-1")),
+                (b"vary", b"Accept-Encoding"),
+            ]
+            etag = response_headers.get("etag")
+            if etag:
+                # The encoded body isn't byte-identical to the tagged one
+                weak = etag if etag.startswith("W/") else f"W/{etag}"
+                new_headers.append((b"etag", weak.encode("latin-1")))
+            passthrough = True
+            await send({**start_message, "headers": new_headers})
+            await send({**message, "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
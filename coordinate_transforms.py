@@ -0,0 +1,142 @@
+from typing import NamedTuple
+
+try:
+    import numpy as np
+except ImportError:  # numpy normally comes with opencv-python
+    np = None
+
+
+class MonitorTransform(NamedTuple):
+    """Immutable affine transform from screenshot coordinates to screen coordinates of one monitor"""
+
+    index: int
+    left: int
+    top: int
+    width: int
+    height: int
+    # Screen pixels per screenshot pixel
+    scale_x: float
+    scale_y: float
+
+    @classmethod
+    def from_monitor(cls, monitor: dict):
+        left = int(monitor["left"])
+        top = int(monitor["top"])
+        width = int(monitor["width"])
+        height = int(monitor["height"])
+        if width <= 0 or height <= 0:
+            raise ValueError(f"Invalid monitor dimensions: {width}x{height}")
+
+        screenshot_width = monitor.get("screenshot_width", width)
+        screenshot_height = monitor.get("screenshot_height", height)
+        if screenshot_width <= 0 or screenshot_height <= 0:
+            screenshot_width = width
+            screenshot_height = height
+
+        return cls(
+            index=int(monitor.get("index", 0)),
+            left=left,
+            top=top,
+            width=width,
+            height=height,
+            scale_x=width / screenshot_width,
+            scale_y=height / screenshot_height,
+        )
+
+    def factors(self, use_percentage: bool):
+        """Multipliers applied to x and y before adding the monitor offset"""
+        if use_percentage:
+            return self.width / 100.0, self.height / 100.0
+        return self.scale_x, self.scale_y
+
+    def to_screen(self, x: float, y: float, use_percentage: bool = False):
+        if use_percentage and not (0 <= x <= 100 and 0 <= y <= 100):
+            raise ValueError(
+                f"Percentage coordinates out of range: x={x}%, y={y}%")
+        factor_x, factor_y = self.factors(use_percentage)
+        return int(self.left + x * factor_x), int(self.top + y * factor_y)
+
+
+class CoordinateTransformer:
+    """Per-monitor transforms, rebuilt only when the monitor topology changes"""
+
+    def __init__(self):
+        self._topology = None
+        self._transforms = ()
+        self.rebuild_count = 0
+
+    @staticmethod
+    def _topology_of(monitors):
+        return tuple(
+            (
+                m.get("left"),
+                m.get("top"),
+                m.get("width"),
+                m.get("height"),
+                m.get("screenshot_width"),
+                m.get("screenshot_height"),
+            )
+            for m in monitors
+        )
+
+    def sync(self, monitors):
+        """Refresh transforms from a monitor list; cheap when the topology is unchanged
+
+        The topology is compared on every call rather than the list's
+        identity: the list is filled and its dicts updated in place, so the
+        same object can hold different monitors from one call to the next.
+        """
+        topology = self._topology_of(monitors)
+        if topology == self._topology:
+            return
+
+        transforms = []
+        for monitor in monitors:
+            try:
+                transforms.append(MonitorTransform.from_monitor(monitor))
+            except (KeyError, TypeError, ValueError) as e:
+                # Keep the slot so indexes still line up, report the error on use
+                transforms.append(e)
+        self._transforms = tuple(transforms)
+        self._topology = topology
+        self.rebuild_count += 1
+
+    def get(self, monitor_index: int) -> MonitorTransform:
+        if not isinstance(monitor_index, int) or monitor_index < 0:
+            raise ValueError(
+                f"Monitor index must be a positive integer, received: {monitor_index}")
+        if monitor_index >= len(self._transforms):
+            raise ValueError(
+                f"Monitor index out of range: {monitor_index} >= {len(self._transforms)}")
+        transform = self._transforms[monitor_index]
+        if isinstance(transform, Exception):
+            raise ValueError(
+                f"Monitor information invalid: {transform}")
+        return transform
+
+    def convert(self, x: float, y: float, monitor_index: int = 0, use_percentage: bool = False):
+        return self.get(monitor_index).to_screen(x, y, use_percentage)
+
+    def convert_path(self, points, monitor_index: int = 0, use_percentage: bool = False):
+        """Convert a whole sequence of (x, y) points in one vectorized call"""
+        transform = self.get(monitor_index)
+        factor_x, factor_y = transform.factors(use_percentage)
+
+        if np is None:
+            path = [(float(x), float(y)) for x, y in points]
+            if use_percentage and any(
+                not (0 <= x <= 100 and 0 <= y <= 100) for x, y in path
+            ):
+                raise ValueError("Percentage coordinates out of range")
+            return [
+                [int(transform.left + x * factor_x),
+                 int(transform.top + y * factor_y)]
+                for x, y in path
+            ]
+
+        path = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        if use_percentage and path.size and (path.min() < 0 or path.max() > 100):
+            raise ValueError("Percentage coordinates out of range")
+        screen = path * (factor_x, factor_y) + (transform.left, transform.top)
+        # Truncate toward zero like int() in the scalar conversion
+        return np.trunc(screen).astype(np.int64).tolist()
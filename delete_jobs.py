@@ -0,0 +1,181 @@
+import os
+import stat
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from directory_listing import is_link
+
+
+class DeleteCancelled(Exception):
+    pass
+
+
+class DeleteJob:
+    def __init__(self, path: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.path = path
+        self.status = "running"
+        self.error = None
+        self.cancelled = False
+        self.started = time.time()
+        self.finished = None
+        self.files_deleted = 0
+        self.dirs_deleted = 0
+        self.bytes_deleted = 0
+        self.failed = 0
+        # First few paths that couldn't be deleted, with the reason
+        self.failures = []
+        self.current = None
+
+    def record_failure(self, path: str, error: Exception):
+        self.failed += 1
+        if len(self.failures) < 20:
+            self.failures.append({"path": path, "error": str(error)})
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "path": self.path,
+            "status": self.status,
+            "error": self.error,
+            "elapsed_ms": round(((self.finished or time.time()) - self.started) * 1000, 2),
+            "files_deleted": self.files_deleted,
+            "dirs_deleted": self.dirs_deleted,
+            "bytes_deleted": self.bytes_deleted,
+            "failed": self.failed,
+            "failures": list(self.failures),
+            "current": self.current,
+        }
+
+
+def _remove(remove, path: str):
+    try:
+        remove(path)
+    except PermissionError:
+        # Read-only files and folders can't be deleted on Windows until the flag is cleared
+        os.chmod(path, stat.S_IWRITE | stat.S_IREAD)
+        remove(path)
+
+
+class DeleteJobManager:
+    """Recursive folder deletion as cancellable background jobs
+
+    The tree is walked depth-first with scandir and removed bottom-up, one
+    entry at a time, so progress can be reported while it runs and a
+    cancelled job stops between entries, leaving the rest of the tree intact.
+    Entries that can't be removed are skipped and reported, like rmtree with
+    an onerror handler that keeps going.
+    """
+
+    def __init__(self, keep_jobs: int = 20):
+        self.keep_jobs = keep_jobs
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def start_job(self, path: str):
+        """Start deleting path, or return the job already deleting it"""
+        path = os.path.abspath(path)
+        with self._lock:
+            for job in self._jobs.values():
+                if job.path == path and job.status == "running":
+                    return job
+            job = DeleteJob(path)
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.keep_jobs:
+                oldest = next(iter(self._jobs.values()))
+                if oldest.status == "running":
+                    break
+                self._jobs.popitem(last=False)
+        threading.Thread(target=self._run_job, args=(job,),
+                         name="delete-job", daemon=True).start()
+        return job
+
+    def get_job(self, job_id: str):
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            raise FileNotFoundError(f"Delete job not found: {job_id}")
+        return job
+
+    def cancel_job(self, job_id: str):
+        job = self.get_job(job_id)
+        job.cancelled = True
+        return job
+
+    def list_jobs(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [
+            {"job_id": j.id, "path": j.path, "status": j.status,
+             "files_deleted": j.files_deleted, "bytes_deleted": j.bytes_deleted}
+            for j in jobs
+        ]
+
+    def _run_job(self, job: DeleteJob):
+        try:
+            self._delete_tree(job)
+            if job.failed:
+                job.status = "failed"
+                job.error = f"{job.failed} items could not be deleted"
+            else:
+                job.status = "completed"
+        except DeleteCancelled:
+            job.status = "cancelled"
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            job.current = None
+            job.finished = time.time()
+
+    def _delete_tree(self, job: DeleteJob):
+        # Each stack item is (directory, scandir iterator); a directory is removed
+        # once its iterator is exhausted, i.e. after all of its children
+        stack = [(job.path, os.scandir(job.path))]
+        try:
+            while stack:
+                if job.cancelled:
+                    raise DeleteCancelled()
+                directory, it = stack[-1]
+                entry = next(it, None)
+                if entry is None:
+                    it.close()
+                    stack.pop()
+                    job.current = directory
+                    try:
+                        _remove(os.rmdir, directory)
+                        job.dirs_deleted += 1
+                    except OSError as e:
+                        job.record_failure(directory, e)
+                    continue
+
+                try:
+                    stat_result = entry.stat(follow_symlinks=False)
+                except OSError as e:
+                    job.record_failure(entry.path, e)
+                    continue
+
+                # Symlinks and junctions are removed themselves, never descended into
+                if stat.S_ISDIR(stat_result.st_mode) and not is_link(stat_result):
+                    try:
+                        stack.append((entry.path, os.scandir(entry.path)))
+                    except OSError as e:
+                        job.record_failure(entry.path, e)
+                    continue
+
+                job.current = entry.path
+                try:
+                    if stat.S_ISDIR(stat_result.st_mode):
+                        # Directory symlink or junction: remove the link, not the target
+                        _remove(os.rmdir, entry.path)
+                    else:
+                        _remove(os.unlink, entry.path)
+                    job.files_deleted += 1
+                    job.bytes_deleted += stat_result.st_size
+                except OSError as e:
+                    job.record_failure(entry.path, e)
+        finally:
+            for _, it in stack:
+                it.close()
@@ -0,0 +1,160 @@
+import base64
+import fnmatch
+import heapq
+import json
+import os
+import stat
+import time
+from typing import NamedTuple
+
+# st_file_attributes flag for symlinks and junctions on Windows
+FILE_ATTRIBUTE_REPARSE_POINT = 0x400
+
+
+class ListingEntry(NamedTuple):
+    name: str
+    path: str
+    is_dir: bool
+    size: int
+    mtime: float
+
+
+def is_link(stat_result: os.stat_result):
+    """Symlinks and Windows junctions, which tree walks must not descend into
+
+    DirEntry.is_dir(follow_symlinks=False) is True for a junction on Windows,
+    only the reparse point attribute tells it apart from a real folder.
+    """
+    if stat.S_ISLNK(stat_result.st_mode):
+        return True
+    return bool(getattr(stat_result, "st_file_attributes", 0) & FILE_ATTRIBUTE_REPARSE_POINT)
+
+
+def scan_directory(path: str, timeout: float = None):
+    """List a directory with a single os.scandir pass
+
+    DirEntry caches the type (and on Windows the full stat) from the directory
+    read itself, so most entries cost no extra system call. Returns
+    (entries, complete); complete is False when the timeout cut the scan short.
+    """
+    deadline = time.perf_counter() + timeout if timeout else None
+    entries = []
+    with os.scandir(path) as it:
+        for entry in it:
+            if deadline and time.perf_counter() > deadline:
+                return entries, False
+            try:
+                is_dir = entry.is_dir()
+                stat_result = entry.stat()
+            except OSError:
+                # Broken links and entries removed while scanning
+                continue
+            entries.append(ListingEntry(
+                entry.name,
+                entry.path,
+                is_dir,
+                0 if is_dir else stat_result.st_size,
+                stat_result.st_mtime,
+            ))
+    return entries, True
+
+
+def count_subdirectories(path: str, timeout: float = None):
+    """Number of directories directly inside path
+
+    Raises TimeoutError when enumerating takes longer than timeout. The
+    deadline is checked between entries, so it can't cut short a single
+    system call that hangs (an unreachable network share); callers have to
+    stop waiting for those instead.
+    """
+    deadline = time.perf_counter() + timeout if timeout else None
+    count = 0
+    with os.scandir(path) as it:
+        for entry in it:
+            if deadline and time.perf_counter() > deadline:
+                raise TimeoutError(f"Counting subfolders of {path} timed out")
+            try:
+                if entry.is_dir():
+                    count += 1
+            except OSError:
+                pass
+    return count
+
+
+SORT_KEYS = {
+    "name": lambda e: (e.name.lower(), e.name),
+    # The exact name breaks ties, so no two entries of a folder share a key
+    # and keyset cursors never skip or repeat one
+    "mtime": lambda e: (e.mtime, e.name.lower(), e.name),
+    "size": lambda e: (e.size, e.name.lower(), e.name),
+}
+
+
+def _match_filter(pattern: str):
+    """Case-insensitive substring filter, or a glob when the pattern has wildcards"""
+    pattern = pattern.lower()
+    if any(c in pattern for c in "*?["):
+        return lambda e: fnmatch.fnmatchcase(e.name.lower(), pattern)
+    return lambda e: pattern in e.name.lower()
+
+
+def encode_cursor(sort: str, order: str, key):
+    raw = json.dumps([sort, order, list(key)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, order: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, cursor_order, key = json.loads(
+            base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if (cursor_sort, cursor_order) != (sort, order):
+        raise ValueError("Cursor does not match the requested sort order")
+    return tuple(key)
+
+
+def paginate(entries, sort: str = "name", order: str = "asc", filter_text: str = None,
+             cursor: str = None, limit: int = None, kind: str = None):
+    """Filter, sort and page a listing
+
+    Pages use keyset cursors (the sort key of the last returned entry), so
+    entries added or removed between requests don't shift later pages, and
+    only the requested page is ordered: heapq selects it in O(n log limit).
+    Returns (page, next_cursor, matched), matched being every entry that
+    passes the kind and filter, whatever page is requested.
+    """
+    if sort not in SORT_KEYS:
+        raise ValueError(
+            f"Invalid sort: {sort}, expected one of {', '.join(SORT_KEYS)}")
+    if order not in ("asc", "desc"):
+        raise ValueError("Invalid order, expected asc or desc")
+
+    sort_key = SORT_KEYS[sort]
+    descending = order == "desc"
+
+    selected = entries
+    if kind == "files":
+        selected = [e for e in selected if not e.is_dir]
+    elif kind == "dirs":
+        selected = [e for e in selected if e.is_dir]
+    if filter_text:
+        selected = list(filter(_match_filter(filter_text), selected))
+    matched = selected
+
+    if cursor:
+        after = decode_cursor(cursor, sort, order)
+        if descending:
+            selected = [e for e in selected if sort_key(e) < after]
+        else:
+            selected = [e for e in selected if sort_key(e) > after]
+
+    if limit and limit < len(selected):
+        pick = heapq.nlargest if descending else heapq.nsmallest
+        page = pick(limit, selected, key=sort_key)
+        next_cursor = encode_cursor(sort, order, sort_key(page[-1]))
+    else:
+        page = sorted(selected, key=sort_key, reverse=descending)
+        next_cursor = None
+    return page, next_cursor, matched
@@ -0,0 +1,223 @@
+import ctypes
+import os
+import select
+import struct
+import threading
+
+
+class DirectoryWatcher:
+    """Report changes inside a set of directories through callback(path)
+
+    By default only the directory's own entries are watched: file creation,
+    deletion, renames and size or timestamp changes. With subtree watching the
+    callback receives the directory, below the watched one, that changed.
+    """
+
+    name = "none"
+    # True when watch(path, subtree=True) reports changes anywhere below path,
+    # otherwise every directory has to be watched on its own
+    supports_subtree = False
+
+    def __init__(self, callback):
+        self.callback = callback
+
+    def watch(self, path: str, subtree: bool = False):
+        raise NotImplementedError
+
+    def unwatch(self, path: str):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class Win32DirectoryWatcher(DirectoryWatcher):
+    """ReadDirectoryChangesW with overlapped I/O, one waiting thread per directory"""
+
+    name = "ReadDirectoryChangesW"
+    supports_subtree = True
+
+    FILE_LIST_DIRECTORY = 0x0001
+    NOTIFY_FILTER = 0x0001 | 0x0002 | 0x0008 | 0x0010  # file name, dir name, size, last write
+
+    def __init__(self, callback):
+        super().__init__(callback)
+        import pywintypes
+        import win32con
+        import win32event
+        import win32file
+
+        self._pywintypes = pywintypes
+        self._win32con = win32con
+        self._win32event = win32event
+        self._win32file = win32file
+        self._watches = {}
+        self._lock = threading.Lock()
+
+    def watch(self, path: str, subtree: bool = False):
+        with self._lock:
+            if path in self._watches:
+                return
+            win32file = self._win32file
+            win32con = self._win32con
+            handle = win32file.CreateFile(
+                path,
+                self.FILE_LIST_DIRECTORY,
+                win32con.FILE_SHARE_READ | win32con.FILE_SHARE_WRITE | win32con.FILE_SHARE_DELETE,
+                None,
+                win32con.OPEN_EXISTING,
+                win32con.FILE_FLAG_BACKUP_SEMANTICS | win32file.FILE_FLAG_OVERLAPPED,
+                None,
+            )
+            stop_event = self._win32event.CreateEvent(None, True, False, None)
+            thread = threading.Thread(
+                target=self._run, args=(path, handle, stop_event, subtree),
+                name="directory-watch", daemon=True)
+            self._watches[path] = stop_event
+            thread.start()
+
+    def _run(self, path, handle, stop_event, subtree):
+        win32event = self._win32event
+        win32file = self._win32file
+        overlapped = self._pywintypes.OVERLAPPED()
+        overlapped.hEvent = win32event.CreateEvent(None, False, False, None)
+        buffer = win32file.AllocateReadBuffer(8192)
+        try:
+            while True:
+                win32file.ReadDirectoryChangesW(
+                    handle, buffer, subtree, self.NOTIFY_FILTER, overlapped)
+                rc = win32event.WaitForMultipleObjects(
+                    [overlapped.hEvent, stop_event], False, win32event.INFINITE)
+                if rc != win32event.WAIT_OBJECT_0:
+                    win32file.CancelIo(handle)
+                    break
+                size = win32file.GetOverlappedResult(handle, overlapped, True)
+                if not subtree or not size:
+                    # Zero bytes means the buffer overflowed, which still means "changed"
+                    self.callback(path)
+                    continue
+                changed = {
+                    os.path.dirname(os.path.join(path, filename))
+                    for _, filename in win32file.FILE_NOTIFY_INFORMATION(buffer, size)
+                }
+                for directory in changed:
+                    self.callback(directory)
+        except Exception as e:
+            # The directory was deleted or became unreachable
+            print(f"Stopped watching {path}: {e}")
+            self.callback(path)
+        finally:
+            handle.Close()
+            with self._lock:
+                if self._watches.get(path) is stop_event:
+                    del self._watches[path]
+
+    def unwatch(self, path: str):
+        with self._lock:
+            stop_event = self._watches.pop(path, None)
+        if stop_event is not None:
+            self._win32event.SetEvent(stop_event)
+
+    def close(self):
+        with self._lock:
+            paths = list(self._watches)
+        for path in paths:
+            self.unwatch(path)
+
+
+class InotifyDirectoryWatcher(DirectoryWatcher):
+    """Linux inotify through libc, one thread reads events for all directories"""
+
+    name = "inotify"
+
+    IN_MODIFY = 0x002
+    IN_ATTRIB = 0x004
+    IN_MOVED_FROM = 0x040
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_DELETE_SELF = 0x400
+    IN_MOVE_SELF = 0x800
+    IN_IGNORED = 0x8000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE
+                  | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+    EVENT_HEADER = struct.Struct("iIII")
+
+    def __init__(self, callback):
+        super().__init__(callback)
+        self._libc = ctypes.CDLL(None, use_errno=True)
+        self._fd = self._libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._paths = {}
+        self._descriptors = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        threading.Thread(target=self._run, name="directory-watch", daemon=True).start()
+
+    def watch(self, path: str, subtree: bool = False):
+        with self._lock:
+            if path in self._descriptors:
+                return
+            wd = self._libc.inotify_add_watch(
+                self._fd, os.fsencode(path), self.WATCH_MASK)
+            if wd < 0:
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {path}")
+            self._paths[wd] = path
+            self._descriptors[path] = wd
+
+    def unwatch(self, path: str):
+        with self._lock:
+            wd = self._descriptors.pop(path, None)
+            if wd is not None:
+                self._paths.pop(wd, None)
+                self._libc.inotify_rm_watch(self._fd, wd)
+
+    def _run(self):
+        while not self._closed:
+            try:
+                readable, _, _ = select.select([self._fd], [], [], 1.0)
+                if not readable:
+                    continue
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                continue
+            except OSError:
+                break
+
+            changed = set()
+            offset = 0
+            while offset + self.EVENT_HEADER.size <= len(data):
+                wd, mask, _, name_length = self.EVENT_HEADER.unpack_from(data, offset)
+                offset += self.EVENT_HEADER.size + name_length
+                with self._lock:
+                    path = self._paths.get(wd)
+                    if mask & self.IN_IGNORED and path is not None:
+                        # The watch was removed by the kernel (directory deleted)
+                        self._paths.pop(wd, None)
+                        self._descriptors.pop(path, None)
+                if path is not None:
+                    changed.add(path)
+            for path in changed:
+                self.callback(path)
+
+    def close(self):
+        self._closed = True
+        with self._lock:
+            self._paths.clear()
+            self._descriptors.clear()
+        os.close(self._fd)
+
+
+def create_directory_watcher(callback):
+    """Best available watcher for this platform, or None when changes can't be watched"""
+    try:
+        if os.name == "nt":
+            return Win32DirectoryWatcher(callback)
+        if hasattr(ctypes.CDLL(None), "inotify_init1"):
+            return InotifyDirectoryWatcher(callback)
+    except Exception as e:
+        print(f"Directory watching unavailable: {e}")
+    return None
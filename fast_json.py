@@ -0,0 +1,137 @@
+import json
+import os
+import time
+from datetime import date, datetime
+from pathlib import PurePath
+
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    # The stdlib encoder is used when orjson isn't installed
+    orjson = None
+
+
+def _default(value):
+    """Types the encoders don't handle natively"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, PurePath):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="replace")
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content) -> bytes:
+    """Compact UTF-8 JSON, with orjson when available and json.dumps otherwise"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+        default=_default,
+    ).encode("utf-8")
+
+
+def dumps_text(content) -> str:
+    """dumps() as str, for WebSocket.send_text"""
+    return dumps(content).decode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse for large payloads, rendered with dumps()
+
+    Returning this from an endpoint skips FastAPI's jsonable_encoder pass,
+    which walks and copies every value of the response before encoding it.
+    Content must already be plain JSON types (dicts, lists, str, numbers,
+    datetimes); it isn't validated against a response model.
+    """
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def _sample_payloads():
+    """Payloads shaped like the screenshot, listing and status responses"""
+    frame = "A" * (3 * 1024 * 1024)
+    screenshots = {
+        "screenshots": [
+            {"monitor_index": i, "width": 2560, "height": 1440, "primary": i == 0,
+             "image": frame, "collapsed": False}
+            for i in range(2)
+        ],
+        "monitor_count": 2,
+        "total_monitor_count": 2,
+        "timestamp": datetime.now().isoformat(),
+    }
+    listing = {
+        "files": [
+            {"filename": f"file_{i:06d}.dat", "size_mb": round(i / 7, 2),
+             "upload_time": datetime.now().isoformat(),
+             "file_path": os.path.join("C:\\Users\\user\\Downloads", f"file_{i:06d}.dat")}
+            for i in range(20000)
+        ],
+        "total_count": 20000,
+        "total_size_mb": 1234.5,
+        "current_folder": "Downloads",
+        "next_cursor": None,
+    }
+    status = {
+        "type": "status",
+        "counter": 1234,
+        "timestamp": datetime.now().isoformat(),
+        "network": {"bytes_sent": 123456789, "bytes_recv": 987654321, "speed_up": 12.5},
+        "memory_usage": 41.2,
+        "cpu_usage": 12.7,
+        "disk_usage": 63.0,
+        "top_processes": [
+            {"pid": 1000 + i, "name": f"process{i}.exe", "cpu_percent": 1.5, "memory_mb": 120.4}
+            for i in range(10)
+        ],
+    }
+    return {"screenshots": screenshots, "listing": listing, "status": status}
+
+
+def benchmark(repeat: int = 20):
+    """Milliseconds per response for FastAPI's default path and for dumps()"""
+    from fastapi.encoders import jsonable_encoder
+
+    def default_path(content):
+        # What FastAPI does with a returned dict: jsonable_encoder, then JSONResponse.render
+        return JSONResponse(jsonable_encoder(content)).body
+
+    def stdlib_path(content):
+        return json.dumps(content, ensure_ascii=False, allow_nan=False,
+                          separators=(",", ":"), default=_default).encode("utf-8")
+
+    encoders = [("fastapi_default", default_path), ("stdlib_dumps", stdlib_path)]
+    if orjson is not None:
+        encoders.append(("orjson_dumps", dumps))
+
+    results = {}
+    for name, content in _sample_payloads().items():
+        runs = max(1, repeat // 10) if name == "listing" else repeat
+        timings = {}
+        for encoder_name, encode in encoders:
+            encode(content)
+            start = time.perf_counter()
+            for _ in range(runs):
+                body = encode(content)
+            timings[encoder_name] = round((time.perf_counter() - start) * 1000 / runs, 3)
+        timings["bytes"] = len(body)
+        results[name] = timings
+    return results
+
+
+if __name__ == "__main__":
+    print(f"orjson: {'available' if orjson is not None else 'not installed, stdlib fallback'}")
+    for payload, timings in benchmark().items():
+        size = timings.pop("bytes")
+        line = ", ".join(f"{name} {ms} ms" for name, ms in timings.items())
+        print(f"{payload} ({size / 1024:.0f} KB): {line}")
@@ -0,0 +1,185 @@
+import hashlib
+import os
+import stat
+from email.utils import formatdate, parsedate_to_datetime
+from urllib.parse import quote
+
+import anyio
+from starlette.responses import Response
+
+from fast_json import FastJSONResponse
+
+# Size of the reads used when the server has no zero-copy send support
+FILE_CHUNK_SIZE = 256 * 1024
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def make_etag(stat_result: os.stat_result):
+    return f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+
+
+def parse_range_header(header: str, size: int):
+    """Parse a single "bytes=" range into an inclusive (start, end)
+
+    Returns None when the header should be ignored (missing, malformed or
+    multiple ranges, which are answered with the full file), and raises
+    RangeNotSatisfiable when the range lies outside the file.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    start_text, _, end_text = header[len("bytes="):].strip().partition("-")
+    try:
+        if not start_text:
+            # Suffix range: the last N bytes
+            length = int(end_text)
+            if length <= 0:
+                raise RangeNotSatisfiable()
+            return max(size - length, 0), size - 1
+        start = int(start_text)
+        end = int(end_text) if end_text else size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable()
+    if start > end:
+        return None
+    return start, min(end, size - 1)
+
+
+def content_disposition(filename: str):
+    quoted = quote(filename)
+    if quoted == filename:
+        return f'attachment; filename="{filename}"'
+    return f"attachment; filename*=utf-8''{quoted}"
+
+
+class RangeFileResponse(Response):
+    """Serve a file, or one byte range of it, with validators for caching and resuming
+
+    The body is sent with the ASGI zero-copy extension (sendfile) when the
+    server advertises it, otherwise it's read in chunks on a worker thread.
+    """
+
+    def __init__(self, path: str, status_code: int, headers: dict, start: int = 0,
+                 length: int = 0, send_body: bool = True, media_type: str = None):
+        super().__init__(content=None, status_code=status_code,
+                         headers=headers, media_type=media_type)
+        self.path = path
+        self.start = start
+        self.length = length
+        self.send_body = send_body and length > 0
+
+    async def __call__(self, scope, receive, send):
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+        if not self.send_body:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        with open(self.path, "rb") as f:
+            if "http.response.zerocopysend" in scope.get("extensions", {}):
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": f,
+                    "offset": self.start,
+                    "count": self.length,
+                    "more_body": False,
+                })
+                return
+
+            await anyio.to_thread.run_sync(f.seek, self.start)
+            remaining = self.length
+            while remaining > 0:
+                chunk = await anyio.to_thread.run_sync(f.read, min(FILE_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({
+                    "type": "http.response.body",
+                    "body": chunk,
+                    "more_body": remaining > 0,
+                })
+            if remaining > 0:
+                # The file shrank while being sent, close the body anyway
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+        if self.background is not None:
+            await self.background()
+
+
+def ranged_file_response(path: str, request_headers, method: str = "GET",
+                         filename: str = None, media_type: str = "application/octet-stream"):
+    """Build the response for a GET/HEAD of path, honouring Range and conditional headers"""
+    stat_result = os.stat(path)
+    if not stat.S_ISREG(stat_result.st_mode):
+        raise FileNotFoundError(path)
+
+    size = stat_result.st_size
+    etag = make_etag(stat_result)
+    last_modified = formatdate(stat_result.st_mtime, usegmt=True)
+    headers = {
+        "accept-ranges": "bytes",
+        "etag": etag,
+        "last-modified": last_modified,
+    }
+    if filename:
+        headers["content-disposition"] = content_disposition(filename)
+
+    if _not_modified(request_headers, etag, stat_result.st_mtime):
+        return Response(status_code=304, headers=headers)
+
+    byte_range = None
+    if_range = request_headers.get("if-range")
+    # A stale If-Range means the client's partial copy is outdated, send the whole file
+    if not if_range or if_range in (etag, last_modified):
+        try:
+            byte_range = parse_range_header(request_headers.get("range"), size)
+        except RangeNotSatisfiable:
+            headers["content-range"] = f"bytes */{size}"
+            return Response(status_code=416, headers=headers)
+
+    send_body = method != "HEAD"
+    if byte_range is None:
+        headers["content-length"] = str(size)
+        return RangeFileResponse(path, 200, headers, 0, size, send_body, media_type)
+
+    start, end = byte_range
+    headers["content-length"] = str(end - start + 1)
+    headers["content-range"] = f"bytes {start}-{end}/{size}"
+    return RangeFileResponse(path, 206, headers, start, end - start + 1, send_body, media_type)
+
+
+def _not_modified(request_headers, etag: str, mtime: float):
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags or f"W/{etag}" in tags
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def json_response_with_etag(request_headers, content):
+    """JSON response tagged with a hash of its body, or 304 when the client already has it"""
+    response = FastJSONResponse(content)
+    etag = '"' + hashlib.blake2b(response.body, digest_size=16).hexdigest() + '"'
+    # no-cache: the client may store the response but must revalidate it every time
+    headers = {"etag": etag, "cache-control": "no-cache"}
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        # Weak comparison: the compression middleware sends this tag as W/ on encoded bodies
+        if etag in tags or f"W/{etag}" in tags:
+            return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return response
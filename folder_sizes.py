@@ -0,0 +1,315 @@
+import os
+import stat
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import NamedTuple
+
+from directory_listing import is_link
+
+
+class DirNode(NamedTuple):
+    mtime_ns: int
+    own_size: int
+    own_files: int
+    subdirs: tuple
+
+
+class FolderSizeCancelled(Exception):
+    pass
+
+
+class FolderSizeJob:
+    def __init__(self, path: str, refresh: bool = False):
+        self.id = uuid.uuid4().hex[:12]
+        self.path = path
+        # Re-read every directory instead of trusting cached listings
+        self.refresh = refresh
+        self.status = "running"
+        self.error = None
+        self.cancelled = False
+        self.started = time.time()
+        self.finished = None
+        self.dirs_scanned = 0
+        self.dirs_cached = 0
+        self.dirs_failed = 0
+        self.files = 0
+        self.bytes = 0
+        # Totals of the root's direct subfolders, filled in as each subtree completes
+        self.children = {}
+        self.own_size = 0
+        self.own_files = 0
+        self.total = None
+        self._lock = threading.Lock()
+
+    def count(self, field: str, amount: int = 1):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + amount)
+
+    def to_dict(self):
+        with self._lock:
+            children = sorted(self.children.items(), key=lambda item: item[1][0], reverse=True)
+            return {
+                "job_id": self.id,
+                "path": self.path,
+                "status": self.status,
+                "error": self.error,
+                "refresh": self.refresh,
+                "elapsed_ms": round(((self.finished or time.time()) - self.started) * 1000, 2),
+                "dirs_scanned": self.dirs_scanned,
+                "dirs_cached": self.dirs_cached,
+                "dirs_failed": self.dirs_failed,
+                "files": self.files,
+                "bytes": self.bytes,
+                "own_files_size": self.own_size,
+                "total": (
+                    {"size": self.total[0], "files": self.total[1], "dirs": self.total[2]}
+                    if self.total else None
+                ),
+                "children": [
+                    {"name": os.path.basename(path), "path": path,
+                     "size": size, "files": files, "dirs": dirs}
+                    for path, (size, files, dirs) in children
+                ],
+            }
+
+
+class FolderSizeCalculator:
+    """Recursive folder sizes computed as background jobs
+
+    Every directory's own file sizes are cached together with its mtime. A
+    later walk still stats each directory, but only re-reads the ones whose
+    mtime changed (entries added, removed or renamed); unchanged directories
+    reuse their cached listing. Subtrees of the requested folder are walked in
+    parallel on a thread pool and reported as they complete.
+
+    A directory's mtime doesn't change when a file in it is rewritten with a
+    different size, so jobs started with refresh=True skip the cache and
+    re-read every directory.
+    """
+
+    def __init__(self, max_workers: int = 4, max_nodes: int = 500000, keep_jobs: int = 20):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="folder-size")
+        self.max_nodes = max_nodes
+        self.keep_jobs = keep_jobs
+        self._nodes = OrderedDict()
+        # path -> (size, files, dirs) of the last completed walk that covered it, only kept
+        # for paths in _nodes so it's bounded by max_nodes too
+        self._totals = {}
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    # ---- jobs
+
+    def start_job(self, path: str, refresh: bool = False):
+        """Start computing path, or return the job already running for it"""
+        path = os.path.abspath(path)
+        with self._lock:
+            for job in self._jobs.values():
+                # A cached walk doesn't satisfy a refresh request
+                if job.path == path and job.status == "running" and (job.refresh or not refresh):
+                    return job
+            job = FolderSizeJob(path, refresh)
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.keep_jobs:
+                oldest = next(iter(self._jobs.values()))
+                if oldest.status == "running":
+                    break
+                self._jobs.popitem(last=False)
+        threading.Thread(target=self._run_job, args=(job,),
+                         name="folder-size-job", daemon=True).start()
+        return job
+
+    def get_job(self, job_id: str):
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            raise FileNotFoundError(f"Folder size job not found: {job_id}")
+        return job
+
+    def cancel_job(self, job_id: str):
+        job = self.get_job(job_id)
+        job.cancelled = True
+        return job
+
+    def list_jobs(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [
+            {"job_id": j.id, "path": j.path, "status": j.status,
+             "size": j.total[0] if j.total else None}
+            for j in jobs
+        ]
+
+    def _run_job(self, job: FolderSizeJob):
+        try:
+            root = self._node(job.path, job)
+            if root is None:
+                raise PermissionError(f"Cannot read folder: {job.path}")
+            job.own_size, job.own_files = root.own_size, root.own_files
+
+            futures = {
+                self._executor.submit(self._aggregate_subtree, subdir, job): subdir
+                for subdir in root.subdirs
+            }
+            totals = [(root.own_size, root.own_files, 0)]
+            for future in wait(futures).done:
+                totals.append(future.result())
+            if job.cancelled:
+                raise FolderSizeCancelled()
+
+            total = tuple(sum(t[i] for t in totals) for i in range(3))
+            total = (total[0], total[1], total[2] + len(root.subdirs))
+            self._store_totals({job.path: total})
+            job.total = total
+            job.status = "completed"
+        except FolderSizeCancelled:
+            job.status = "cancelled"
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            job.finished = time.time()
+
+    # ---- walking
+
+    def _node(self, path: str, job: FolderSizeJob):
+        """Own files of path, from the cache when the directory mtime is unchanged"""
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            job.count("dirs_failed")
+            return None
+        with self._lock:
+            cached = None if job.refresh else self._nodes.get(path)
+            if cached is not None and cached.mtime_ns == mtime_ns:
+                self._nodes.move_to_end(path)
+        if cached is not None and cached.mtime_ns == mtime_ns:
+            job.count("dirs_cached")
+            node = cached
+        else:
+            own_size = 0
+            own_files = 0
+            subdirs = []
+            try:
+                with os.scandir(path) as it:
+                    for entry in it:
+                        try:
+                            # On Windows the stat comes with the directory read, no extra call
+                            stat_result = entry.stat(follow_symlinks=False)
+                            if is_link(stat_result):
+                                # Symlinked and junction folders are not followed, they'd be
+                                # counted twice or loop
+                                continue
+                            if stat.S_ISDIR(stat_result.st_mode):
+                                subdirs.append(entry.path)
+                            elif stat.S_ISREG(stat_result.st_mode):
+                                own_size += stat_result.st_size
+                                own_files += 1
+                        except OSError:
+                            pass
+            except OSError:
+                job.count("dirs_failed")
+                return None
+            node = DirNode(mtime_ns, own_size, own_files, tuple(subdirs))
+            job.count("dirs_scanned")
+            with self._lock:
+                self._nodes[path] = node
+                while len(self._nodes) > self.max_nodes:
+                    evicted, _ = self._nodes.popitem(last=False)
+                    self._totals.pop(evicted, None)
+        job.count("files", node.own_files)
+        job.count("bytes", node.own_size)
+        return node
+
+    def _store_totals(self, totals: dict):
+        with self._lock:
+            # Directories evicted from _nodes during the walk aren't kept
+            self._totals.update(
+                (path, total) for path, total in totals.items() if path in self._nodes)
+
+    def _aggregate_subtree(self, path: str, job: FolderSizeJob):
+        """(size, files, dirs) of the tree at path, walked iteratively in one worker"""
+        visited = []
+        stack = [path]
+        while stack:
+            if job.cancelled:
+                raise FolderSizeCancelled()
+            directory = stack.pop()
+            node = self._node(directory, job)
+            if node is None:
+                continue
+            visited.append((directory, node))
+            stack.extend(node.subdirs)
+
+        # Children come after their parent in visited, so reversed order sums bottom-up
+        totals = {}
+        for directory, node in reversed(visited):
+            size, files, dirs = node.own_size, node.own_files, 0
+            for subdir in node.subdirs:
+                child = totals.get(subdir)
+                if child:
+                    size += child[0]
+                    files += child[1]
+                    dirs += child[2] + 1
+            totals[directory] = (size, files, dirs)
+
+        self._store_totals(totals)
+        result = totals.get(path, (0, 0, 0))
+        with job._lock:
+            job.children[path] = result
+        return result
+
+    # ---- results
+
+    def treemap(self, path: str, depth: int = 2, min_fraction: float = 0.01):
+        """Nested {name, size, children} tree from the last completed walk of path
+
+        Direct files are reported as a "(files)" child and subfolders smaller
+        than min_fraction of their parent are merged into "(other)", so children
+        always add up to the parent's size.
+        """
+        path = os.path.abspath(path)
+        with self._lock:
+            if path not in self._totals:
+                raise LookupError(f"No folder size results for {path}, start a job first")
+            return self._treemap_node(path, depth, min_fraction)
+
+    def _treemap_node(self, path: str, depth: int, min_fraction: float):
+        size, files, dirs = self._totals[path]
+        node = {
+            "name": os.path.basename(path.rstrip("\\/")) or path,
+            "path": path,
+            "size": size,
+            "files": files,
+            "dirs": dirs,
+        }
+        cached = self._nodes.get(path)
+        if depth <= 0 or cached is None:
+            return node
+
+        children = []
+        other_size = 0
+        other_count = 0
+        threshold = size * min_fraction
+        for subdir in cached.subdirs:
+            total = self._totals.get(subdir)
+            if total is None:
+                continue
+            if total[0] < threshold:
+                other_size += total[0]
+                other_count += 1
+                continue
+            children.append(self._treemap_node(subdir, depth - 1, min_fraction))
+        if cached.own_size:
+            children.append({"name": "(files)", "path": path, "size": cached.own_size,
+                             "files": cached.own_files, "dirs": 0})
+        if other_size:
+            children.append({"name": "(other)", "path": path, "size": other_size,
+                             "files": None, "dirs": other_count})
+        children.sort(key=lambda child: child["size"], reverse=True)
+        node["children"] = children
+        return node
@@ -0,0 +1,479 @@
+import ctypes
+import os
+import threading
+import time
+from collections import deque
+from ctypes import wintypes
+
+# Primitive input events understood by every backend:
+#   ("move", x, y)                  absolute pointer move in screen pixels
+#   ("mouse", button, is_down)      button is "left", "right" or "middle"
+#   ("wheel", delta, horizontal)    raw wheel units, 120 is one notch
+#   ("key", key_name, is_down)      pyautogui key names, e.g. "ctrl", "enter", "a"
+#   ("char", character)             type one character (press and release)
+WHEEL_DELTA = 120
+
+
+class InputBackend:
+    """Base class for input backends
+
+    Subclasses implement send() for a list of primitive events and position();
+    the higher level operations below are built on top of them so that a whole
+    gesture is handed to the backend in as few calls as possible.
+    """
+
+    name = "base"
+
+    def send(self, events):
+        raise NotImplementedError
+
+    def position(self):
+        raise NotImplementedError
+
+    def move(self, x: int, y: int):
+        self.send([("move", x, y)])
+
+    def click(self, x: int, y: int, button: str = "left", clicks: int = 1):
+        events = [("move", x, y)]
+        for _ in range(clicks):
+            events.append(("mouse", button, True))
+            events.append(("mouse", button, False))
+        self.send(events)
+
+    def mouse_down(self, x: int, y: int, button: str = "left"):
+        self.send([("move", x, y), ("mouse", button, True)])
+
+    def mouse_up(self, x: int, y: int, button: str = "left"):
+        self.send([("move", x, y), ("mouse", button, False)])
+
+    def drag(self, start_x: int, start_y: int, end_x: int, end_y: int, duration: float = 0.5, rate: int = 60):
+        """Press at the start point, move to the end point over duration seconds and release"""
+        self.send([("move", start_x, start_y), ("mouse", "left", True)])
+        steps = max(int(duration * rate), 1)
+        started = time.perf_counter()
+        for step in range(1, steps + 1):
+            # Sleep until the scheduled time of this step instead of a fixed interval,
+            # so the time spent in send() does not stretch the drag
+            delay = started + duration * step / steps - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            x = round(start_x + (end_x - start_x) * step / steps)
+            y = round(start_y + (end_y - start_y) * step / steps)
+            self.send([("move", x, y)])
+        self.send([("mouse", "left", False)])
+
+    def scroll(self, x, y, delta: int, horizontal: bool = False):
+        events = [] if x is None or y is None else [("move", x, y)]
+        events.append(("wheel", int(delta), horizontal))
+        self.send(events)
+
+    def wheel(self, x, y, delta_y: int = 0, delta_x: int = 0):
+        """Scroll both axes at a position in one call, deltas are raw wheel units"""
+        events = [] if x is None or y is None else [("move", x, y)]
+        if delta_y:
+            events.append(("wheel", int(delta_y), False))
+        if delta_x:
+            events.append(("wheel", int(delta_x), True))
+        self.send(events)
+
+    def press(self, key: str):
+        self.send([("key", key, True), ("key", key, False)])
+
+    def hotkey(self, *keys):
+        events = [("key", key, True) for key in keys]
+        events.extend(("key", key, False) for key in reversed(keys))
+        self.send(events)
+
+    def type_text(self, text: str):
+        self.send([("char", char) for char in text])
+
+
+class PyAutoGUIBackend(InputBackend):
+    """Portable backend on top of pyautogui, without its implicit pauses"""
+
+    name = "pyautogui"
+
+    def __init__(self):
+        import pyautogui
+
+        self.pyautogui = pyautogui
+        # Disable pyautogui's fail-safe mechanism to allow remote control
+        pyautogui.FAILSAFE = False
+
+    def send(self, events):
+        gui = self.pyautogui
+        for event in events:
+            kind = event[0]
+            if kind == "move":
+                gui.moveTo(event[1], event[2], _pause=False)
+            elif kind == "mouse":
+                if event[2]:
+                    gui.mouseDown(button=event[1], _pause=False)
+                else:
+                    gui.mouseUp(button=event[1], _pause=False)
+            elif kind == "wheel":
+                if event[2]:
+                    gui.hscroll(event[1], _pause=False)
+                else:
+                    gui.scroll(event[1], _pause=False)
+            elif kind == "key":
+                if event[2]:
+                    gui.keyDown(event[1], _pause=False)
+                else:
+                    gui.keyUp(event[1], _pause=False)
+            elif kind == "char":
+                gui.write(event[1], _pause=False)
+            else:
+                raise ValueError(f"Unsupported input event: {kind}")
+
+    def type_text(self, text: str):
+        self.pyautogui.write(text, _pause=False)
+
+    def position(self):
+        x, y = self.pyautogui.position()
+        return int(x), int(y)
+
+
+# ==================== Win32 SendInput ====================
+
+INPUT_MOUSE = 0
+INPUT_KEYBOARD = 1
+
+MOUSEEVENTF_MOVE = 0x0001
+MOUSEEVENTF_LEFTDOWN = 0x0002
+MOUSEEVENTF_LEFTUP = 0x0004
+MOUSEEVENTF_RIGHTDOWN = 0x0008
+MOUSEEVENTF_RIGHTUP = 0x0010
+MOUSEEVENTF_MIDDLEDOWN = 0x0020
+MOUSEEVENTF_MIDDLEUP = 0x0040
+MOUSEEVENTF_WHEEL = 0x0800
+MOUSEEVENTF_HWHEEL = 0x1000
+MOUSEEVENTF_VIRTUALDESK = 0x4000
+MOUSEEVENTF_ABSOLUTE = 0x8000
+
+KEYEVENTF_EXTENDEDKEY = 0x0001
+KEYEVENTF_KEYUP = 0x0002
+KEYEVENTF_UNICODE = 0x0004
+
+PROCESS_PER_MONITOR_DPI_AWARE = 2
+# HRESULT SetProcessDpiAwareness returns when the awareness was already set
+E_ACCESSDENIED = -2147024891
+
+SM_XVIRTUALSCREEN = 76
+SM_YVIRTUALSCREEN = 77
+SM_CXVIRTUALSCREEN = 78
+SM_CYVIRTUALSCREEN = 79
+
+MOUSE_BUTTON_FLAGS = {
+    "left": (MOUSEEVENTF_LEFTDOWN, MOUSEEVENTF_LEFTUP),
+    "right": (MOUSEEVENTF_RIGHTDOWN, MOUSEEVENTF_RIGHTUP),
+    "middle": (MOUSEEVENTF_MIDDLEDOWN, MOUSEEVENTF_MIDDLEUP),
+}
+
+# pyautogui key names -> virtual key codes, the same table pyautogui uses on Windows
+VIRTUAL_KEYS = {
+    "backspace": 0x08, "\b": 0x08, "tab": 0x09, "clear": 0x0C, "enter": 0x0D, "return": 0x0D,
+    "shift": 0x10, "ctrl": 0x11, "alt": 0x12, "pause": 0x13, "capslock": 0x14,
+    "kana": 0x15, "hanguel": 0x15, "hangul": 0x15, "junja": 0x17, "final": 0x18,
+    "hanja": 0x19, "kanji": 0x19, "escape": 0x1B, "esc": 0x1B,
+    "convert": 0x1C, "nonconvert": 0x1D, "accept": 0x1E, "modechange": 0x1F,
+    "space": 0x20, " ": 0x20,
+    "pageup": 0x21, "pgup": 0x21, "pagedown": 0x22, "pgdn": 0x22,
+    "end": 0x23, "home": 0x24, "left": 0x25, "up": 0x26, "right": 0x27, "down": 0x28,
+    "select": 0x29, "print": 0x2A, "execute": 0x2B,
+    "printscreen": 0x2C, "prtsc": 0x2C, "prtscr": 0x2C, "prntscrn": 0x2C,
+    "insert": 0x2D, "delete": 0x2E, "del": 0x2E, "help": 0x2F,
+    "win": 0x5B, "winleft": 0x5B, "super": 0x5B, "winright": 0x5C, "apps": 0x5D, "sleep": 0x5F,
+    "multiply": 0x6A, "add": 0x6B, "separator": 0x6C, "subtract": 0x6D,
+    "decimal": 0x6E, "divide": 0x6F,
+    "numlock": 0x90, "scrolllock": 0x91,
+    "shiftleft": 0xA0, "shiftright": 0xA1, "ctrlleft": 0xA2, "ctrlright": 0xA3,
+    "altleft": 0xA4, "altright": 0xA5,
+    "browserback": 0xA6, "browserforward": 0xA7, "browserrefresh": 0xA8, "browserstop": 0xA9,
+    "browsersearch": 0xAA, "browserfavorites": 0xAB, "browserhome": 0xAC,
+    "volumemute": 0xAD, "volumedown": 0xAE, "volumeup": 0xAF,
+    "nexttrack": 0xB0, "prevtrack": 0xB1, "stop": 0xB2, "playpause": 0xB3,
+    "launchmail": 0xB4, "launchmediaselect": 0xB5, "launchapp1": 0xB6, "launchapp2": 0xB7,
+    # macOS modifier names sent by Mac clients, mapped to their Windows counterparts
+    "command": 0x11, "option": 0x12, "optionleft": 0xA4, "optionright": 0xA5,
+    "\n": 0x0D, "\r": 0x0D, "\t": 0x09,
+}
+VIRTUAL_KEYS.update({chr(code).lower(): code for code in range(0x41, 0x5B)})
+VIRTUAL_KEYS.update({str(digit): 0x30 + digit for digit in range(10)})
+VIRTUAL_KEYS.update({f"f{n}": 0x6F + n for n in range(1, 25)})
+VIRTUAL_KEYS.update({f"num{digit}": 0x60 + digit for digit in range(10)})
+
+# VkKeyScanW high byte bits -> modifier virtual keys a character needs
+SHIFT_STATE_KEYS = ((0x01, 0x10), (0x02, 0x11), (0x04, 0x12))
+
+# Keys that need KEYEVENTF_EXTENDEDKEY to be told apart from their numpad twins
+EXTENDED_KEYS = {
+    0x21, 0x22, 0x23, 0x24, 0x25, 0x26, 0x27, 0x28, 0x2C, 0x2D, 0x2E,
+    0x5B, 0x5C, 0x5D, 0x6F, 0x90, 0xA3, 0xA5,
+}
+
+
+def enable_dpi_awareness():
+    """Make the process DPI aware, so Win32 metrics are physical pixels on scaled displays
+
+    Must run before any metrics are read. Importing pyautogui used to do
+    this as a side effect; without it GetSystemMetrics reports logical
+    sizes while EnumDisplaySettings reports physical ones, which misplaces
+    SendInput clicks and crops captures. Returns whether it succeeded.
+    """
+    if os.name != "nt":
+        return False
+    try:
+        # Per-monitor awareness, Windows 8.1 and later
+        result = ctypes.windll.shcore.SetProcessDpiAwareness(PROCESS_PER_MONITOR_DPI_AWARE)
+        if result in (0, E_ACCESSDENIED):
+            return True
+    except (AttributeError, OSError):
+        pass
+    try:
+        # System-wide awareness, what pyautogui sets
+        return bool(ctypes.windll.user32.SetProcessDPIAware())
+    except (AttributeError, OSError):
+        return False
+
+
+class MOUSEINPUT(ctypes.Structure):
+    _fields_ = [
+        ("dx", wintypes.LONG),
+        ("dy", wintypes.LONG),
+        ("mouseData", wintypes.DWORD),
+        ("dwFlags", wintypes.DWORD),
+        ("time", wintypes.DWORD),
+        ("dwExtraInfo", ctypes.c_size_t),
+    ]
+
+
+class KEYBDINPUT(ctypes.Structure):
+    _fields_ = [
+        ("wVk", wintypes.WORD),
+        ("wScan", wintypes.WORD),
+        ("dwFlags", wintypes.DWORD),
+        ("time", wintypes.DWORD),
+        ("dwExtraInfo", ctypes.c_size_t),
+    ]
+
+
+class HARDWAREINPUT(ctypes.Structure):
+    _fields_ = [
+        ("uMsg", wintypes.DWORD),
+        ("wParamL", wintypes.WORD),
+        ("wParamH", wintypes.WORD),
+    ]
+
+
+class _INPUTUNION(ctypes.Union):
+    _fields_ = [("mi", MOUSEINPUT), ("ki", KEYBDINPUT), ("hi", HARDWAREINPUT)]
+
+
+class INPUT(ctypes.Structure):
+    _fields_ = [("type", wintypes.DWORD), ("union", _INPUTUNION)]
+
+
+class SendInputBackend(InputBackend):
+    """Native Windows backend, a whole list of events goes to one SendInput call"""
+
+    name = "sendinput"
+
+    def __init__(self):
+        if os.name != "nt":
+            raise RuntimeError("SendInput backend is only available on Windows")
+        self.user32 = ctypes.WinDLL("user32", use_last_error=True)
+        self.user32.SendInput.argtypes = (
+            wintypes.UINT, ctypes.POINTER(INPUT), ctypes.c_int)
+        self.user32.SendInput.restype = wintypes.UINT
+        self.user32.VkKeyScanW.argtypes = (wintypes.WCHAR,)
+        self.user32.VkKeyScanW.restype = ctypes.c_short
+
+    def _virtual_screen(self):
+        metrics = self.user32.GetSystemMetrics
+        return (
+            metrics(SM_XVIRTUALSCREEN),
+            metrics(SM_YVIRTUALSCREEN),
+            max(metrics(SM_CXVIRTUALSCREEN), 1),
+            max(metrics(SM_CYVIRTUALSCREEN), 1),
+        )
+
+    def _mouse_input(self, flags, dx=0, dy=0, data=0):
+        item = INPUT(type=INPUT_MOUSE)
+        item.union.mi = MOUSEINPUT(dx, dy, data & 0xFFFFFFFF, flags, 0, 0)
+        return item
+
+    def _key_input(self, vk=0, scan=0, flags=0):
+        item = INPUT(type=INPUT_KEYBOARD)
+        item.union.ki = KEYBDINPUT(vk, scan, flags, 0, 0)
+        return item
+
+    def _virtual_key(self, key: str):
+        """(virtual key, VkKeyScanW shift state) for a key name or character, or (None, 0)"""
+        # Single characters are case-sensitive: "A" needs shift, "a" doesn't
+        vk = VIRTUAL_KEYS.get(key if len(key) == 1 else key.lower())
+        if vk is None and len(key) == 1:
+            scan = self.user32.VkKeyScanW(key)
+            if scan != -1:
+                return scan & 0xFF, (scan >> 8) & 0xFF
+        return vk, 0
+
+    @staticmethod
+    def _utf16_units(char: str):
+        encoded = char.encode("utf-16-le")
+        return [int.from_bytes(encoded[i:i + 2], "little")
+                for i in range(0, len(encoded), 2)]
+
+    def _key_inputs(self, key: str, is_down: bool):
+        """Inputs pressing or releasing one key, by pyautogui name or character"""
+        vk, shift_state = self._virtual_key(key)
+        if vk is None:
+            if len(key) != 1:
+                raise ValueError(f"Unsupported key: {key}")
+            # No key on the current layout produces this character, send it as Unicode
+            flags = KEYEVENTF_UNICODE if is_down else KEYEVENTF_UNICODE | KEYEVENTF_KEYUP
+            return [self._key_input(scan=unit, flags=flags) for unit in self._utf16_units(key)]
+
+        flags = KEYEVENTF_EXTENDEDKEY if vk in EXTENDED_KEYS else 0
+        if not is_down:
+            return [self._key_input(vk, flags=flags | KEYEVENTF_KEYUP)]
+        # Like pyautogui, the modifiers a character needs are held only around its press
+        modifiers = [mod_vk for bit, mod_vk in SHIFT_STATE_KEYS if shift_state & bit]
+        inputs = [self._key_input(mod_vk) for mod_vk in modifiers]
+        inputs.append(self._key_input(vk, flags=flags))
+        inputs.extend(self._key_input(mod_vk, flags=KEYEVENTF_KEYUP)
+                      for mod_vk in reversed(modifiers))
+        return inputs
+
+    def _unicode_inputs(self, char: str):
+        """Inputs typing one character, as UTF-16 code units so any script works"""
+        vk = VIRTUAL_KEYS.get(char) if char in "\n\r\t" else None
+        if vk is not None:
+            return [self._key_input(vk), self._key_input(vk, flags=KEYEVENTF_KEYUP)]
+        units = self._utf16_units(char)
+        inputs = [self._key_input(scan=unit, flags=KEYEVENTF_UNICODE)
+                  for unit in units]
+        inputs.extend(self._key_input(scan=unit, flags=KEYEVENTF_UNICODE | KEYEVENTF_KEYUP)
+                      for unit in units)
+        return inputs
+
+    def _build_inputs(self, events):
+        inputs = []
+        screen = None
+        for event in events:
+            kind = event[0]
+            if kind == "move":
+                if screen is None:
+                    screen = self._virtual_screen()
+                left, top, width, height = screen
+                # Absolute coordinates are normalized to 0..65535 over the virtual desktop
+                dx = ((event[1] - left) * 65535) // max(width - 1, 1)
+                dy = ((event[2] - top) * 65535) // max(height - 1, 1)
+                inputs.append(self._mouse_input(
+                    MOUSEEVENTF_MOVE | MOUSEEVENTF_ABSOLUTE | MOUSEEVENTF_VIRTUALDESK, dx, dy))
+            elif kind == "mouse":
+                down_flag, up_flag = MOUSE_BUTTON_FLAGS[event[1]]
+                inputs.append(self._mouse_input(
+                    down_flag if event[2] else up_flag))
+            elif kind == "wheel":
+                flag = MOUSEEVENTF_HWHEEL if event[2] else MOUSEEVENTF_WHEEL
+                inputs.append(self._mouse_input(flag, data=event[1]))
+            elif kind == "key":
+                inputs.extend(self._key_inputs(event[1], event[2]))
+            elif kind == "char":
+                inputs.extend(self._unicode_inputs(event[1]))
+            else:
+                raise ValueError(f"Unsupported input event: {kind}")
+        return inputs
+
+    def send(self, events):
+        inputs = self._build_inputs(events)
+        if not inputs:
+            return
+        array = (INPUT * len(inputs))(*inputs)
+        sent = self.user32.SendInput(
+            len(inputs), array, ctypes.sizeof(INPUT))
+        if sent != len(inputs):
+            raise OSError(
+                f"SendInput inserted {sent}/{len(inputs)} events, error code: {ctypes.get_last_error()}")
+
+    def position(self):
+        point = wintypes.POINT()
+        self.user32.GetCursorPos(ctypes.byref(point))
+        return point.x, point.y
+
+
+class RecordingBackend(InputBackend):
+    """Fake backend that records the event stream with timestamps instead of touching the OS"""
+
+    name = "recording"
+
+    def __init__(self, max_events: int = 100000):
+        self.events = deque(maxlen=max_events)
+        self.batches = 0
+        self._position = (0, 0)
+        self._lock = threading.Lock()
+
+    def send(self, events):
+        now = time.perf_counter()
+        with self._lock:
+            self.batches += 1
+            for event in events:
+                if event[0] == "move":
+                    self._position = (event[1], event[2])
+                self.events.append((now, self.batches, event))
+
+    def position(self):
+        return self._position
+
+    def clear(self):
+        with self._lock:
+            self.events.clear()
+            self.batches = 0
+
+    def get_events(self):
+        """Recorded events as dicts, in the order they were sent"""
+        with self._lock:
+            return [
+                {"timestamp": timestamp, "batch": batch, "event": list(event)}
+                for timestamp, batch, event in self.events
+            ]
+
+
+INPUT_BACKENDS = {
+    PyAutoGUIBackend.name: PyAutoGUIBackend,
+    SendInputBackend.name: SendInputBackend,
+    RecordingBackend.name: RecordingBackend,
+}
+
+
+def create_input_backend(name: str = "auto"):
+    """Create an input backend by name, "auto" prefers SendInput on Windows"""
+    if name == "auto":
+        if os.name == "nt":
+            try:
+                return SendInputBackend()
+            except Exception as e:
+                print(f"SendInput backend unavailable, using pyautogui: {e}")
+        return PyAutoGUIBackend()
+
+    if name not in INPUT_BACKENDS:
+        raise ValueError(
+            f"Unknown input backend: {name}, expected one of {', '.join(INPUT_BACKENDS)}")
+    return INPUT_BACKENDS[name]()
+
+
+if __name__ == "__main__":
+    # Throughput and ordering benchmark with the recording backend, runs on any OS
+    backend = RecordingBackend()
+    operations = 20000
+    start = time.perf_counter()
+    for i in range(operations):
+        backend.click(i % 1920, i % 1080)
+    elapsed = time.perf_counter() - start
+
+    events = backend.get_events()
+    moves = [e["event"] for e in events if e["event"][0] == "move"]
+    ordered = all(move[1] == i % 1920 for i, move in enumerate(moves))
+    print(f"{operations} clicks -> {len(events)} events in {elapsed * 1000:.1f}ms")
+    print(f"Throughput: {len(events) / elapsed:,.0f} events/s, ordering preserved: {ordered}")
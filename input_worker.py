@@ -0,0 +1,147 @@
+import threading
+import time
+from collections import deque
+
+
+class LatencyStats:
+    """Rolling latency statistics over the most recent samples (milliseconds)"""
+
+    def __init__(self, window: int = 500):
+        self.samples = deque(maxlen=window)
+        self.total_count = 0
+        self._lock = threading.Lock()
+
+    def add(self, latency_ms: float):
+        with self._lock:
+            self.samples.append(latency_ms)
+            self.total_count += 1
+
+    def clear(self):
+        with self._lock:
+            self.samples.clear()
+            self.total_count = 0
+
+    def summary(self):
+        with self._lock:
+            ordered = sorted(self.samples)
+        if not ordered:
+            return {"count": self.total_count, "avg_ms": 0, "p50_ms": 0, "p95_ms": 0, "max_ms": 0}
+
+        def percentile(p):
+            return round(ordered[min(int(len(ordered) * p), len(ordered) - 1)], 2)
+
+        return {
+            "count": self.total_count,
+            "avg_ms": round(sum(ordered) / len(ordered), 2),
+            "p50_ms": percentile(0.5),
+            "p95_ms": percentile(0.95),
+            "max_ms": round(ordered[-1], 2),
+        }
+
+
+class InputWorker:
+    """Single input thread that executes events in order and coalesces pointer moves
+
+    Consecutive "move" events still waiting in the queue collapse to the latest
+    position, while every other event keeps its strict arrival order.
+    """
+
+    MOVE_TYPE = "move"
+
+    def __init__(self, dispatch, max_queue: int = 1000):
+        # dispatch(event) -> result dict, executed on the worker thread
+        self.dispatch = dispatch
+        self.max_queue = max_queue
+        # Queue items are [event, enqueue_time, callback]
+        self._queue = deque()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._running = False
+        self.events_received = 0
+        self.events_executed = 0
+        self.moves_coalesced = 0
+        self.events_dropped = 0
+        self.move_latency = LatencyStats()
+        self.event_latency = LatencyStats()
+
+    def start(self):
+        """Start the input worker thread"""
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(
+            target=self._run, name="input-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the input worker thread after the current event"""
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+
+    def submit(self, event: dict, callback=None):
+        """Queue an event; callback(result) is invoked on the worker thread"""
+        now = time.perf_counter()
+        with self._condition:
+            self.events_received += 1
+            if (
+                event.get("type") == self.MOVE_TYPE
+                and self._queue
+                and self._queue[-1][0].get("type") == self.MOVE_TYPE
+            ):
+                # Collapse to the latest position but keep the oldest enqueue time,
+                # so the measured latency covers the whole wait of the pointer
+                self._queue[-1][0] = event
+                self._queue[-1][2] = callback
+                self.moves_coalesced += 1
+                return True
+
+            if len(self._queue) >= self.max_queue:
+                self.events_dropped += 1
+                return False
+
+            self._queue.append([event, now, callback])
+            self._condition.notify()
+            return True
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running and not self._queue:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                event, enqueued_at, callback = self._queue.popleft()
+
+            try:
+                result = self.dispatch(event)
+            except Exception as e:
+                result = {"success": False, "message": f"Input event failed: {str(e)}"}
+
+            latency_ms = (time.perf_counter() - enqueued_at) * 1000
+            if event.get("type") == self.MOVE_TYPE:
+                self.move_latency.add(latency_ms)
+            else:
+                self.event_latency.add(latency_ms)
+            self.events_executed += 1
+
+            if callback:
+                try:
+                    callback(result)
+                except Exception as e:
+                    print(f"Input event callback failed: {e}")
+
+    def get_stats(self):
+        with self._condition:
+            queue_depth = len(self._queue)
+        return {
+            "running": self._running,
+            "queue_depth": queue_depth,
+            "events_received": self.events_received,
+            "events_executed": self.events_executed,
+            "moves_coalesced": self.moves_coalesced,
+            "events_dropped": self.events_dropped,
+            "move_latency": self.move_latency.summary(),
+            "event_latency": self.event_latency.summary(),
+        }
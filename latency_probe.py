@@ -0,0 +1,162 @@
+import json
+import threading
+import time
+from bisect import bisect_left
+
+from PIL import ImageChops
+
+# Histogram bucket upper bounds in milliseconds, the last bucket collects everything above
+HISTOGRAM_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram in milliseconds"""
+
+    def __init__(self, buckets=HISTOGRAM_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self._lock = threading.Lock()
+
+    def add(self, value_ms: float):
+        with self._lock:
+            self.counts[bisect_left(self.buckets, value_ms)] += 1
+            self.count += 1
+            self.total += value_ms
+            self.min = value_ms if self.min is None else min(self.min, value_ms)
+            self.max = value_ms if self.max is None else max(self.max, value_ms)
+
+    def percentile(self, p: float):
+        """Approximate percentile, reported as the upper bound of the bucket it falls in"""
+        if not self.count:
+            return 0
+        target = self.count * p
+        running = 0
+        for bound, count in zip(self.buckets, self.counts):
+            running += count
+            if running >= target:
+                return bound
+        return round(self.max, 2)
+
+    def to_dict(self):
+        with self._lock:
+            labels = [f"<={bound}ms" for bound in self.buckets]
+            labels.append(f">{self.buckets[-1]}ms")
+            return {
+                "count": self.count,
+                "avg_ms": round(self.total / self.count, 2) if self.count else 0,
+                "min_ms": round(self.min, 2) if self.min is not None else 0,
+                "max_ms": round(self.max, 2) if self.max is not None else 0,
+                "p50_ms": self.percentile(0.5),
+                "p95_ms": self.percentile(0.95),
+                "buckets": dict(zip(labels, self.counts)),
+            }
+
+
+class LatencyProbe:
+    """Measure input-to-visible-frame latency
+
+    The probe captures a baseline of a screen region, dispatches a synthetic
+    input, captures the region until its pixels change, then encodes that frame
+    the same way screenshots are encoded for the client.
+    """
+
+    STAGES = ("receive", "dispatch", "capture", "encode", "send", "total")
+
+    def __init__(self, capture_region, dispatch, encode, change_threshold: int = 16,
+                 min_changed_fraction: float = 0.001):
+        # capture_region(left, top, width, height) -> PIL image
+        self.capture_region = capture_region
+        # dispatch(event) -> result dict
+        self.dispatch = dispatch
+        # encode(image) -> str, the payload that would be sent to the client
+        self.encode = encode
+        # Per-channel difference that counts a pixel as changed
+        self.change_threshold = change_threshold
+        self.min_changed_fraction = min_changed_fraction
+        self.histograms = {stage: LatencyHistogram() for stage in self.STAGES}
+        self.probes_run = 0
+        self.probes_timed_out = 0
+        self._lock = threading.Lock()
+
+    def _changed_fraction(self, baseline, frame):
+        diff = ImageChops.difference(baseline, frame).convert("L")
+        mask = diff.point(lambda v: 255 if v > self.change_threshold else 0)
+        return mask.histogram()[255] / max(frame.width * frame.height, 1)
+
+    def run(self, event: dict, region, timeout: float = 2.0, receive_ms: float = None):
+        """Run one probe; region is (left, top, width, height) in screen pixels"""
+        # Only one probe at a time, concurrent probes would see each other's changes
+        with self._lock:
+            return self._run(event, region, timeout, receive_ms)
+
+    def _run(self, event, region, timeout, receive_ms):
+        baseline = self.capture_region(*region)
+
+        dispatch_start = time.perf_counter()
+        result = self.dispatch(event)
+        dispatch_end = time.perf_counter()
+        if not result.get("success"):
+            return {"success": False, "message": f"Probe input failed: {result.get('message')}"}
+
+        frame = None
+        captures = 0
+        changed_fraction = 0.0
+        deadline = dispatch_end + timeout
+        while time.perf_counter() < deadline:
+            candidate = self.capture_region(*region)
+            captures += 1
+            changed_fraction = self._changed_fraction(baseline, candidate)
+            if changed_fraction >= self.min_changed_fraction:
+                frame = candidate
+                break
+        capture_end = time.perf_counter()
+
+        self.probes_run += 1
+        if frame is None:
+            self.probes_timed_out += 1
+            return {
+                "success": False,
+                "message": f"No pixel change detected within {timeout}s",
+                "captures": captures,
+            }
+
+        payload = self.encode(frame)
+        encode_end = time.perf_counter()
+        json.dumps({"image": payload})
+        send_end = time.perf_counter()
+
+        stages = {
+            "dispatch": (dispatch_end - dispatch_start) * 1000,
+            "capture": (capture_end - dispatch_end) * 1000,
+            "encode": (encode_end - capture_end) * 1000,
+            "send": (send_end - encode_end) * 1000,
+        }
+        if receive_ms is not None and receive_ms >= 0:
+            stages["receive"] = receive_ms
+        stages["total"] = sum(stages.values())
+        for stage, value in stages.items():
+            self.histograms[stage].add(value)
+
+        return {
+            "success": True,
+            "stages_ms": {stage: round(value, 2) for stage, value in stages.items()},
+            "captures": captures,
+            "changed_fraction": round(changed_fraction, 4),
+            "encoded_size": len(payload),
+        }
+
+    def reset(self):
+        self.histograms = {stage: LatencyHistogram() for stage in self.STAGES}
+        self.probes_run = 0
+        self.probes_timed_out = 0
+
+    def get_stats(self):
+        return {
+            "probes_run": self.probes_run,
+            "probes_timed_out": self.probes_timed_out,
+            "histograms": {stage: h.to_dict() for stage, h in self.histograms.items()},
+        }
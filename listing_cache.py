@@ -0,0 +1,139 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+
+from directory_listing import scan_directory
+from directory_watcher import create_directory_watcher
+
+
+class CachedListing(NamedTuple):
+    mtime_ns: int
+    entries: list
+    watched: bool
+    scanned_at: float
+
+
+class ListingCache:
+    """In-memory cache of directory scans, LRU-bounded by listings and total entries
+
+    A cached listing is reused while the directory's mtime is unchanged and no
+    watcher event has arrived for it. Directory mtime only changes when entries
+    are added, removed or renamed, so when no watcher is available a listing is
+    also rescanned after unwatched_max_age to pick up file size changes.
+    """
+
+    def __init__(self, max_listings: int = 64, max_entries: int = 200000,
+                 unwatched_max_age: float = 5.0, watch: bool = True):
+        self.max_listings = max_listings
+        self.max_entries = max_entries
+        self.unwatched_max_age = unwatched_max_age
+        self._listings = OrderedDict()
+        self._total_entries = 0
+        # Invalidation count per directory, a scan that overlaps an invalidation is not stored
+        self._generations = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+        self.watcher = create_directory_watcher(self.invalidate) if watch else None
+
+    @staticmethod
+    def _key(path: str):
+        return os.path.normcase(os.path.abspath(path))
+
+    def scan(self, path: str, timeout: float = None):
+        """Same contract as scan_directory, served from the cache when still valid"""
+        key = self._key(path)
+        mtime_ns = os.stat(path).st_mtime_ns
+        with self._lock:
+            cached = self._listings.get(key)
+            if cached and cached.mtime_ns == mtime_ns and (
+                cached.watched or time.monotonic() - cached.scanned_at < self.unwatched_max_age
+            ):
+                self._listings.move_to_end(key)
+                self.hits += 1
+                return cached.entries, True
+            self.misses += 1
+            generation = self._generations.get(key, 0)
+
+        # Watch before scanning so changes made during the scan aren't missed
+        watched = False
+        if self.watcher is not None:
+            try:
+                self.watcher.watch(key)
+                watched = True
+            except Exception as e:
+                print(f"Failed to watch {key}: {e}")
+
+        entries, complete = scan_directory(path, timeout)
+        if not (complete and self._store(key, mtime_ns, entries, watched, generation)) and watched:
+            self.watcher.unwatch(key)
+        return entries, complete
+
+    def _store(self, key, mtime_ns, entries, watched, generation):
+        evicted = []
+        with self._lock:
+            if generation != self._generations.get(key, 0):
+                # The directory changed while it was being scanned
+                return False
+            previous = self._listings.pop(key, None)
+            if previous:
+                self._total_entries -= len(previous.entries)
+            self._listings[key] = CachedListing(
+                mtime_ns, entries, watched, time.monotonic())
+            self._total_entries += len(entries)
+            while len(self._listings) > 1 and (
+                len(self._listings) > self.max_listings or self._total_entries > self.max_entries
+            ):
+                old_key, old = self._listings.popitem(last=False)
+                self._total_entries -= len(old.entries)
+                self.evictions += 1
+                evicted.append(old_key)
+
+        if self.watcher is not None:
+            for old_key in evicted:
+                self.watcher.unwatch(old_key)
+        return True
+
+    def invalidate(self, path: str):
+        key = self._key(path)
+        with self._lock:
+            if len(self._generations) > 10000:
+                self._generations.clear()
+            self._generations[key] = self._generations.get(key, 0) + 1
+            cached = self._listings.pop(key, None)
+            if cached:
+                self._total_entries -= len(cached.entries)
+                self.invalidations += 1
+        if cached and self.watcher is not None:
+            self.watcher.unwatch(key)
+
+    def clear(self):
+        with self._lock:
+            keys = list(self._listings)
+            self._listings.clear()
+            self._total_entries = 0
+            for key in keys:
+                self._generations[key] = self._generations.get(key, 0) + 1
+        if self.watcher is not None:
+            for key in keys:
+                self.watcher.unwatch(key)
+
+    def get_stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "listings": len(self._listings),
+                "entries": self._total_entries,
+                "max_listings": self.max_listings,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups * 100, 2) if lookups else 0,
+                "invalidations": self.invalidations,
+                "evictions": self.evictions,
+                "watcher": self.watcher.name if self.watcher else None,
+            }
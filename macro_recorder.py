@@ -0,0 +1,159 @@
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime
+
+from path_player import sleep_until
+
+MACRO_NAME_PATTERN = re.compile(r"^[A-Za-z0-9_\-]{1,64}$")
+# Fields that only matter for the live request, not for the recorded action
+TRANSIENT_FIELDS = ("id", "delay_ms")
+
+
+class MacroRecorder:
+    """Record input events as a timestamped log, store it as JSON and replay it"""
+
+    def __init__(self, macro_dir: str, max_events: int = 100000):
+        self.macro_dir = macro_dir
+        self.max_events = max_events
+        self._lock = threading.Lock()
+        self._name = None
+        self._started_at = None
+        self._events = []
+        os.makedirs(self.macro_dir, exist_ok=True)
+
+    @property
+    def recording(self):
+        return self._name is not None
+
+    def _path(self, name: str):
+        if not MACRO_NAME_PATTERN.match(name or ""):
+            raise ValueError(
+                "Macro name may only contain letters, digits, '_' and '-' (up to 64 characters)")
+        return os.path.join(self.macro_dir, f"{name}.json")
+
+    def start(self, name: str):
+        """Start recording a new macro"""
+        self._path(name)
+        with self._lock:
+            if self.recording:
+                raise RuntimeError(f"Already recording macro: {self._name}")
+            self._name = name
+            self._started_at = time.perf_counter()
+            self._events = []
+
+    def record(self, event: dict, at: float = None):
+        """Append an event with its offset from the start of the recording
+
+        at is the time.perf_counter() the action started, for actions that
+        are recorded only once they've finished; defaults to now.
+        """
+        if not self.recording:
+            return
+        at = time.perf_counter() if at is None else at
+        offset_ms = round(max(at - self._started_at, 0) * 1000, 2)
+        compact = {k: v for k, v in event.items() if k not in TRANSIENT_FIELDS}
+        with self._lock:
+            if self.recording and len(self._events) < self.max_events:
+                self._events.append([offset_ms, compact])
+
+    def stop(self):
+        """Stop recording and save the macro, returns its summary"""
+        with self._lock:
+            if not self.recording:
+                raise RuntimeError("No macro is being recorded")
+            name, events = self._name, self._events
+            self._name = None
+            self._events = []
+
+        macro = {
+            "name": name,
+            "created": datetime.now().isoformat(),
+            "duration_ms": events[-1][0] if events else 0,
+            "events": events,
+        }
+        with open(self._path(name), "w", encoding="utf-8") as f:
+            json.dump(macro, f, separators=(",", ":"))
+        return self._summary(macro)
+
+    @staticmethod
+    def _summary(macro: dict):
+        return {
+            "name": macro["name"],
+            "created": macro.get("created"),
+            "duration_ms": macro.get("duration_ms", 0),
+            "event_count": len(macro.get("events", [])),
+        }
+
+    def load(self, name: str):
+        path = self._path(name)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Macro not found: {name}")
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def delete(self, name: str):
+        path = self._path(name)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Macro not found: {name}")
+        os.remove(path)
+
+    def list(self):
+        macros = []
+        for filename in sorted(os.listdir(self.macro_dir)):
+            if not filename.endswith(".json"):
+                continue
+            try:
+                macros.append(self._summary(
+                    self.load(filename[:-len(".json")])))
+            except Exception as e:
+                print(f"Failed to read macro {filename}: {e}")
+        return macros
+
+    @staticmethod
+    def _scale_event(event: dict, speed: float):
+        """Scale the client timestamps embedded in streamed drag events"""
+        if speed == 1.0:
+            return event
+        event = dict(event)
+        if "t" in event:
+            event["t"] = float(event["t"]) / speed
+        if isinstance(event.get("points"), list):
+            event["points"] = [
+                [p[0], p[1], float(p[2]) / speed] if len(p) > 2 else p
+                for p in event["points"]
+            ]
+        return event
+
+    def play(self, name: str, dispatch, speed: float = 1.0, stop_on_error: bool = False):
+        """Replay a macro with its recorded timing divided by speed"""
+        if speed <= 0:
+            raise ValueError("Speed must be greater than 0")
+        macro = self.load(name)
+
+        results = []
+        lateness = []
+        start = time.perf_counter()
+        for offset_ms, event in macro["events"]:
+            due = start + offset_ms / 1000 / speed
+            sleep_until(due)
+            lateness.append((time.perf_counter() - due) * 1000)
+            result = dispatch(self._scale_event(event, speed))
+            if not result.get("success"):
+                results.append({"index": len(lateness) - 1,
+                                "type": event.get("type"), **result})
+                if stop_on_error:
+                    break
+
+        return {
+            "success": not results,
+            "name": name,
+            "speed": speed,
+            "executed": len(lateness),
+            "total": len(macro["events"]),
+            "failures": results,
+            "duration_ms": round((time.perf_counter() - start) * 1000, 2),
+            "max_lateness_ms": round(max(lateness), 2) if lateness else 0,
+        }
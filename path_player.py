@@ -0,0 +1,199 @@
+import threading
+import time
+from collections import deque
+
+# Waits longer than this are done on the playback condition so a cancelled drag
+# wakes up at once; only the last stretch is a plain sleep
+WAKEUP_MARGIN = 0.002
+
+
+def sleep_until(deadline: float):
+    """Wait until a time.perf_counter() deadline
+
+    Always a real sleep, never a spin: on Python 3.11+ Windows sleeps on a
+    high resolution waitable timer, and elsewhere an overshoot of about a
+    millisecond is cheaper than keeping a core busy for every point.
+    """
+    while True:
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            return
+        time.sleep(remaining)
+
+
+class PathPlayer:
+    """Replay a streamed pointer path with the client's original timing
+
+    The client sends points as (x, y, t_ms) where t_ms is its own timestamp.
+    Playback is delayed by a small jitter buffer so network hiccups do not
+    show up as pauses in the drawn path.
+
+    Only one drag plays at a time. Each drag belongs to an owner (the input
+    stream, or one /remote/drag-path request); calls from another owner
+    while it plays raise RuntimeError, and a new drag from the same owner
+    cancels the unfinished one first.
+    """
+
+    def __init__(self, backend, jitter_buffer_ms: float = 50, idle_timeout: float = 5.0,
+                 max_duration: float = 60.0):
+        self.backend = backend
+        self.jitter_buffer = jitter_buffer_ms / 1000
+        # Release the button if the stream stalls, e.g. the client disconnected mid-drag
+        self.idle_timeout = idle_timeout
+        # Longest drag accepted, in the client's time
+        self.max_duration = max_duration
+        self._points = deque()
+        self._condition = threading.Condition()
+        # Serializes starting drags, so two can't reset the state at once
+        self._start_lock = threading.Lock()
+        self._owner = None
+        self._thread = None
+        self._done = threading.Event()
+        self._done.set()
+        self._ending = False
+        self._button = "left"
+        self._client_start = 0.0
+        self._server_start = 0.0
+        self._stats = {}
+
+    @property
+    def active(self):
+        return not self._done.is_set()
+
+    def _check_owner(self, owner):
+        if not self.active:
+            raise RuntimeError("No drag in progress")
+        if owner != self._owner:
+            raise RuntimeError("Another drag is in progress")
+
+    def start(self, x: int, y: int, t_ms: float, button: str = "left", owner="stream"):
+        """Press the button at the first point and start the playback thread"""
+        with self._start_lock:
+            if self.active:
+                if owner != self._owner:
+                    raise RuntimeError("Another drag is in progress")
+                # The owner's unfinished drag is dropped, not played to the end
+                with self._condition:
+                    self._points.clear()
+                    self._ending = True
+                    self._condition.notify()
+                if not self._done.wait(1.0):
+                    raise RuntimeError("The previous drag is still being released")
+
+            self.backend.send([("move", x, y), ("mouse", button, True)])
+            with self._condition:
+                self._points.clear()
+                self._ending = False
+                self._owner = owner
+                self._button = button
+                self._client_start = float(t_ms)
+                self._server_start = time.perf_counter() + self.jitter_buffer
+                self._stats = {
+                    "points_received": 1,
+                    "points_played": 1,
+                    "batches_sent": 1,
+                    "late_points": 0,
+                    "max_lateness_ms": 0.0,
+                    "total_lateness_ms": 0.0,
+                    "started_at": time.perf_counter(),
+                }
+                self._done.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="path-player", daemon=True)
+            self._thread.start()
+
+    def add_points(self, points, owner="stream"):
+        """Queue screen points as (x, y, t_ms) for timed playback"""
+        self._check_owner(owner)
+        with self._condition:
+            for _, _, t_ms in points:
+                if float(t_ms) - self._client_start > self.max_duration * 1000:
+                    raise ValueError(
+                        f"Drags are limited to {self.max_duration:g} seconds")
+            for x, y, t_ms in points:
+                self._points.append((x, y, float(t_ms)))
+            self._stats["points_received"] += len(points)
+            self._condition.notify()
+
+    def end(self, points=None, timeout: float = None, owner="stream"):
+        """Queue the final points, wait for playback to finish and release the button"""
+        self._check_owner(owner)
+        if points:
+            self.add_points(points, owner)
+        with self._condition:
+            self._ending = True
+            self._condition.notify()
+        if timeout is None:
+            # Every queued point is due within max_duration of the start
+            timeout = self.max_duration + self.jitter_buffer + 5.0
+        self._done.wait(timeout)
+        return self.get_stats()
+
+    def _due_time(self, t_ms: float):
+        return self._server_start + (t_ms - self._client_start) / 1000
+
+    def _run(self):
+        last_activity = time.perf_counter()
+        try:
+            while True:
+                with self._condition:
+                    while not self._points and not self._ending:
+                        if time.perf_counter() - last_activity > self.idle_timeout:
+                            print("Drag stream stalled, releasing mouse button")
+                            self._ending = True
+                            break
+                        self._condition.wait(0.1)
+                    if not self._points and self._ending:
+                        break
+                    next_due = self._due_time(self._points[0][2])
+                    remaining = next_due - time.perf_counter()
+                    if remaining > WAKEUP_MARGIN:
+                        # Woken early when the drag is cancelled or points arrive
+                        self._condition.wait(remaining - WAKEUP_MARGIN)
+                        continue
+
+                sleep_until(next_due)
+
+                # Send every point that is due now in one backend call
+                now = time.perf_counter()
+                batch = []
+                with self._condition:
+                    while self._points and self._due_time(self._points[0][2]) <= now:
+                        x, y, t_ms = self._points.popleft()
+                        lateness = (now - self._due_time(t_ms)) * 1000
+                        batch.append(("move", x, y))
+                        self._stats["total_lateness_ms"] += lateness
+                        if lateness > self._stats["max_lateness_ms"]:
+                            self._stats["max_lateness_ms"] = lateness
+                        if lateness > 5:
+                            self._stats["late_points"] += 1
+                if batch:
+                    self.backend.send(batch)
+                    self._stats["points_played"] += len(batch)
+                    self._stats["batches_sent"] += 1
+                last_activity = time.perf_counter()
+        except Exception as e:
+            print(f"Drag playback failed: {e}")
+        finally:
+            try:
+                self.backend.send([("mouse", self._button, False)])
+            except Exception as e:
+                print(f"Failed to release mouse button after drag: {e}")
+            self._stats["duration_ms"] = (
+                time.perf_counter() - self._stats["started_at"]) * 1000
+            self._done.set()
+
+    def get_stats(self):
+        stats = dict(self._stats)
+        played = max(stats.get("points_played", 0), 1)
+        return {
+            "active": self.active,
+            "points_received": stats.get("points_received", 0),
+            "points_played": stats.get("points_played", 0),
+            "batches_sent": stats.get("batches_sent", 0),
+            "late_points": stats.get("late_points", 0),
+            "avg_lateness_ms": round(stats.get("total_lateness_ms", 0.0) / played, 2),
+            "max_lateness_ms": round(stats.get("max_lateness_ms", 0.0), 2),
+            "duration_ms": round(stats.get("duration_ms", 0.0), 2),
+            "jitter_buffer_ms": round(self.jitter_buffer * 1000, 1),
+        }
@@ -0,0 +1,169 @@
+import heapq
+import threading
+import time
+
+import psutil
+
+
+class ProcessSampler:
+    """Sample per-process CPU, memory and IO usage and keep the top-N offenders"""
+
+    SORT_KEYS = ("cpu", "memory", "io")
+
+    def __init__(self, top_n: int = 10, batch_size: int = 150, interval: float = 1.0):
+        self.top_n = top_n
+        # Maximum number of processes visited per tick, keeps the per-tick cost bounded
+        self.batch_size = batch_size
+        self.interval = interval
+
+        # pid -> psutil.Process, reused across ticks so cpu_percent() returns real deltas
+        self._processes = {}
+        # pid -> latest sample dict
+        self._samples = {}
+        # pid -> (io_bytes, timestamp) for IO rate calculation
+        self._io_history = {}
+        # pids still to visit in the current round
+        self._pending = []
+        self._top = {key: [] for key in self.SORT_KEYS}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop_event = threading.Event()
+        self.last_tick_time = None
+        self.last_tick_duration_ms = 0
+        self.rounds_completed = 0
+
+    def start(self):
+        """Start the background sampling thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="process-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background sampling thread"""
+        self._stop_event.set()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.tick()
+            except Exception as e:
+                print(f"Process sampler tick failed: {e}")
+            self._stop_event.wait(self.interval)
+
+    def _start_round(self):
+        """Refresh the pid list and drop processes that have exited"""
+        pids = psutil.pids()
+        alive = set(pids)
+        for pid in list(self._processes.keys()):
+            if pid not in alive:
+                self._processes.pop(pid, None)
+                self._io_history.pop(pid, None)
+                with self._lock:
+                    self._samples.pop(pid, None)
+        self._pending = pids
+        self.rounds_completed += 1
+
+    def _get_process(self, pid: int):
+        """Return the cached Process for pid, recreating it only if the pid was reused"""
+        proc = self._processes.get(pid)
+        if proc is not None and proc.is_running():
+            return proc
+        proc = psutil.Process(pid)
+        # First call primes the CPU counters and always returns 0.0
+        proc.cpu_percent(None)
+        self._processes[pid] = proc
+        self._io_history.pop(pid, None)
+        return proc
+
+    def _sample_process(self, pid: int, now: float):
+        proc = self._get_process(pid)
+        with proc.oneshot():
+            name = proc.name()
+            cpu = proc.cpu_percent(None)
+            rss = proc.memory_info().rss
+            try:
+                io = proc.io_counters()
+                io_bytes = io.read_bytes + io.write_bytes
+            except (psutil.AccessDenied, AttributeError, NotImplementedError):
+                io_bytes = None
+
+        io_rate = 0.0
+        if io_bytes is not None:
+            previous = self._io_history.get(pid)
+            if previous is not None and now > previous[1]:
+                io_rate = max(io_bytes - previous[0], 0) / (now - previous[1])
+            self._io_history[pid] = (io_bytes, now)
+
+        return {
+            "pid": pid,
+            "name": name,
+            "cpu_percent": round(cpu, 1),
+            "memory_mb": round(rss / (1024 * 1024), 1),
+            "io_bytes_per_sec": round(io_rate, 1),
+        }
+
+    def tick(self):
+        """Visit the next batch of processes and refresh the top-N lists"""
+        start = time.perf_counter()
+        if not self._pending:
+            self._start_round()
+
+        batch = self._pending[-self.batch_size:]
+        del self._pending[-self.batch_size:]
+
+        now = time.monotonic()
+        updates = {}
+        gone = []
+        for pid in batch:
+            try:
+                updates[pid] = self._sample_process(pid, now)
+            except (psutil.NoSuchProcess, psutil.ZombieProcess):
+                gone.append(pid)
+            except psutil.AccessDenied:
+                continue
+
+        for pid in gone:
+            self._processes.pop(pid, None)
+            self._io_history.pop(pid, None)
+
+        with self._lock:
+            for pid in gone:
+                self._samples.pop(pid, None)
+            self._samples.update(updates)
+            samples = list(self._samples.values())
+            self._top = {
+                "cpu": heapq.nlargest(self.top_n, samples, key=lambda s: s["cpu_percent"]),
+                "memory": heapq.nlargest(self.top_n, samples, key=lambda s: s["memory_mb"]),
+                "io": heapq.nlargest(self.top_n, samples, key=lambda s: s["io_bytes_per_sec"]),
+            }
+
+        self.last_tick_time = time.time()
+        self.last_tick_duration_ms = round((time.perf_counter() - start) * 1000, 2)
+
+    def get_top(self, sort_by: str = "cpu", limit: int = None):
+        """Get the top processes for one metric"""
+        if sort_by not in self.SORT_KEYS:
+            raise ValueError(
+                f"Invalid sort key: {sort_by}, expected one of {', '.join(self.SORT_KEYS)}")
+        with self._lock:
+            top = list(self._top[sort_by])
+        return top[:limit] if limit else top
+
+    def get_summary(self, limit: int = 5):
+        """Get the top processes for every metric, used by the status stream"""
+        with self._lock:
+            return {key: list(self._top[key][:limit]) for key in self.SORT_KEYS}
+
+    def get_stats(self):
+        return {
+            "tracked_processes": len(self._processes),
+            "pending_in_round": len(self._pending),
+            "rounds_completed": self.rounds_completed,
+            "batch_size": self.batch_size,
+            "interval_seconds": self.interval,
+            "last_tick": self.last_tick_time,
+            "last_tick_duration_ms": self.last_tick_duration_ms,
+        }
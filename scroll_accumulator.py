@@ -0,0 +1,127 @@
+import threading
+import time
+
+
+class ScrollAccumulator:
+    """Merge wheel deltas aimed at the same spot over a short window
+
+    A fast trackpad gesture produces dozens of wheel events; they are summed per
+    target position and delivered as one fine-grained wheel event per axis.
+    """
+
+    def __init__(self, deliver, window_ms: float = 30, grid: int = 8):
+        # deliver(x, y, delta_y, delta_x) -> result dict, in raw wheel units
+        self.deliver = deliver
+        self.window = window_ms / 1000
+        # Targets within the same grid cell count as one position
+        self.grid = grid
+        self._pending = {}
+        self._condition = threading.Condition()
+        # Held while entries are taken and delivered, so flush() returns only once
+        # everything queued before it, including a delivery in progress, has been sent
+        self._delivery_lock = threading.Lock()
+        self._thread = None
+        self.raw_events = 0
+        self.deliveries = 0
+        # Raw events merged into another event's delivery
+        self.coalesced = 0
+        self.last_coalesced = 0
+
+    def start(self):
+        """Start the background flush thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="scroll-accumulator", daemon=True)
+        self._thread.start()
+
+    def add(self, x: int, y: int, delta_y: int = 0, delta_x: int = 0):
+        """Queue wheel deltas for a screen position, returns the pending entry"""
+        key = (x // self.grid, y // self.grid)
+        with self._condition:
+            self.raw_events += 1
+            entry = self._pending.get(key)
+            if entry is None:
+                entry = {
+                    "delta_y": 0,
+                    "delta_x": 0,
+                    "count": 0,
+                    "deadline": time.perf_counter() + self.window,
+                    "done": threading.Event(),
+                    "result": None,
+                }
+                self._pending[key] = entry
+                self._condition.notify()
+            # Deliver at the latest pointer position inside the cell
+            entry["x"] = x
+            entry["y"] = y
+            entry["delta_y"] += int(delta_y)
+            entry["delta_x"] += int(delta_x)
+            entry["count"] += 1
+            return entry
+
+    def wait(self, entry, timeout: float = 5.0):
+        """Wait until an entry has been delivered and return its result"""
+        if not entry["done"].wait(timeout):
+            return {"success": False, "message": "Scroll delivery timed out"}
+        return entry["result"]
+
+    def flush(self):
+        """Deliver everything pending right now, used before other input to keep ordering"""
+        with self._delivery_lock:
+            with self._condition:
+                entries = list(self._pending.values())
+                self._pending.clear()
+            for entry in entries:
+                self._deliver(entry)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+                now = time.perf_counter()
+                earliest = min(e["deadline"] for e in self._pending.values())
+                if earliest > now:
+                    self._condition.wait(earliest - now)
+                    continue
+            with self._delivery_lock:
+                with self._condition:
+                    # flush() may have taken them while the lock was being acquired
+                    now = time.perf_counter()
+                    due = [key for key, e in self._pending.items()
+                           if e["deadline"] <= now]
+                    entries = [self._pending.pop(key) for key in due]
+                for entry in entries:
+                    self._deliver(entry)
+
+    def _deliver(self, entry):
+        try:
+            if entry["delta_y"] or entry["delta_x"]:
+                result = self.deliver(
+                    entry["x"], entry["y"], entry["delta_y"], entry["delta_x"])
+            else:
+                result = {"success": True,
+                          "message": "Scroll deltas cancelled out"}
+        except Exception as e:
+            result = {"success": False, "message": f"Scroll failed: {str(e)}"}
+        result["coalesced_events"] = entry["count"]
+        result["delta_y"] = entry["delta_y"]
+        result["delta_x"] = entry["delta_x"]
+        entry["result"] = result
+        self.deliveries += 1
+        self.coalesced += entry["count"] - 1
+        self.last_coalesced = entry["count"]
+        entry["done"].set()
+
+    def get_stats(self):
+        with self._condition:
+            pending = len(self._pending)
+        return {
+            "window_ms": round(self.window * 1000, 1),
+            "pending_targets": pending,
+            "raw_events": self.raw_events,
+            "deliveries": self.deliveries,
+            "coalesced_events": self.coalesced,
+            "last_delivery_coalesced": self.last_coalesced,
+        }
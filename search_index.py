@@ -0,0 +1,435 @@
+import copy
+import fnmatch
+import os
+import re
+import stat
+import threading
+import time
+from array import array
+
+from directory_listing import is_link
+from directory_watcher import create_directory_watcher
+
+GLOB_CHARACTERS = "*?["
+
+
+def trigrams(text: str):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def is_within(path: str, root: str):
+    """Whether path is root or below it, paths on different drives never are"""
+    try:
+        return os.path.commonpath([root, path]) == root
+    except ValueError:
+        # commonpath refuses to compare across Windows drives
+        return False
+
+
+class SearchIndex:
+    """In-memory filename index over a set of root folders
+
+    Entries live in parallel arrays indexed by entry id; every lowercased name
+    is posted under each of its trigrams, so a substring query only verifies
+    the entries of its rarest trigram instead of scanning every name. Removed
+    entries are tombstoned and the arrays are compacted once tombstones pile up.
+
+    Roots are crawled with scandir on a background thread and kept current by
+    rescanning the single directories a filesystem watcher reports as changed.
+    """
+
+    def __init__(self, max_entries: int = 2000000, recrawl_interval: float = 3600.0):
+        self.max_entries = max_entries
+        # Full recrawl as a safety net for missed or overflowed watch events
+        self.recrawl_interval = recrawl_interval
+        self.roots = []
+        self._lock = threading.RLock()
+        self._reset()
+        self._queue = []
+        self._queue_cond = threading.Condition()
+        self.crawling = False
+        self.last_crawl_ms = 0
+        self.last_crawl_at = None
+        self.updates = 0
+        self.truncated = False
+        self.watcher = create_directory_watcher(self._on_change)
+        self._thread = None
+
+    # Everything _reset() initializes, swapped as a whole by rebuild()
+    _INDEX_ATTRIBUTES = (
+        "_dir_paths", "_dir_ids", "_names", "_lower", "_parent", "_is_dir", "_size",
+        "_mtime", "_alive", "_tombstones", "_children", "_postings",
+    )
+
+    def _reset(self):
+        # Directory table: every indexed folder (roots included) gets a dir id
+        self._dir_paths = []
+        self._dir_ids = {}
+        # Entry columns
+        self._names = []
+        self._lower = []
+        self._parent = array("I")
+        self._is_dir = bytearray()
+        self._size = array("q")
+        self._mtime = array("d")
+        self._alive = bytearray()
+        self._tombstones = 0
+        # dir id -> {name: entry id}, used to diff a directory on rescan
+        self._children = {}
+        self._postings = {}
+
+    @property
+    def entry_count(self):
+        return len(self._names) - self._tombstones
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(
+            target=self._worker, name="search-index", daemon=True)
+        self._thread.start()
+
+    def add_root(self, path: str):
+        """Index a folder tree, ignored when it's already covered by another root"""
+        path = os.path.abspath(path)
+        if not os.path.isdir(path):
+            raise FileNotFoundError(f"Folder not found: {path}")
+        with self._lock:
+            for root in self.roots:
+                if is_within(path, root):
+                    return False
+            # A new root that contains existing ones replaces them
+            self.roots = [r for r in self.roots if not is_within(r, path)]
+            self.roots.append(path)
+        self._enqueue(("crawl", path))
+        return True
+
+    def _enqueue(self, task):
+        with self._queue_cond:
+            if task not in self._queue:
+                self._queue.append(task)
+            self._queue_cond.notify()
+
+    def _on_change(self, path: str):
+        self._enqueue(("rescan", path))
+
+    def _worker(self):
+        last_crawl = time.monotonic()
+        while True:
+            with self._queue_cond:
+                if not self._queue:
+                    self._queue_cond.wait(timeout=60)
+                task = self._queue.pop(0) if self._queue else None
+
+            try:
+                if task is None:
+                    if time.monotonic() - last_crawl >= self.recrawl_interval:
+                        self.rebuild()
+                        last_crawl = time.monotonic()
+                    continue
+                kind, path = task
+                if kind == "crawl":
+                    self._crawl_root(path)
+                    last_crawl = time.monotonic()
+                else:
+                    self._rescan(path)
+            except Exception as e:
+                print(f"Search index task {task} failed: {e}")
+
+    def rebuild(self):
+        """Crawl all roots into a new index and swap it in once it's complete
+
+        Searches keep using the current index until then instead of seeing a
+        partly crawled one. Watch events that arrive meanwhile are queued for
+        this thread and applied to the new index after the swap.
+        """
+        with self._lock:
+            roots = list(self.roots)
+        # Same settings and watcher, its own tables and lock
+        builder = copy.copy(self)
+        builder._lock = threading.RLock()
+        builder.truncated = False
+        builder._reset()
+
+        self.crawling = True
+        start = time.perf_counter()
+        try:
+            for root in roots:
+                builder._dir_id(root)
+                builder._watch(root, root=True)
+                builder._crawl(root)
+            with self._lock:
+                for name in self._INDEX_ATTRIBUTES:
+                    setattr(self, name, getattr(builder, name))
+                self.truncated = builder.truncated
+        finally:
+            self.crawling = False
+            self.last_crawl_ms = round((time.perf_counter() - start) * 1000, 2)
+            self.last_crawl_at = time.time()
+
+    # ---- building
+
+    def _dir_id(self, path: str):
+        dir_id = self._dir_ids.get(path)
+        if dir_id is None:
+            dir_id = len(self._dir_paths)
+            self._dir_paths.append(path)
+            self._dir_ids[path] = dir_id
+            self._children[dir_id] = {}
+        return dir_id
+
+    def _add_entry(self, dir_id: int, name: str, is_dir: bool, size: int, mtime: float):
+        entry_id = len(self._names)
+        lower = name.lower()
+        self._names.append(name)
+        self._lower.append(lower)
+        self._parent.append(dir_id)
+        self._is_dir.append(1 if is_dir else 0)
+        self._size.append(size)
+        self._mtime.append(mtime)
+        self._alive.append(1)
+        self._children[dir_id][name] = entry_id
+        for trigram in trigrams(lower):
+            posting = self._postings.get(trigram)
+            if posting is None:
+                posting = self._postings[trigram] = array("I")
+            posting.append(entry_id)
+        return entry_id
+
+    def _remove_entry(self, entry_id: int):
+        if not self._alive[entry_id]:
+            return
+        self._alive[entry_id] = 0
+        self._tombstones += 1
+        dir_id = self._parent[entry_id]
+        name = self._names[entry_id]
+        self._children[dir_id].pop(name, None)
+        if self._is_dir[entry_id]:
+            self._remove_directory(os.path.join(self._dir_paths[dir_id], name))
+
+    def _remove_directory(self, path: str):
+        dir_id = self._dir_ids.pop(path, None)
+        if dir_id is None:
+            return
+        for child_id in list(self._children[dir_id].values()):
+            self._remove_entry(child_id)
+        del self._children[dir_id]
+        if self.watcher is not None and not self.watcher.supports_subtree:
+            self.watcher.unwatch(path)
+
+    @staticmethod
+    def _scan(path: str):
+        """(name, is_dir, size, mtime) for each entry of path
+
+        Symlinked and junction folders are indexed as plain entries, not as
+        folders, so the crawl never follows them.
+        """
+        items = []
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    stat_result = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                is_dir = stat.S_ISDIR(stat_result.st_mode) and not is_link(stat_result)
+                items.append((entry.name, is_dir, 0 if is_dir else stat_result.st_size,
+                              stat_result.st_mtime))
+        return items
+
+    def _watch(self, path: str, root: bool = False):
+        if self.watcher is None:
+            return
+        if self.watcher.supports_subtree and not root:
+            return
+        try:
+            self.watcher.watch(path, subtree=self.watcher.supports_subtree)
+        except Exception as e:
+            print(f"Failed to watch {path} for the search index: {e}")
+
+    def _crawl(self, path: str):
+        """Index everything below path, which must already be in the directory table"""
+        stack = [path]
+        while stack:
+            directory = stack.pop()
+            self._watch(directory)
+            try:
+                items = self._scan(directory)
+            except OSError:
+                continue
+            # The lock is taken per directory so searches can run during a crawl
+            with self._lock:
+                if directory not in self._dir_ids:
+                    continue
+                dir_id = self._dir_ids[directory]
+                for name, is_dir, size, mtime in items:
+                    if self.entry_count >= self.max_entries:
+                        self.truncated = True
+                        return
+                    if name in self._children[dir_id]:
+                        continue
+                    self._add_entry(dir_id, name, is_dir, size, mtime)
+                    if is_dir:
+                        child = os.path.join(directory, name)
+                        self._dir_id(child)
+                        stack.append(child)
+
+    def _crawl_root(self, root: str):
+        self.crawling = True
+        start = time.perf_counter()
+        try:
+            with self._lock:
+                self._dir_id(root)
+            self._watch(root, root=True)
+            self._crawl(root)
+        finally:
+            self.crawling = False
+            self.last_crawl_ms = round((time.perf_counter() - start) * 1000, 2)
+            self.last_crawl_at = time.time()
+
+    def _rescan(self, path: str):
+        """Bring one directory in line with the disk after a watch event"""
+        with self._lock:
+            dir_id = self._dir_ids.get(path)
+        if dir_id is None:
+            return
+        try:
+            items = self._scan(path)
+        except OSError:
+            # The directory itself is gone, its parent's event removes the entry
+            with self._lock:
+                self._remove_directory(path)
+            return
+
+        new_dirs = []
+        with self._lock:
+            if path not in self._dir_ids:
+                return
+            children = self._children[dir_id]
+            seen = set()
+            for name, is_dir, size, mtime in items:
+                seen.add(name)
+                entry_id = children.get(name)
+                if entry_id is not None and self._is_dir[entry_id] == is_dir:
+                    self._size[entry_id] = size
+                    self._mtime[entry_id] = mtime
+                    continue
+                if entry_id is not None:
+                    self._remove_entry(entry_id)
+                self._add_entry(dir_id, name, is_dir, size, mtime)
+                if is_dir:
+                    child = os.path.join(path, name)
+                    self._dir_id(child)
+                    new_dirs.append(child)
+            for name in [n for n in children if n not in seen]:
+                self._remove_entry(children[name])
+            self.updates += 1
+            if self._tombstones > max(50000, len(self._names) // 3):
+                self._compact()
+
+        for child in new_dirs:
+            self._crawl(child)
+
+    def _compact(self):
+        """Rebuild the columns and postings without tombstoned entries"""
+        old = (self._names, self._parent, self._is_dir, self._size, self._mtime, self._alive)
+        live_dirs = dict(self._dir_ids)
+        self._reset()
+        remap = {}
+        for path in sorted(live_dirs, key=live_dirs.get):
+            remap[live_dirs[path]] = self._dir_id(path)
+        names, parent, is_dir, size, mtime, alive = old
+        for entry_id, name in enumerate(names):
+            if alive[entry_id] and parent[entry_id] in remap:
+                self._add_entry(remap[parent[entry_id]], name, bool(is_dir[entry_id]),
+                                size[entry_id], mtime[entry_id])
+
+    # ---- querying
+
+    def _candidates(self, fragment: str):
+        """Entry ids that may contain fragment, or None when a full scan is needed"""
+        grams = trigrams(fragment)
+        if not grams:
+            return None
+        postings = []
+        for gram in grams:
+            posting = self._postings.get(gram)
+            if posting is None:
+                return []
+            postings.append(posting)
+        return min(postings, key=len)
+
+    def search(self, query: str, limit: int = 100, root: str = None, kind: str = None):
+        """Substring (case-insensitive) or glob search over file and folder names"""
+        start = time.perf_counter()
+        query = query.strip().lower()
+        if not query:
+            raise ValueError("Empty search query")
+
+        if any(c in query for c in GLOB_CHARACTERS):
+            matcher = re.compile(fnmatch.translate(query)).match
+            fragments = [f for f in re.split(r"[*?]|\[[^\]]*\]", query) if f]
+            fragment = max(fragments, key=len) if fragments else ""
+        else:
+            fragment = query
+            matcher = lambda name: query in name
+
+        root = os.path.abspath(root) if root else None
+        results = []
+        matched = 0
+        with self._lock:
+            candidates = self._candidates(fragment)
+            if candidates is None:
+                candidates = range(len(self._names))
+            lower = self._lower
+            alive = self._alive
+            for entry_id in candidates:
+                if not alive[entry_id] or not matcher(lower[entry_id]):
+                    continue
+                if kind == "files" and self._is_dir[entry_id]:
+                    continue
+                if kind == "dirs" and not self._is_dir[entry_id]:
+                    continue
+                directory = self._dir_paths[self._parent[entry_id]]
+                if root and not is_within(directory, root):
+                    continue
+                matched += 1
+                if len(results) < limit * 10:
+                    results.append(entry_id)
+
+            # Prefix matches and shorter names first
+            results.sort(key=lambda i: (not lower[i].startswith(fragment), len(lower[i]), lower[i]))
+            items = [
+                {
+                    "name": self._names[i],
+                    "path": os.path.join(self._dir_paths[self._parent[i]], self._names[i]),
+                    "folder": self._dir_paths[self._parent[i]],
+                    "type": "directory" if self._is_dir[i] else "file",
+                    "size": self._size[i],
+                    "mtime": self._mtime[i],
+                }
+                for i in results[:limit]
+            ]
+
+        return {
+            "query": query,
+            "results": items,
+            "matched": matched,
+            "truncated": matched > len(items),
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+        }
+
+    def get_status(self):
+        with self._lock:
+            return {
+                "roots": list(self.roots),
+                "entries": self.entry_count,
+                "directories": len(self._dir_ids),
+                "trigrams": len(self._postings),
+                "tombstones": self._tombstones,
+                "crawling": self.crawling,
+                "last_crawl_ms": self.last_crawl_ms,
+                "last_crawl_at": self.last_crawl_at,
+                "incremental_updates": self.updates,
+                "index_truncated": self.truncated,
+                "watcher": self.watcher.name if self.watcher else None,
+            }
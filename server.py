@@ -7,10 +7,10 @@ from fastapi import (
     File,
     Form,
     HTTPException,
+    Request,
+    Query,
 )
-import pyautogui
-from fastapi.responses import HTMLResponse, StreamingResponse, JSONResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import StreamingResponse, JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 import asyncio
 import json
@@ -36,8 +36,37 @@ import win32gui
 import win32ui
 import re
 import subprocess
+import hashlib
+import tempfile
+import uuid
 
 from foreground_path_detector import ForegroundPathDetector
+from process_sampler import ProcessSampler
+from input_worker import InputWorker
+from input_backends import create_input_backend, enable_dpi_awareness
+from coordinate_transforms import CoordinateTransformer
+from path_player import PathPlayer
+from scroll_accumulator import ScrollAccumulator
+from text_injection import TextInjector
+from latency_probe import LatencyProbe
+from macro_recorder import MacroRecorder
+from upload_sessions import UploadSessionManager, ChecksumMismatchError, PART_FILE_PREFIX, PART_FILE_SUFFIX
+from upload_pipeline import UploadPipeline, StreamingMultipartParser, UploadInterruptedError
+from file_responses import ranged_file_response, content_disposition, json_response_with_etag
+from zip_stream import stream_zip, iter_folder_entries
+from directory_listing import paginate
+from listing_cache import ListingCache
+from volume_info import create_volume_service
+from search_index import SearchIndex
+from folder_sizes import FolderSizeCalculator
+from delete_jobs import DeleteJobManager
+from thumbnails import ThumbnailService, is_thumbnail_supported
+from subfolder_counter import SubfolderCounter
+from compression import StaticAssetCache, CachedStaticFiles, JSONCompressionMiddleware
+from fast_json import FastJSONResponse, dumps_text
+
+# Before anything reads screen metrics, so they're physical pixels on scaled displays
+enable_dpi_awareness()
 
 APP_VERSION = "1.0.0"
 # GitHub Gist API URL to request
@@ -48,6 +77,8 @@ GIST_HEADERS = None
 REQUEST_INTERVAL = 120
 LOCAL_IP = None
 LOCAL_COMPUTER_NAME = platform.node()
+# Input backend for remote control: "auto", "sendinput", "pyautogui" or "recording"
+INPUT_BACKEND = "auto"
 
 try:
     with open("gist_info.json", "r") as f:
@@ -183,8 +214,20 @@ else:
         app = FastAPI(lifespan=lifespan,
                       title="Remote Viewer Server", version=APP_VERSION)
 
-# Configure static file service
-app.mount("/static", StaticFiles(directory="static"), name="static")
+# Text responses smaller than this are sent uncompressed
+COMPRESSION_MIN_SIZE = 1024
+# Base64 image payloads barely compress and would cost CPU on every frame
+COMPRESSION_EXCLUDED_PATHS = ("/screenshot", "/debug/monitor", "/thumbnails")
+
+# Configure static file service, files are held in memory with gzip/brotli variants
+static_asset_cache = StaticAssetCache()
+app.mount("/static", CachedStaticFiles("static", static_asset_cache), name="static")
+
+app.add_middleware(
+    JSONCompressionMiddleware,
+    minimum_size=COMPRESSION_MIN_SIZE,
+    excluded_paths=COMPRESSION_EXCLUDED_PATHS,
+)
 
 # Add CORS middleware
 app.add_middleware(
@@ -266,15 +309,15 @@ class NetworkMonitor:
 
 # Mouse and Keyboard Controller
 class RemoteController:
-    def __init__(self):
-        # Disable pyautogui's fail-safe mechanism to allow remote control
-        pyautogui.FAILSAFE = False
-        pyautogui.PAUSE = 0.1  # Operation interval
+    def __init__(self, backend=None):
+        # All input goes through an input backend (SendInput, pyautogui or a fake for testing)
+        self.backend = backend or create_input_backend(INPUT_BACKEND)
+        self.text_injector = TextInjector(self.backend)
 
     def click(self, x: int, y: int, button: str = "left", clicks: int = 1):
         """Execute mouse click"""
         try:
-            pyautogui.click(x, y, clicks=clicks, button=button)
+            self.backend.click(x, y, button, clicks)
             return {"success": True, "message": f"Click successful: ({x}, {y})"}
         except Exception as e:
             return {"success": False, "message": f"Click failed: {str(e)}"}
@@ -282,7 +325,7 @@ class RemoteController:
     def double_click(self, x: int, y: int, button: str = "left"):
         """Execute mouse double click"""
         try:
-            pyautogui.doubleClick(x, y, button=button)
+            self.backend.click(x, y, button, 2)
             return {"success": True, "message": f"Double click successful: ({x}, {y})"}
         except Exception as e:
             return {"success": False, "message": f"Double click failed: {str(e)}"}
@@ -290,22 +333,25 @@ class RemoteController:
     def right_click(self, x: int, y: int):
         """Execute mouse right click"""
         try:
-            pyautogui.rightClick(x, y)
+            self.backend.click(x, y, "right")
             return {"success": True, "message": f"Right click successful: ({x}, {y})"}
         except Exception as e:
             return {"success": False, "message": f"Right click failed: {str(e)}"}
 
+    def move(self, x: int, y: int):
+        """Move the mouse pointer"""
+        try:
+            self.backend.move(x, y)
+            return {"success": True, "message": f"Move successful: ({x}, {y})"}
+        except Exception as e:
+            return {"success": False, "message": f"Move failed: {str(e)}"}
+
     def drag(
         self, start_x: int, start_y: int, end_x: int, end_y: int, duration: float = 0.5
     ):
         """Execute mouse drag"""
         try:
-            # Move to start position and press mouse button
-            pyautogui.moveTo(start_x, start_y)
-            pyautogui.mouseDown(button="left")
-            # Drag to end position
-            pyautogui.moveTo(end_x, end_y, duration=duration)
-            pyautogui.mouseUp(button="left")
+            self.backend.drag(start_x, start_y, end_x, end_y, duration)
             return {
                 "success": True,
                 "message": f"Drag successful: ({start_x}, {start_y}) -> ({end_x}, {end_y})",
@@ -313,18 +359,19 @@ class RemoteController:
         except Exception as e:
             return {"success": False, "message": f"Drag failed: {str(e)}"}
 
-    def type_text(self, text: str):
-        """Input text"""
+    def type_text(self, text: str, strategy: str = "auto"):
+        """Input text, long or non-ASCII text is pasted or sent as Unicode input"""
         try:
-            pyautogui.typewrite(text)
-            return {"success": True, "message": f"Text input successful: {text}"}
+            stats = self.text_injector.inject(text, strategy)
+            preview = text if len(text) <= 50 else f"{text[:50]}..."
+            return {"success": True, "message": f"Text input successful: {preview}", **stats}
         except Exception as e:
             return {"success": False, "message": f"Text input failed: {str(e)}"}
 
     def press_key(self, key: str):
         """Press single key"""
         try:
-            pyautogui.press(key)
+            self.backend.press(key)
             return {"success": True, "message": f"Key press successful: {key}"}
         except Exception as e:
             return {"success": False, "message": f"Key press failed: {str(e)}"}
@@ -332,23 +379,34 @@ class RemoteController:
     def hotkey(self, *keys):
         """Execute key combination"""
         try:
-            pyautogui.hotkey(*keys)
+            self.backend.hotkey(*keys)
             return {"success": True, "message": f"Hotkey successful: {'+'.join(keys)}"}
         except Exception as e:
             return {"success": False, "message": f"Hotkey failed: {str(e)}"}
 
     def scroll(self, x: int, y: int, clicks: int):
-        """Execute mouse scroll"""
+        """Execute mouse scroll, clicks are raw wheel units"""
         try:
-            pyautogui.scroll(clicks, x=x, y=y)
+            self.backend.scroll(x, y, clicks)
             return {"success": True, "message": f"Scroll successful: ({x}, {y}) scroll {clicks}"}
         except Exception as e:
             return {"success": False, "message": f"Scroll failed: {str(e)}"}
 
+    def wheel(self, x: int, y: int, delta_y: int = 0, delta_x: int = 0):
+        """Execute vertical and horizontal scroll in raw wheel units (120 per notch)"""
+        try:
+            self.backend.wheel(x, y, delta_y, delta_x)
+            return {
+                "success": True,
+                "message": f"Scroll successful: ({x}, {y}) scrolled {delta_y} vertical, {delta_x} horizontal",
+            }
+        except Exception as e:
+            return {"success": False, "message": f"Scroll failed: {str(e)}"}
+
     def get_mouse_position(self):
         """Get current mouse position"""
         try:
-            x, y = pyautogui.position()
+            x, y = self.backend.position()
             return {"success": True, "x": x, "y": y}
         except Exception as e:
             return {"success": False, "message": f"Failed to get mouse position: {str(e)}"}
@@ -442,6 +500,10 @@ manager = ConnectionManager()
 network_monitor = NetworkMonitor()
 system_monitor = SystemMonitor()
 remote_controller = RemoteController()
+process_sampler = ProcessSampler()
+process_sampler.start()
+# Most processes /processes/top returns in one response
+PROCESSES_TOP_MAX = 100
 
 
 # Windows Desktop Screenshot Generator
@@ -541,6 +603,15 @@ class DesktopScreenshotGenerator:
         if cached_data:
             return cached_data
 
+        img_base64 = self.encode_image(img)
+
+        # Add to cache
+        self._add_to_cache(cache_key, img_base64)
+
+        return img_base64
+
+    def encode_image(self, img):
+        """Resize and encode a monitor image as base64 with the current quality settings"""
         # Get quality settings
         max_width = self.quality_settings["single_monitor"]["max_width"]
         max_height = self.quality_settings["single_monitor"]["max_height"]
@@ -569,12 +640,7 @@ class DesktopScreenshotGenerator:
                 compress_level=self.quality_settings["compression_level"],
             )
 
-        img_base64 = base64.b64encode(buffer.getvalue()).decode()
-
-        # Add to cache
-        self._add_to_cache(cache_key, img_base64)
-
-        return img_base64
+        return base64.b64encode(buffer.getvalue()).decode()
 
     def update_monitor_info(self):
         try:
@@ -883,6 +949,13 @@ class DesktopScreenshotGenerator:
             print(f"Fallback screenshot method failed: {e}")
             return self._create_error_image(f"Fallback screenshot failed: {str(e)}")
 
+    def capture_region(self, left, top, width, height):
+        """Capture a small screen region in virtual desktop coordinates"""
+        from PIL import ImageGrab
+
+        bbox = (left, top, left + width, top + height)
+        return ImageGrab.grab(bbox=bbox, all_screens=True).convert("RGB")
+
     def capture_desktop_screenshot(self):
         try:
             # Get the handle of the desktop window
@@ -1033,11 +1106,26 @@ async def ping():
     return "success"
 
 
+def version_static_links(html: bytes):
+    """Point /static/ links at ?v=<content hash> so browsers can cache them long-term"""
+    def replace(match):
+        version = static_asset_cache.version(os.path.join("static", match.group(2).decode()))
+        return match.group(1) + (f"?v={version}".encode() if version else b"")
+
+    return re.sub(rb'(/static/([^"\'?]+))(\?v=[^"\']*)?', replace, html)
+
+
+def load_index_asset():
+    # Rebuilt whenever index.html or any static file changes, so the versions stay current
+    return static_asset_cache.get(
+        "index.html", version_static_links, StaticAssetCache.directory_signature("static"))
+
+
 @app.get("/")
-async def get_index():
-    # Get back to index.html
-    with open("index.html", "r", encoding="utf-8") as f:
-        return HTMLResponse(content=f.read())
+async def get_index(request: Request):
+    # Get back to index.html, with each static link versioned by the file's content hash
+    asset = await asyncio.to_thread(load_index_asset)
+    return asset.response(request.headers, request.method)
 
 
 @app.get("/screenshot")
@@ -1057,7 +1145,7 @@ async def get_screenshot():
         )
         img_base64 = base64.b64encode(buffer.getvalue()).decode()
 
-        return {"image": img_base64, "timestamp": datetime.now().isoformat()}
+        return FastJSONResponse({"image": img_base64, "timestamp": datetime.now().isoformat()})
     except Exception as e:
         return {"error": str(e)}
 
@@ -1093,14 +1181,14 @@ async def get_single_monitor_screenshot(monitor_index: int):
 
         monitor = ui_generator.monitors[monitor_index]
 
-        return {
+        return FastJSONResponse({
             "monitor_index": monitor_index,
             "width": monitor["width"],
             "height": monitor["height"],
             "primary": monitor["primary"],
             "image": img_base64,
             "timestamp": datetime.now().isoformat(),
-        }
+        })
     except Exception as e:
         return {"error": str(e)}
 
@@ -1141,12 +1229,13 @@ async def get_all_monitor_screenshots():
                 }
             )
 
-        return {
+        # Multi-megabyte base64 payload, encoded without the jsonable_encoder pass
+        return FastJSONResponse({
             "screenshots": screenshots,
             "monitor_count": len(screenshots),
             "total_monitor_count": total_monitor_count,
             "timestamp": datetime.now().isoformat(),
-        }
+        })
     except Exception as e:
         return {"error": str(e)}
 
@@ -1174,10 +1263,11 @@ async def websocket_endpoint(websocket: WebSocket):
                 "memory_usage": system_info["memory_usage"],
                 "cpu_usage": system_info["cpu_usage"],
                 "disk_usage": system_info["disk_usage"],
+                "top_processes": process_sampler.get_summary(),
             }
 
             try:
-                await websocket.send_text(json.dumps(data))
+                await websocket.send_text(dumps_text(data))
             except Exception as e:
                 # If sending fails, the connection might be broken
                 print(f"Failed to send WebSocket: {e}")
@@ -1253,6 +1343,23 @@ async def get_system_info():
         return {"error": str(e)}
 
 
+@app.get("/processes/top")
+async def get_top_processes(sort_by: str = "cpu", limit: int = 10):
+    """Get the processes using the most CPU, memory or IO"""
+    limit = max(1, min(limit, PROCESSES_TOP_MAX))
+    try:
+        processes = process_sampler.get_top(sort_by, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {
+        "sort_by": sort_by,
+        "processes": processes,
+        "sampler": process_sampler.get_stats(),
+        "timestamp": datetime.now().isoformat(),
+    }
+
+
 @app.get("/monitors/config")
 async def get_monitors_config():
     """Get detailed monitor configuration"""
@@ -1433,6 +1540,9 @@ async def get_cache_stats():
             "total_requests": total_requests,
             "cache_hits": cache_hits,
             "cache_hit_rate": round((cache_hits / max(total_requests, 1)) * 100, 2),
+            "listing_cache": listing_cache.get_stats(),
+            "thumbnail_cache": thumbnail_service.get_stats(),
+            "static_assets": static_asset_cache.get_stats(),
             "timestamp": datetime.now().isoformat(),
         }
     except Exception as e:
@@ -1444,6 +1554,7 @@ async def clear_cache():
     try:
         cache_size = len(ui_generator.image_cache)
         ui_generator.image_cache.clear()
+        listing_cache.clear()
 
         return {
             "message": f"Cache is cleared, {cache_size} cache items were removed",
@@ -1611,6 +1722,42 @@ ALLOWED_EXTENSIONS = {
     ".7z",
 }
 UPLOAD_FILE_SIZE_LIMIT = 200
+# Uploads are copied to disk in chunks of this size, so memory use doesn't grow with file size
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Resumable upload sessions idle for longer than this are removed with their partial data
+UPLOAD_SESSION_TTL = 6 * 3600
+UPLOAD_SESSION_GC_INTERVAL = 300
+# Folders that received partial upload files, swept for leftovers after a restart
+UPLOAD_PART_DIRS_FILE = "upload_part_dirs.json"
+# Largest single chunk accepted by PUT /upload/sessions/{session_id}
+UPLOAD_SESSION_MAX_CHUNK = 64 * 1024 * 1024
+# Multi-file uploads are written by this many threads; each file being received buffers
+# at most this much that isn't written yet before the request stops being read
+UPLOAD_WORKERS = 4
+UPLOAD_MAX_BUFFERED_BYTES = 16 * 1024 * 1024
+# Threads counting subfolders for directory listings, and paths accepted per counts request
+SUBFOLDER_COUNT_WORKERS = 8
+SUBFOLDER_COUNT_MAX_PATHS = 1000
+# Counts queued by one listing, the rest are queued when the client asks for them
+SUBFOLDER_COUNT_MAX_PER_LISTING = 200
+# A count taking longer than this is reported as -1 and its worker replaced
+SUBFOLDER_COUNT_TIMEOUT = 5.0
+# Directory listings kept in memory, bounded by directory count and total entries
+LISTING_CACHE_MAX_DIRECTORIES = 64
+LISTING_CACHE_MAX_ENTRIES = 200000
+# Folder trees indexed for filename search at startup, more can be added with POST /search/roots
+SEARCH_INDEX_ROOTS = [DEFAULT_UPLOAD_DIR]
+SEARCH_MAX_RESULTS = 500
+# Threads walking folder trees for /folder-sizes jobs
+FOLDER_SIZE_WORKERS = 4
+# Generated thumbnails are kept on disk, keyed by file path, mtime and size
+THUMBNAIL_CACHE_DIR = "thumbnail_cache"
+THUMBNAIL_CACHE_MAX_BYTES = 200 * 1024 * 1024
+THUMBNAIL_WORKERS = 4
+THUMBNAIL_MIN_SIZE = 32
+THUMBNAIL_MAX_SIZE = 512
+# Files accepted per POST /thumbnails/batch request, about one listing page
+THUMBNAIL_BATCH_MAX_FILES = 500
 
 # Ensure the default Downloads directory exists (usually already exists)
 if not os.path.exists(DEFAULT_UPLOAD_DIR):
@@ -1639,6 +1786,49 @@ def get_upload_dir(folder_path=None):
         return DEFAULT_UPLOAD_DIR
 
 
+class UploadTooLargeError(Exception):
+    pass
+
+
+def save_upload_stream(source, file_path: str, max_bytes: int, progress=None):
+    """Copy an upload stream to file_path in fixed-size chunks, hashing it on the fly
+
+    Data is written to a temp file next to the target and renamed into place
+    once complete, so a failed upload never leaves a partial file behind.
+    progress, if given, is called with the bytes written so far after each chunk.
+    Returns (size_in_bytes, sha256_hex).
+    """
+    directory = os.path.dirname(file_path) or "."
+    # Same naming as session part files, so the session GC removes ones a restart left behind
+    upload_sessions.track_directory(directory)
+    fd, temp_path = tempfile.mkstemp(
+        dir=directory, prefix=PART_FILE_PREFIX, suffix=PART_FILE_SUFFIX)
+    sha256 = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as buffer:
+            while True:
+                chunk = source.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLargeError(
+                        f"The file size is over {max_bytes // (1024 * 1024)}MB limit")
+                sha256.update(chunk)
+                buffer.write(chunk)
+                if progress:
+                    progress(size)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    return size, sha256.hexdigest()
+
+
 def is_allowed_file(filename: str) -> bool:
     # Validate file extension
     if not filename:
@@ -1664,19 +1854,22 @@ async def upload_file(file: UploadFile = File(...), folder_path: str = Form(None
         safe_filename = f"{timestamp}_{file.filename}"
         file_path = os.path.join(upload_dir, safe_filename)
 
-        # Save file
-        with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
+        # Save file, streamed in chunks on a worker thread
+        try:
+            file_size, file_hash = await asyncio.to_thread(
+                save_upload_stream, file.file, file_path, UPLOAD_FILE_SIZE_LIMIT * 1024 * 1024
+            )
+        except UploadTooLargeError as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
         # Get file size in MB
-        file_size = len(content)
         file_size_mb = round(file_size / (1024 * 1024), 2)
         response_data = {
             "message": "The file is saved successfully",
             "filename": safe_filename,
             "original_name": file.filename,
             "size_mb": file_size_mb,
+            "sha256": file_hash,
             "upload_time": datetime.now().isoformat(),
             "file_path": file_path,
             "upload_dir": upload_dir,
@@ -1690,51 +1883,128 @@ async def upload_file(file: UploadFile = File(...), folder_path: str = Form(None
             status_code=500, detail=f"Failed to upload file: {str(e)}")
 
 
+upload_pipeline = UploadPipeline(
+    save_upload_stream, UPLOAD_WORKERS, UPLOAD_MAX_BUFFERED_BYTES)
+
+
+def unique_upload_path(upload_dir: str, filename: str, used: set):
+    """Path for filename in upload_dir that no other file of the batch or on disk has"""
+    base, ext = os.path.splitext(filename)
+    candidate = filename
+    counter = 1
+    # Compared case-insensitively, as on Windows
+    while candidate.lower() in used or os.path.exists(os.path.join(upload_dir, candidate)):
+        candidate = f"{base} ({counter}){ext}"
+        counter += 1
+    used.add(candidate.lower())
+    return os.path.join(upload_dir, candidate)
+
+
 @app.post("/upload/multiple")
-async def upload_multiple_files(
-    files: List[UploadFile] = File(...), folder_path: str = Form(None)
-):
+async def upload_multiple_files(request: Request, folder_path: str = None, upload_id: str = None):
+    """Upload many files at once, written to disk while the request is still arriving
+
+    The multipart body is parsed as it streams in and each file is handed to
+    the upload pool as soon as its part starts. folder_path and upload_id
+    can be query parameters, or form fields placed before the files.
+    Progress of each file can be polled at /upload/progress/{upload_id}
+    during the transfer.
+    """
     try:
-        if not files:
-            raise HTTPException(
-                status_code=400, detail="There is no file selected")
+        parser = StreamingMultipartParser(request.headers.get("content-type", ""))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    max_bytes = UPLOAD_FILE_SIZE_LIMIT * 1024 * 1024
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    upload_dir = None
+    progress = None
+    used_names = set()
+    writes = []
+    current = None
 
-        if len(files) > 10:
-            raise HTTPException(
-                status_code=400, detail="It's limited to upload up to 10 files at a time")
+    try:
+        async for chunk in request.stream():
+            try:
+                events = parser.feed(chunk)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            for event in events:
+                kind = event[0]
+                if kind == "data":
+                    if current is not None:
+                        await upload_pipeline.feed(current, event[1])
+                elif kind == "end":
+                    if current is not None:
+                        current.end()
+                        current = None
+                elif kind == "file":
+                    # Only the name is kept, a client-sent path can't leave the folder
+                    name = os.path.basename(event[2].replace("\\", "/"))
+                    if not name:
+                        # Empty file input
+                        continue
+                    if progress is None:
+                        upload_dir = await asyncio.to_thread(get_upload_dir, folder_path)
+                        progress = upload_pipeline.begin(upload_id or uuid.uuid4().hex)
+                    file_path = await asyncio.to_thread(
+                        unique_upload_path, upload_dir, f"{timestamp}_{name}", used_names)
+                    current, future = upload_pipeline.start_file(
+                        progress, name, file_path, max_bytes)
+                    writes.append((name, file_path, future))
+                elif kind == "field" and event[1] in ("folder_path", "upload_id"):
+                    if progress is not None:
+                        raise HTTPException(
+                            status_code=400, detail=f"{event[1]} must come before the files")
+                    if event[1] == "folder_path":
+                        folder_path = event[2] or None
+                    else:
+                        upload_id = event[2] or None
+            if progress is not None:
+                progress.bytes_received += len(chunk)
+        try:
+            parser.finish()
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    except BaseException:
+        if progress is not None:
+            progress.finished = time.time()
+        raise
+    finally:
+        # Client disconnected, the body was invalid or truncated: the unfinished file is discarded
+        if current is not None:
+            current.abort(UploadInterruptedError("The upload was interrupted"))
 
-        upload_dir = get_upload_dir(folder_path)
+    try:
+        if not writes:
+            raise HTTPException(
+                status_code=400, detail="There is no file selected")
 
         uploaded_files = []
+        failed_files = []
         total_size = 0
-        for file in files:
-            if file.size and file.size > UPLOAD_FILE_SIZE_LIMIT * 1024 * 1024:
+        for name, file_path, future in writes:
+            try:
+                file_size, file_hash = await asyncio.wrap_future(future)
+            except Exception as e:
+                failed_files.append({"original_name": name, "error": str(e)})
                 continue
-
-            # Create a safe filename
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            safe_filename = f"{timestamp}_{file.filename}"
-            file_path = os.path.join(upload_dir, safe_filename)
-
-            # Save file
-            content = await file.read()
-            with open(file_path, "wb") as buffer:
-                buffer.write(content)
-
-            file_size = len(content)
             total_size += file_size
-
             uploaded_files.append(
                 {
-                    "filename": safe_filename,
-                    "original_name": file.filename,
+                    "filename": os.path.basename(file_path),
+                    "original_name": name,
                     "size_mb": round(file_size / (1024 * 1024), 2),
+                    "sha256": file_hash,
                 }
             )
+        progress.finished = time.time()
 
         response_data = {
             "message": f"Success to upload {len(uploaded_files)} files",
+            "upload_id": progress.upload_id,
             "files": uploaded_files,
+            "failed": failed_files,
             "total_size_mb": round(total_size / (1024 * 1024), 2),
             "upload_time": datetime.now().isoformat(),
             "upload_dir": upload_dir,
@@ -1747,9 +2017,168 @@ async def upload_multiple_files(
             status_code=500, detail=f"Failed to upload file: {str(e)}")
 
 
+@app.get("/upload/progress/{upload_id}")
+async def get_upload_progress(upload_id: str):
+    """Per-file progress of a multi-file upload"""
+    progress = upload_pipeline.get_progress(upload_id)
+    if progress is None:
+        raise HTTPException(status_code=404, detail=f"Upload not found: {upload_id}")
+    return {**progress, "pipeline": upload_pipeline.get_stats()}
+
+
+upload_sessions = UploadSessionManager(
+    UPLOAD_FILE_SIZE_LIMIT * 1024 * 1024, UPLOAD_SESSION_TTL, UPLOAD_SESSION_GC_INTERVAL,
+    UPLOAD_PART_DIRS_FILE,
+)
+upload_sessions.start_gc()
+
+
+@app.post("/upload/sessions")
+async def create_upload_session(data: dict):
+    """Start a resumable upload, chunks are then sent with PUT at their byte offsets"""
+    filename = data.get("filename")
+    try:
+        size = int(data.get("size", -1))
+        upload_dir = get_upload_dir(data.get("folder_path"))
+        session = await asyncio.to_thread(
+            upload_sessions.create, filename, size, upload_dir, data.get("sha256")
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        **session.to_dict(),
+        "chunk_size": UPLOAD_CHUNK_SIZE,
+        "max_chunk_size": UPLOAD_SESSION_MAX_CHUNK,
+        "upload_dir": upload_dir,
+    }
+
+
+@app.get("/upload/sessions")
+async def list_upload_sessions():
+    return {"sessions": upload_sessions.list(), "timestamp": datetime.now().isoformat()}
+
+
+@app.get("/upload/sessions/{session_id}")
+async def get_upload_session(session_id: str):
+    """Committed byte ranges of an upload, used by clients to resume after a disconnect"""
+    try:
+        return upload_sessions.get(session_id).to_dict()
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@app.put("/upload/sessions/{session_id}")
+async def upload_session_chunk(session_id: str, request: Request, offset: int = 0):
+    """Write the raw request body at offset
+
+    The body is flushed to disk every UPLOAD_CHUNK_SIZE bytes and each flushed
+    piece is committed, so a dropped connection only loses the unflushed tail.
+    """
+    try:
+        upload_sessions.get(session_id)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    position = offset
+    buffer = bytearray()
+    try:
+        async for chunk in request.stream():
+            buffer.extend(chunk)
+            if position - offset + len(buffer) > UPLOAD_SESSION_MAX_CHUNK:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"Chunk is over {UPLOAD_SESSION_MAX_CHUNK // (1024 * 1024)}MB limit",
+                )
+            if len(buffer) >= UPLOAD_CHUNK_SIZE:
+                await asyncio.to_thread(upload_sessions.write, session_id, position, bytes(buffer))
+                position += len(buffer)
+                buffer.clear()
+        if buffer:
+            await asyncio.to_thread(upload_sessions.write, session_id, position, bytes(buffer))
+            position += len(buffer)
+        session = upload_sessions.get(session_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    return {**session.to_dict(), "written": position - offset}
+
+
+@app.post("/upload/sessions/{session_id}/finalize")
+async def finalize_upload_session(session_id: str):
+    """Verify the whole-file SHA-256 and move the completed upload into place"""
+    try:
+        session = upload_sessions.get(session_id)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        safe_filename = f"{timestamp}_{session.filename}"
+        file_path = os.path.join(session.upload_dir, safe_filename)
+        file_size, file_hash = await asyncio.to_thread(
+            upload_sessions.finalize, session_id, file_path, UPLOAD_CHUNK_SIZE
+        )
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ChecksumMismatchError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    return JSONResponse({
+        "message": "The file is saved successfully",
+        "filename": safe_filename,
+        "original_name": session.filename,
+        "size_mb": round(file_size / (1024 * 1024), 2),
+        "sha256": file_hash,
+        "upload_time": datetime.now().isoformat(),
+        "file_path": file_path,
+        "upload_dir": session.upload_dir,
+    })
+
+
+@app.delete("/upload/sessions/{session_id}")
+async def abort_upload_session(session_id: str):
+    try:
+        await asyncio.to_thread(upload_sessions.abort, session_id)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {"message": f"Aborted upload session: {session_id}"}
+
+
+listing_cache = ListingCache(LISTING_CACHE_MAX_DIRECTORIES, LISTING_CACHE_MAX_ENTRIES)
+
+
+def list_directory_page(path: str, kind: str = None, sort: str = "name", order: str = "asc",
+                        filter_text: str = None, cursor: str = None, limit: int = None,
+                        timeout: float = None):
+    """Scan a directory and return one page of it, shared by the listing endpoints"""
+    entries, complete = listing_cache.scan(path, timeout)
+    page, next_cursor, matched = paginate(
+        entries, sort, order, filter_text, cursor, limit, kind)
+    return {
+        "entries": entries,
+        "page": page,
+        "next_cursor": next_cursor,
+        "matched": len(matched),
+        # Bytes in the files that matched, over the same set as the count
+        "matched_size": sum(e.size for e in matched if not e.is_dir),
+        "complete": complete,
+    }
+
+
 @app.get("/files")
-async def list_uploaded_files(folder: str = None):
-    start_time = time.time()
+async def list_uploaded_files(
+    request: Request,
+    folder: str = None,
+    cursor: str = None,
+    limit: int = None,
+    sort: str = "mtime",
+    order: str = "desc",
+    filter: str = None,
+):
+    """List files in a folder, newest first by default
+
+    Pass limit to page through large folders, following next_cursor.
+    """
     timeout_seconds = 15
 
     try:
@@ -1762,50 +2191,58 @@ async def list_uploaded_files(folder: str = None):
                     "total_count": 0,
                     "total_size_mb": 0,
                     "current_folder": folder or "Downloads",
+                    "next_cursor": None,
                 }
             )
 
-        files = []
-        if os.path.exists(list_dir):
-            for filename in os.listdir(list_dir):
-                if time.time() - start_time > timeout_seconds:
-                    raise HTTPException(
-                        status_code=408, detail="Timeout while listing files")
-
-                file_path = os.path.join(list_dir, filename)
-                if os.path.isfile(file_path):
-                    file_stat = os.stat(file_path)
-                    files.append(
-                        {
-                            "filename": filename,
-                            "size_mb": round(file_stat.st_size / (1024 * 1024), 2),
-                            "upload_time": datetime.fromtimestamp(
-                                file_stat.st_mtime
-                            ).isoformat(),
-                            "file_path": file_path,
-                        }
-                    )
-
-        # Order files by upload time in descending order
-        files.sort(key=lambda x: x["upload_time"], reverse=True)
+        try:
+            listing = await asyncio.to_thread(
+                list_directory_page, list_dir, "files", sort, order, filter, cursor, limit,
+                timeout_seconds
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except PermissionError:
+            raise HTTPException(
+                status_code=403, detail="No permission to access this directory")
 
-        return JSONResponse(
+        files = [
             {
-                "files": files,
-                "total_count": len(files),
-                "total_size_mb": round(sum(f["size_mb"] for f in files), 2),
-                "current_folder": folder or "Downloads",
+                "filename": entry.name,
+                "size_mb": round(entry.size / (1024 * 1024), 2),
+                "upload_time": datetime.fromtimestamp(entry.mtime).isoformat(),
+                "file_path": entry.path,
             }
-        )
+            for entry in listing["page"]
+        ]
+        response_data = {
+            "files": files,
+            "total_count": listing["matched"],
+            "total_size_mb": round(listing["matched_size"] / (1024 * 1024), 2),
+            "current_folder": folder or "Downloads",
+            "next_cursor": listing["next_cursor"],
+        }
+        if not listing["complete"]:
+            response_data["partial_results"] = True
+            response_data["timeout_message"] = (
+                "The folder could not be fully listed due to timeout, only part of the files are shown"
+            )
+        return json_response_with_etag(request.headers, response_data)
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Failed to list files: {str(e)}")
 
 
-@app.get("/files/{filename}")
-async def download_uploaded_file(filename: str, folder: str = None):
-    """Download a specific uploaded file"""
+@app.api_route("/files/{filename}", methods=["GET", "HEAD"])
+async def download_uploaded_file(request: Request, filename: str, folder: str = None):
+    """Download a specific uploaded file
+
+    Supports single byte ranges (206) for resumed and segmented downloads,
+    and ETag/Last-Modified validators for conditional requests.
+    """
     try:
         # Use the unified path handling logic
         file_dir = get_upload_dir(folder)
@@ -1829,11 +2266,8 @@ async def download_uploaded_file(filename: str, folder: str = None):
         except Exception:
             raise HTTPException(status_code=400, detail="Invalid file path")
 
-        # Return the file as a streaming response
-        return StreamingResponse(
-            open(file_path, "rb"),
-            media_type="application/octet-stream",
-            headers={"Content-Disposition": f"attachment; filename={filename}"},
+        return await asyncio.to_thread(
+            ranged_file_response, file_path, request.headers, request.method, filename
         )
 
     except HTTPException:
@@ -1843,6 +2277,58 @@ async def download_uploaded_file(filename: str, folder: str = None):
             status_code=500, detail=f"Failed to download file: {str(e)}")
 
 
+@app.get("/download/zip")
+async def download_zip(folder: str = None, files: List[str] = Query(None)):
+    """Stream a ZIP of a folder, or of selected files and subfolders in it
+
+    The archive is generated on a worker thread while it is sent, nothing
+    is written to disk and memory use doesn't depend on the folder size.
+    """
+    try:
+        base_dir = os.path.abspath(get_upload_dir(folder))
+        if not os.path.isdir(base_dir):
+            raise HTTPException(
+                status_code=404, detail="The folder is not found")
+
+        if files:
+            selected = []
+            for name in files:
+                path = os.path.abspath(os.path.join(base_dir, name))
+                # Prevent path traversal outside the folder
+                if os.path.commonpath([path, base_dir]) != base_dir or path == base_dir:
+                    raise HTTPException(
+                        status_code=400, detail=f"Invalid file path: {name}")
+                if not os.path.exists(path):
+                    raise HTTPException(
+                        status_code=404, detail=f"The file is not found: {name}")
+                selected.append(path)
+
+            def entries():
+                for path in selected:
+                    arcname = os.path.relpath(path, base_dir).replace(os.sep, "/")
+                    if os.path.isdir(path):
+                        yield from iter_folder_entries(path, arcname)
+                    else:
+                        yield path, arcname
+
+            archive_entries = entries()
+        else:
+            archive_entries = iter_folder_entries(base_dir)
+
+        archive_name = f"{os.path.basename(base_dir.rstrip(os.sep)) or 'download'}.zip"
+        return StreamingResponse(
+            stream_zip(archive_entries),
+            media_type="application/zip",
+            headers={"Content-Disposition": content_disposition(archive_name)},
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Failed to create zip: {str(e)}")
+
+
 @app.delete("/files/{filename}")
 async def delete_uploaded_file(filename: str, folder: str = None):
     try:
@@ -1881,11 +2367,13 @@ async def delete_uploaded_file(filename: str, folder: str = None):
             status_code=500, detail=f"Failed to delete file: {str(e)}")
 
 
+delete_job_manager = DeleteJobManager()
+
+
 @app.delete("/delete_folder")
 async def delete_folder(folder_data: dict):
+    """Start deleting a folder tree, returns a job to poll at /delete_folder/jobs/{job_id}"""
     try:
-        import shutil
-
         folder_path = folder_data.get("folder_path")
         if not folder_path:
             raise HTTPException(
@@ -1942,10 +2430,17 @@ async def delete_folder(folder_data: dict):
         except Exception:
             raise HTTPException(status_code=400, detail="Invalid folder path")
 
-        # Delete the folder and all its contents
-        shutil.rmtree(target_dir)
+        # Delete the folder and all its contents in the background, poll the job for progress
+        job = delete_job_manager.start_job(target_dir)
 
-        return JSONResponse({"message": "Successfully deleted the folder", "folder_path": folder_path})
+        return JSONResponse(
+            {
+                "message": "Deleting the folder",
+                "folder_path": folder_path,
+                **job.to_dict(),
+            },
+            status_code=202,
+        )
 
     except HTTPException:
         raise
@@ -1954,6 +2449,30 @@ async def delete_folder(folder_data: dict):
             status_code=500, detail=f"Failed to delete folder: {str(e)}")
 
 
+@app.get("/delete_folder/jobs")
+async def list_delete_jobs():
+    return {"jobs": delete_job_manager.list_jobs()}
+
+
+@app.get("/delete_folder/jobs/{job_id}")
+async def get_delete_job(job_id: str):
+    """Delete progress: files, folders and bytes removed so far"""
+    try:
+        return delete_job_manager.get_job(job_id).to_dict()
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@app.delete("/delete_folder/jobs/{job_id}")
+async def cancel_delete_job(job_id: str):
+    """Stop a delete job, whatever was already removed stays deleted"""
+    try:
+        job = delete_job_manager.cancel_job(job_id)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {"message": f"Cancelling delete job {job_id}", "status": job.status}
+
+
 @app.post("/create_folder")
 async def create_folder(folder_data: dict):
     try:
@@ -2049,9 +2568,16 @@ async def create_folder(folder_data: dict):
 
 
 @app.get("/directories")
-async def list_available_directories(path: str = ""):
+async def list_available_directories(
+    request: Request,
+    path: str = "",
+    cursor: str = None,
+    limit: int = None,
+    sort: str = "name",
+    order: str = "asc",
+    filter: str = None,
+):
     """Get the list of directories under the specified path"""
-    start_time = time.time()
     timeout_seconds = 10
 
     try:
@@ -2086,75 +2612,60 @@ async def list_available_directories(path: str = ""):
 
         # Get directory list
         try:
+            listing = await asyncio.to_thread(
+                list_directory_page, full_path, "dirs", sort, order, filter, cursor, limit,
+                timeout_seconds
+            )
+            # Subfolder counts are computed in the background, pending ones are None
+            # and can be fetched with POST /directories/counts
+            counts = subfolder_counter.submit(
+                [e.path for e in listing["page"]], SUBFOLDER_COUNT_MAX_PER_LISTING)
             items = []
-            timeout_occurred = False
-
-            for item in os.listdir(full_path):
-                item_path = os.path.join(full_path, item)
-
-                # Check for timeout
-                if time.time() - start_time > timeout_seconds:
-                    raise HTTPException(
-                        status_code=408, detail="Request timeout")
-
-                if os.path.isdir(item_path):
-                    # Count folders, with timeout handling
-                    try:
-                        folder_count = len(
-                            [
-                                f
-                                for f in os.listdir(item_path)
-                                if os.path.isdir(os.path.join(item_path, f))
-                            ]
-                        )
-                    except PermissionError:
-                        folder_count = 0
-                    except Exception as e:
-                        # If an error occurs while counting folders (timeout or other), return special value
-                        folder_count = -1  # Use -1 to indicate timeout or error
-
-                    # Build relative path
-                    if relative_path:
-                        item_relative_path = os.path.join(relative_path, item)
-                    else:
-                        item_relative_path = item
-
-                    # Ensure path uses forward slashes (as expected by frontend)
-                    item_relative_path = item_relative_path.replace("\\", "/")
+            for entry in listing["page"]:
+                folder_count = counts[entry.path]
 
-                    items.append(
-                        {
-                            "name": item,
-                            "path": item_relative_path,
-                            "file_count": folder_count,
-                            "full_path": item_path,
-                            "type": "directory",
-                        }
-                    )
+                # Build relative path
+                if relative_path:
+                    item_relative_path = os.path.join(relative_path, entry.name)
+                else:
+                    item_relative_path = entry.name
+
+                # Ensure path uses forward slashes (as expected by frontend)
+                item_relative_path = item_relative_path.replace("\\", "/")
+
+                items.append(
+                    {
+                        "name": entry.name,
+                        "path": item_relative_path,
+                        "file_count": folder_count,
+                        "full_path": entry.path,
+                        "type": "directory",
+                    }
+                )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         except PermissionError:
             raise HTTPException(
                 status_code=403, detail="No permission to access this directory")
 
-        # Sort by name
-        items.sort(key=lambda x: x["name"].lower())
-
         response_data = {
             "items": items,
             "current_path": relative_path,
             "parent_path": parent_path,
             "base_path": DEFAULT_UPLOAD_DIR,
-            "total_count": len(items),
+            "total_count": listing["matched"],
+            "next_cursor": listing["next_cursor"],
             "can_go_up": relative_path != "",
         }
 
         # If timeout occurred, add timeout info
-        if timeout_occurred:
+        if not listing["complete"]:
             response_data["partial_results"] = True
             response_data["timeout_message"] = (
                 "Some directories could not be loaded due to timeout, only accessible directories are shown"
             )
 
-        return JSONResponse(response_data)
+        return json_response_with_etag(request.headers, response_data)
 
     except HTTPException:
         raise
@@ -2163,8 +2674,62 @@ async def list_available_directories(path: str = ""):
             status_code=500, detail=f"Failed to get directory list: {str(e)}")
 
 
+subfolder_counter = SubfolderCounter(
+    SUBFOLDER_COUNT_WORKERS, count_timeout=SUBFOLDER_COUNT_TIMEOUT)
+
+
+@app.post("/directories/counts")
+async def get_directory_counts(data: dict):
+    """Subfolder counts for directories returned as pending by a listing
+
+    Waits up to timeout seconds; counts that are still running stay None
+    (pending) and can be asked for again, -1 means the folder couldn't be read.
+    """
+    paths = data.get("paths") or []
+    if not isinstance(paths, list) or len(paths) > SUBFOLDER_COUNT_MAX_PATHS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"paths must be a list of up to {SUBFOLDER_COUNT_MAX_PATHS} directories",
+        )
+    try:
+        timeout = min(max(float(data.get("timeout", 2.0)), 0), 10.0)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid timeout")
+
+    paths = [str(path) for path in paths]
+    counts = await asyncio.to_thread(subfolder_counter.collect, paths, timeout)
+    return {
+        "counts": counts,
+        "pending": sum(1 for count in counts.values() if count is None),
+    }
+
+
+volume_service = create_volume_service()
+
+
+@app.get("/volumes")
+async def list_volumes():
+    """Cached drive information: label, file system, type, capacity and free space"""
+    if volume_service is None:
+        return {"volumes": [], "message": "Drive enumeration is only available on Windows"}
+    volumes = await asyncio.to_thread(volume_service.get_volumes)
+    return {
+        "volumes": [v.to_dict() for v in volumes],
+        "stats": volume_service.get_stats(),
+        "timestamp": datetime.now().isoformat(),
+    }
+
+
 @app.get("/system-directories")
-async def list_system_directories(path: str = ""):
+async def list_system_directories(
+    request: Request,
+    path: str = "",
+    cursor: str = None,
+    limit: int = None,
+    sort: str = "name",
+    order: str = "asc",
+    filter: str = None,
+):
     """Browse the file system under the root directory"""
     start_time = time.time()
     timeout_seconds = 10
@@ -2206,72 +2771,25 @@ async def list_system_directories(path: str = ""):
         else:
             # Root directory - list all available drives on Windows
             if os.name == "nt":
-                # Get all available drives
-                import string
-
-                available_drives = []
-                for drive_letter in string.ascii_uppercase:
-                    drive_path = f"{drive_letter}:\\"
-                    if os.path.exists(drive_path):
-                        available_drives.append(drive_path)
+                # Drives come from the cached volume service, nothing is probed per request
+                volumes = await asyncio.to_thread(volume_service.get_volumes)
 
-                if available_drives:
-                    # If there are available drives, return the list of drives
+                if volumes:
                     items = []
-                    timeout_occurred = False
-
-                    for drive in available_drives:
-                        # Check for timeout
-                        if time.time() - start_time > timeout_seconds:
-                            timeout_occurred = True
-                            break
-
-                        try:
-                            # Get the volume label of the drive (if available)
-
-                            try:
-                                result = subprocess.run(
-                                    ["vol", drive],
-                                    capture_output=True,
-                                    text=True,
-                                    shell=True,
-                                )
-                                volume_label = (
-                                    result.stdout.strip().split("\n")[-1]
-                                    if result.stdout
-                                    else ""
-                                )
-                            except:
-                                volume_label = ""
-
-                            # Count the number of folders under the drive, with timeout handling
-                            try:
-                                folder_count = len(
-                                    [
-                                        f
-                                        for f in os.listdir(drive)
-                                        if os.path.isdir(os.path.join(drive, f))
-                                    ]
-                                )
-                            except PermissionError:
-                                folder_count = 0
-                            except Exception as e:
-                                # If an error occurs while counting folders (timeout or other), return special value
-                                folder_count = -1  # Use -1 to indicate timeout or error
-
-                            items.append(
-                                {
-                                    "name": f"{drive} {volume_label}".strip(),
-                                    "path": drive,
-                                    "file_count": folder_count,
-                                    "full_path": drive,
-                                    "type": "drive",
-                                }
-                            )
-                        except Exception as e:
-                            # If an error occurs while processing a drive, skip that drive and continue with others
-                            print(f"Error processing drive {drive}: {e}")
-                            continue
+                    readable = [v.drive for v in volumes if v.available]
+                    # Counted in the background like directory entries
+                    counts = subfolder_counter.submit(readable, SUBFOLDER_COUNT_MAX_PER_LISTING)
+                    for volume in volumes:
+                        items.append(
+                            {
+                                "name": f"{volume.drive} {volume.label}".strip(),
+                                "path": volume.drive,
+                                "file_count": counts.get(volume.drive, -1),
+                                "full_path": volume.drive,
+                                "type": "drive",
+                                "volume": volume.to_dict(),
+                            }
+                        )
 
                     response_data = {
                         "items": items,
@@ -2282,14 +2800,7 @@ async def list_system_directories(path: str = ""):
                         "can_go_up": False,
                     }
 
-                    # If timeout occurred, add timeout info
-                    if timeout_occurred:
-                        response_data["partial_results"] = True
-                        response_data["timeout_message"] = (
-                            "Some drives could not be loaded due to timeout, only accessible drives are shown"
-                        )
-
-                    return JSONResponse(response_data)
+                    return json_response_with_etag(request.headers, response_data)
                 else:
                     # If there are no available drives, use C: as default
                     target_path = "C:\\"
@@ -2338,66 +2849,52 @@ async def list_system_directories(path: str = ""):
 
         # Get directory list
         try:
+            remaining = max(timeout_seconds - (time.time() - start_time), 0.1)
+            listing = await asyncio.to_thread(
+                list_directory_page, current_path, "dirs", sort, order, filter, cursor, limit,
+                remaining
+            )
+            # Subfolder counts are computed in the background, pending ones are None
+            # and can be fetched with POST /directories/counts
+            counts = subfolder_counter.submit(
+                [e.path for e in listing["page"]], SUBFOLDER_COUNT_MAX_PER_LISTING)
             items = []
-            timeout_occurred = False
-
-            for item in os.listdir(current_path):
-                item_path = os.path.join(current_path, item)
-
-                # Check for timeout
-                if time.time() - start_time > timeout_seconds:
-                    timeout_occurred = True
-                    break
-
-                if os.path.isdir(item_path):
-                    # Count folders, with timeout handling
-                    try:
-                        folder_count = len(
-                            [
-                                f
-                                for f in os.listdir(item_path)
-                                if os.path.isdir(os.path.join(item_path, f))
-                            ]
-                        )
-                    except PermissionError:
-                        folder_count = 0
-                    except Exception as e:
-                        # If an error occurs while counting folders (timeout or other), return special value
-                        folder_count = -1  # Use -1 to indicate timeout or error
-
-                    items.append(
-                        {
-                            "name": item,
-                            "path": item_path,
-                            "file_count": folder_count,
-                            "full_path": item_path,
-                            "type": "directory",
-                        }
-                    )
+            for entry in listing["page"]:
+                folder_count = counts[entry.path]
+
+                items.append(
+                    {
+                        "name": entry.name,
+                        "path": entry.path,
+                        "file_count": folder_count,
+                        "full_path": entry.path,
+                        "type": "directory",
+                    }
+                )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         except PermissionError:
             raise HTTPException(
                 status_code=403, detail="No permission to access this directory")
 
-        # Sort by name
-        items.sort(key=lambda x: x["name"].lower())
-
         response_data = {
             "items": items,
             "current_path": current_path,
             "parent_path": parent_path,
             "base_path": "",
-            "total_count": len(items),
+            "total_count": listing["matched"],
+            "next_cursor": listing["next_cursor"],
             "can_go_up": parent_path != "",
         }
 
         # If timeout occurred, add timeout info
-        if timeout_occurred:
+        if not listing["complete"]:
             response_data["partial_results"] = True
             response_data["timeout_message"] = (
                 "Some directories could not be loaded due to timeout, only accessible directories are shown"
             )
 
-        return JSONResponse(response_data)
+        return json_response_with_etag(request.headers, response_data)
 
     except HTTPException:
         raise
@@ -2406,8 +2903,398 @@ async def list_system_directories(path: str = ""):
             status_code=500, detail=f"Failed to get system directory list: {str(e)}")
 
 
+search_index = SearchIndex()
+search_index.start()
+for search_root in SEARCH_INDEX_ROOTS:
+    try:
+        search_index.add_root(search_root)
+    except FileNotFoundError as e:
+        print(f"Search index root skipped: {e}")
+
+
+@app.get("/search")
+async def search_files(q: str, limit: int = 100, root: str = None, kind: str = None):
+    """Search indexed file and folder names by substring or glob (*, ?, [...])"""
+    limit = max(1, min(limit, SEARCH_MAX_RESULTS))
+    try:
+        result = await asyncio.to_thread(search_index.search, q, limit, root, kind)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # Results may be incomplete while the first crawl is still running
+    result["indexing"] = search_index.crawling
+    return FastJSONResponse(result)
+
+
+@app.get("/search/status")
+async def get_search_status():
+    return search_index.get_status()
+
+
+@app.post("/search/roots")
+async def add_search_root(data: dict):
+    """Add a folder tree to the search index, it's crawled in the background"""
+    path = data.get("path")
+    if not path:
+        raise HTTPException(status_code=400, detail="Folder path is required")
+    try:
+        added = search_index.add_root(path)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {
+        "message": f"Indexing {path}" if added else f"{path} is already indexed",
+        "roots": search_index.roots,
+    }
+
+
+folder_size_calculator = FolderSizeCalculator(FOLDER_SIZE_WORKERS)
+
+
+def resolve_browse_path(path: str):
+    """Absolute paths are used as is, relative ones are under the Downloads folder"""
+    if not path:
+        return DEFAULT_UPLOAD_DIR
+    if os.path.isabs(path) or ":" in path:
+        return os.path.abspath(path)
+    return os.path.abspath(os.path.join(DEFAULT_UPLOAD_DIR, path))
+
+
+@app.post("/folder-sizes/jobs")
+async def start_folder_size_job(data: dict):
+    """Start computing the recursive size of a folder in the background"""
+    path = resolve_browse_path(data.get("path"))
+    if not os.path.isdir(path):
+        raise HTTPException(status_code=404, detail="Path does not exist")
+    # refresh re-reads every folder, for file sizes that changed without a folder mtime change
+    job = folder_size_calculator.start_job(path, bool(data.get("refresh", False)))
+    return job.to_dict()
+
+
+@app.get("/folder-sizes/jobs")
+async def list_folder_size_jobs():
+    return {"jobs": folder_size_calculator.list_jobs()}
+
+
+@app.get("/folder-sizes/jobs/{job_id}")
+async def get_folder_size_job(job_id: str):
+    """Job progress; subfolder totals appear in children as they complete"""
+    try:
+        return folder_size_calculator.get_job(job_id).to_dict()
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@app.delete("/folder-sizes/jobs/{job_id}")
+async def cancel_folder_size_job(job_id: str):
+    try:
+        job = folder_size_calculator.cancel_job(job_id)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {"message": f"Cancelling folder size job {job_id}", "status": job.status}
+
+
+@app.get("/folder-sizes/treemap")
+async def get_folder_treemap(path: str = "", depth: int = 2, min_fraction: float = 0.01):
+    """Nested sizes of a folder for a treemap, from its last completed job"""
+    depth = max(0, min(depth, 6))
+    try:
+        return await asyncio.to_thread(
+            folder_size_calculator.treemap, resolve_browse_path(path), depth, min_fraction
+        )
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+thumbnail_service = ThumbnailService(
+    THUMBNAIL_CACHE_DIR, THUMBNAIL_CACHE_MAX_BYTES, THUMBNAIL_WORKERS)
+
+
+def resolve_folder_file(folder: str, filename: str):
+    """Absolute path of filename in folder, rejecting paths that escape the folder"""
+    base_dir = os.path.abspath(get_upload_dir(folder))
+    path = os.path.abspath(os.path.join(base_dir, filename))
+    if os.path.commonpath([path, base_dir]) != base_dir or path == base_dir:
+        raise ValueError(f"Invalid file path: {filename}")
+    return path
+
+
+@app.get("/thumbnails/{filename}")
+async def get_thumbnail(request: Request, filename: str, folder: str = None, size: int = 128):
+    """JPEG thumbnail of an image file, at most size pixels on its longest side"""
+    size = max(THUMBNAIL_MIN_SIZE, min(size, THUMBNAIL_MAX_SIZE))
+    try:
+        path = resolve_folder_file(folder, filename)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not is_thumbnail_supported(filename):
+        raise HTTPException(status_code=415, detail="Thumbnails are only available for images")
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="The file is not found")
+
+    try:
+        # submit stats the file and may read a cached thumbnail from disk
+        future = await asyncio.to_thread(thumbnail_service.submit, path, size)
+        key, data = await asyncio.wrap_future(future)
+    except ValueError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=422, detail=f"Failed to create thumbnail: {str(e)}")
+
+    # The key changes with the file, so the thumbnail itself never goes stale
+    headers = {"ETag": f'"{key}"', "Cache-Control": "private, max-age=86400"}
+    if f'"{key}"' in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return Response(content=data, media_type="image/jpeg", headers=headers)
+
+
+@app.post("/thumbnails/batch")
+async def get_thumbnails_batch(data: dict):
+    """Thumbnails for the image files of one listing page, as data URLs
+
+    Files that aren't images or can't be decoded map to null.
+    """
+    folder = data.get("folder")
+    files = data.get("files") or []
+    if len(files) > THUMBNAIL_BATCH_MAX_FILES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {THUMBNAIL_BATCH_MAX_FILES} files per request")
+    size = max(THUMBNAIL_MIN_SIZE, min(int(data.get("size", 96)), THUMBNAIL_MAX_SIZE))
+
+    paths = {}
+    for name in files:
+        try:
+            if is_thumbnail_supported(name):
+                paths[name] = resolve_folder_file(folder, name)
+        except ValueError:
+            pass
+
+    start = time.perf_counter()
+    results = await asyncio.to_thread(thumbnail_service.get_many, paths.values(), size)
+    thumbnails = {}
+    for name in files:
+        result = results.get(paths.get(name))
+        thumbnails[name] = (
+            "data:image/jpeg;base64," + base64.b64encode(result[1]).decode("ascii")
+            if result else None
+        )
+    return FastJSONResponse({
+        "thumbnails": thumbnails,
+        "size": size,
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+    })
+
+
 # ==================== Remote Mouse and Keyboard Control API ====================
 
+# Support aliases for arrow keys
+KEY_ALIASES = {
+    "up": "up",
+    "down": "down",
+    "left": "left",
+    "right": "right",
+    "arrowup": "up",
+    "arrowdown": "down",
+    "arrowleft": "left",
+    "arrowright": "right",
+}
+# Maximum number of events accepted by a single /remote/batch request
+BATCH_MAX_EVENTS = 200
+# Maximum delay allowed before a single batched event (milliseconds)
+BATCH_MAX_DELAY_MS = 10000
+# Streamed drag paths are replayed this far behind the client to absorb network jitter
+DRAG_JITTER_BUFFER_MS = 50
+# Maximum number of points accepted by a single /remote/drag-path request
+DRAG_PATH_MAX_POINTS = 10000
+# Longest drag accepted, from the first point's t_ms to the last (seconds)
+DRAG_MAX_DURATION = 60
+
+# Wheel events aimed at the same spot within this window are merged into one
+SCROLL_COALESCE_WINDOW_MS = 30
+# Raw wheel units per browser wheel pixel / line / page (WheelEvent.deltaMode 0 / 1 / 2)
+WHEEL_UNITS_PER_DELTA = {0: 1.2, 1: 40, 2: 360}
+
+# Directory where recorded input macros are stored
+MACRO_DIR = "macros"
+macro_recorder = MacroRecorder(MACRO_DIR)
+
+# Replays streamed drag paths with the client's timing
+path_player = PathPlayer(remote_controller.backend, DRAG_JITTER_BUFFER_MS,
+                         max_duration=DRAG_MAX_DURATION)
+# Merges bursts of wheel events before they reach the input backend
+scroll_accumulator = ScrollAccumulator(
+    remote_controller.wheel, SCROLL_COALESCE_WINDOW_MS)
+scroll_accumulator.start()
+
+
+def record_input(event_type: str, data: dict, result: dict = None, at: float = None):
+    """Add an input action to the macro being recorded, skipping failed actions"""
+    if not macro_recorder.recording or (result is not None and not result.get("success")):
+        return
+    macro_recorder.record({**data, "type": event_type}, at)
+
+
+def normalize_key(key: str) -> str:
+    """Map browser key names to pyautogui key names"""
+    return KEY_ALIASES.get(key.lower(), key)
+
+
+def wheel_units(data: dict):
+    """Get (vertical, horizontal) raw wheel units from a scroll request
+
+    Browser wheel deltas (delta_y/delta_x, positive = down/right) are converted
+    according to delta_mode; the legacy "clicks" field keeps its old scaling.
+    """
+    if "delta_y" in data or "delta_x" in data:
+        factor = WHEEL_UNITS_PER_DELTA.get(int(data.get("delta_mode", 0)), 1.2)
+        # Positive wheel units scroll up, the opposite of the browser's deltaY
+        delta_y = -round(float(data.get("delta_y") or 0) * factor)
+        delta_x = round(float(data.get("delta_x") or 0) * factor)
+        return delta_y, delta_x
+    # Amplify scroll amount (e.g., multiply each scroll by 10, adjust as needed)
+    return int(data.get("clicks", 3)) * 10, 0
+
+
+def queue_scroll(actual_x: int, actual_y: int, data: dict):
+    """Queue a scroll at the given screen position, merged with nearby wheel events"""
+    delta_y, delta_x = wheel_units(data)
+    return scroll_accumulator.add(actual_x, actual_y, delta_y, delta_x)
+
+
+def _event_point(event: dict, x_key: str = "x", y_key: str = "y"):
+    """Read and convert one coordinate pair of a batched event"""
+    x = event.get(x_key)
+    y = event.get(y_key)
+    if x is None or y is None:
+        raise ValueError("Missing coordinate parameters")
+    try:
+        x = float(x)
+        y = float(y)
+    except (ValueError, TypeError):
+        raise ValueError("Coordinate parameters must be numbers")
+    return convert_screenshot_coords_to_screen(
+        x, y, event.get("monitor_index", 0), event.get("use_percentage", False)
+    )
+
+
+def _event_path(event: dict, points):
+    """Convert timed [x, y, t_ms] points of a streamed drag to screen coordinates"""
+    if not isinstance(points, list) or not points:
+        return []
+    try:
+        timestamps = [float(point[2]) for point in points]
+    except (IndexError, ValueError, TypeError):
+        raise ValueError("Drag points must be [x, y, t_ms] lists")
+    screen_points = convert_screenshot_path_to_screen(
+        [point[:2] for point in points],
+        event.get("monitor_index", 0),
+        event.get("use_percentage", False),
+    )
+    return [(x, y, t) for (x, y), t in zip(screen_points, timestamps)]
+
+
+def execute_input_event(event: dict):
+    """Execute a single input event, the shared dispatcher for batched input"""
+    if not isinstance(event, dict):
+        return {"success": False, "message": "Invalid event format"}
+
+    event_type = event.get("type")
+    if event_type != "scroll":
+        # Deliver merged wheel events first so they keep their place in the order
+        scroll_accumulator.flush()
+    try:
+        if event_type == "click":
+            x, y = _event_point(event)
+            return remote_controller.click(
+                x, y, event.get("button", "left"), event.get("clicks", 1))
+        if event_type == "double_click":
+            x, y = _event_point(event)
+            return remote_controller.double_click(x, y, event.get("button", "left"))
+        if event_type == "right_click":
+            x, y = _event_point(event)
+            return remote_controller.right_click(x, y)
+        if event_type == "move":
+            x, y = _event_point(event)
+            return remote_controller.move(x, y)
+        if event_type == "drag":
+            start_x, start_y = _event_point(event, "start_x", "start_y")
+            end_x, end_y = _event_point(event, "end_x", "end_y")
+            return remote_controller.drag(
+                start_x, start_y, end_x, end_y, event.get("duration", 0.5))
+        if event_type == "drag_start":
+            x, y = _event_point(event)
+            path_player.start(x, y, event.get(
+                "t", 0), event.get("button", "left"))
+            return {"success": True, "message": f"Drag started: ({x}, {y})"}
+        if event_type == "drag_move":
+            path_player.add_points(_event_path(event, event.get("points")))
+            return {"success": True, "message": "Drag points queued"}
+        if event_type == "drag_end":
+            stats = path_player.end(_event_path(event, event.get("points")))
+            return {"success": True, "message": "Drag completed", "drag": stats}
+        if event_type == "scroll":
+            x, y = _event_point(event)
+            queue_scroll(x, y, event)
+            return {"success": True, "message": f"Scroll queued: ({x}, {y})"}
+        if event_type == "type":
+            text = event.get("text", "")
+            if not text:
+                return {"success": False, "message": "Missing text parameter"}
+            return remote_controller.type_text(text, event.get("strategy", "auto"))
+        if event_type == "press_key":
+            key = event.get("key")
+            if not key:
+                return {"success": False, "message": "Missing key parameter"}
+            return remote_controller.press_key(normalize_key(key))
+        if event_type == "hotkey":
+            keys = event.get("keys", [])
+            if not keys:
+                return {"success": False, "message": "Missing hotkey parameter"}
+            # A bare string would be splatted into one key press per character
+            if not isinstance(keys, list) or not all(isinstance(key, str) for key in keys):
+                return {"success": False, "message": "Hotkey keys must be a list of key names"}
+            return remote_controller.hotkey(*keys)
+        if event_type == "wait":
+            return {"success": True, "message": "Wait completed"}
+        return {"success": False, "message": f"Unsupported event type: {event_type}"}
+    except Exception as e:
+        return {"success": False, "message": f"{event_type} event failed: {str(e)}"}
+
+
+def execute_input_batch(events: list, stop_on_error: bool = True):
+    """Execute an ordered list of input events, honouring per-event delays"""
+    results = []
+    batch_start = time.perf_counter()
+    for index, event in enumerate(events):
+        delay_ms = event.get("delay_ms", 0) if isinstance(event, dict) else 0
+        try:
+            delay_ms = min(max(float(delay_ms), 0), BATCH_MAX_DELAY_MS)
+        except (ValueError, TypeError):
+            delay_ms = 0
+        if delay_ms:
+            time.sleep(delay_ms / 1000)
+
+        event_start = time.perf_counter()
+        result = execute_input_event(event)
+        if isinstance(event, dict):
+            record_input(event.get("type"), event, result)
+        result["index"] = index
+        result["type"] = event.get("type") if isinstance(event, dict) else None
+        result["duration_ms"] = round(
+            (time.perf_counter() - event_start) * 1000, 2)
+        results.append(result)
+
+        if not result.get("success") and stop_on_error:
+            break
+
+    return {
+        "success": all(r.get("success") for r in results) and len(results) == len(events),
+        "executed": len(results),
+        "total": len(events),
+        "results": results,
+        "duration_ms": round((time.perf_counter() - batch_start) * 1000, 2),
+    }
+
 
 @app.post("/remote/click")
 async def remote_click(data: dict):
@@ -2455,8 +3342,6 @@ async def remote_click(data: dict):
             actual_x, actual_y = convert_screenshot_coords_to_screen(
                 x, y, monitor_index, use_percentage
             )
-            print(
-                f"Coordinate conversion: ({x}, {y}) -> ({actual_x}, {actual_y})")
         except Exception as e:
             print(f"Coordinate conversion failed: {e}")
             return JSONResponse(
@@ -2468,10 +3353,11 @@ async def remote_click(data: dict):
         try:
             result = remote_controller.click(
                 actual_x, actual_y, button, clicks)
+            record_input("click", data, result)
             print(f"Click operation result: {result}")
             return JSONResponse(result)
         except Exception as e:
-            print(f"pyautogui click operation failed: {e}")
+            print(f"Input backend click operation failed: {e}")
             return JSONResponse(
                 {"success": False,
                     "message": f"Click operation execution failed: {str(e)}"}
@@ -2518,6 +3404,7 @@ async def remote_double_click(data: dict):
             )
 
         result = remote_controller.double_click(actual_x, actual_y, button)
+        record_input("double_click", data, result)
         return JSONResponse(result)
     except Exception as e:
         return JSONResponse({"success": False, "message": f"Double-click operation failed: {str(e)}"})
@@ -2558,6 +3445,7 @@ async def remote_right_click(data: dict):
             )
 
         result = remote_controller.right_click(actual_x, actual_y)
+        record_input("right_click", data, result)
         return JSONResponse(result)
     except Exception as e:
         return JSONResponse(
@@ -2583,16 +3471,14 @@ async def remote_drag(data: dict):
                 status_code=400, detail="Missing coordinate parameters")
 
         # Coordinate conversion
-        actual_start_x, actual_start_y = convert_screenshot_coords_to_screen(
-            start_x, start_y, monitor_index, use_percentage
-        )
-        actual_end_x, actual_end_y = convert_screenshot_coords_to_screen(
-            end_x, end_y, monitor_index, use_percentage
+        (actual_start_x, actual_start_y), (actual_end_x, actual_end_y) = convert_screenshot_path_to_screen(
+            [(start_x, start_y), (end_x, end_y)], monitor_index, use_percentage
         )
 
         result = remote_controller.drag(
             actual_start_x, actual_start_y, actual_end_x, actual_end_y, duration
         )
+        record_input("drag", data, result)
         return JSONResponse(result)
     except HTTPException:
         raise
@@ -2609,7 +3495,10 @@ async def remote_type(data: dict):
             raise HTTPException(
                 status_code=400, detail="Missing text parameter")
 
-        result = remote_controller.type_text(text)
+        # Large pastes can take a while, keep the event loop free
+        result = await asyncio.to_thread(
+            remote_controller.type_text, text, data.get("strategy", "auto"))
+        record_input("type", data, result)
         return JSONResponse(result)
     except HTTPException:
         raise
@@ -2626,21 +3515,8 @@ async def remote_press_key(data: dict):
             raise HTTPException(
                 status_code=400, detail="Missing key parameter")
 
-        # Support aliases for arrow keys
-        key_aliases = {
-            "up": "up",
-            "down": "down",
-            "left": "left",
-            "right": "right",
-            "arrowup": "up",
-            "arrowdown": "down",
-            "arrowleft": "left",
-            "arrowright": "right",
-        }
-        key_lower = key.lower()
-        if key_lower in key_aliases:
-            key = key_aliases[key_lower]
-        result = remote_controller.press_key(key)
+        result = remote_controller.press_key(normalize_key(key))
+        record_input("press_key", data, result)
         return JSONResponse(result)
     except HTTPException:
         raise
@@ -2658,6 +3534,7 @@ async def remote_hotkey(data: dict):
                 status_code=400, detail="Missing hotkey parameter")
 
         result = remote_controller.hotkey(*keys)
+        record_input("hotkey", data, result)
         return JSONResponse(result)
     except HTTPException:
         raise
@@ -2671,7 +3548,6 @@ async def remote_scroll(data: dict):
     try:
         x = data.get("x")
         y = data.get("y")
-        clicks = data.get("clicks", 3)
         monitor_index = data.get("monitor_index", 0)
         use_percentage = data.get("use_percentage", False)
 
@@ -2684,24 +3560,317 @@ async def remote_scroll(data: dict):
             x, y, monitor_index, use_percentage
         )
 
-        # Amplify scroll amount (e.g., multiply each scroll by 10, adjust as needed)
-        amplified_clicks = int(clicks) * 10
+        entry = queue_scroll(actual_x, actual_y, data)
+        result = await asyncio.to_thread(scroll_accumulator.wait, entry)
+        record_input("scroll", data, result)
+        return JSONResponse(result)
+    except HTTPException:
+        raise
+    except Exception as e:
+        return JSONResponse({"success": False, "message": f"Scroll operation failed: {str(e)}"})
+
+
+# Single input thread shared by the input WebSocket, keeps clicks and keys in order
+input_worker = InputWorker(execute_input_event)
+input_worker.start()
+
+
+@app.websocket("/ws/input")
+async def input_websocket_endpoint(websocket: WebSocket):
+    """Low-latency input channel, accepts one event or {"events": [...]} per message"""
+    await websocket.accept()
+    loop = asyncio.get_running_loop()
+
+    def make_callback(event_id):
+        # Only events carrying an id are acknowledged, moves are fire-and-forget
+        if event_id is None:
+            return None
+
+        def callback(result):
+            message = json.dumps(
+                {"type": "input_result", "id": event_id, **result})
+            asyncio.run_coroutine_threadsafe(
+                websocket.send_text(message), loop)
+
+        return callback
+
+    try:
+        while True:
+            message = await websocket.receive_text()
+            try:
+                data = json.loads(message)
+            except json.JSONDecodeError:
+                await websocket.send_text(json.dumps(
+                    {"type": "input_result", "success": False, "message": "Invalid JSON message"}))
+                continue
+
+            events = data.get("events") if isinstance(
+                data, dict) and "events" in data else [data]
+            if not isinstance(events, list):
+                await websocket.send_text(json.dumps(
+                    {"type": "input_result", "success": False, "message": "events must be a list"}))
+                continue
+            for event in events:
+                if not isinstance(event, dict):
+                    continue
+                accepted = input_worker.submit(
+                    event, make_callback(event.get("id")))
+                if accepted:
+                    record_input(event.get("type"), event)
+                if not accepted and event.get("id") is not None:
+                    await websocket.send_text(json.dumps(
+                        {"type": "input_result", "id": event.get("id"),
+                         "success": False, "message": "Input queue is full"}))
+    except WebSocketDisconnect:
+        print("Input WebSocket connection is closed")
+    except Exception as e:
+        print(f"Input WebSocket error: {e}")
+
+
+@app.get("/remote/input-stats")
+async def get_input_stats():
+    """Get input worker queue and latency statistics"""
+    return {
+        "backend": remote_controller.backend.name,
+        "input_worker": input_worker.get_stats(),
+        "last_drag": path_player.get_stats(),
+        "scroll": scroll_accumulator.get_stats(),
+        "timestamp": datetime.now().isoformat(),
+    }
+
+
+@app.post("/remote/drag-path")
+async def remote_drag_path(data: dict):
+    """Remote drag along a full path of timed points, replayed with the original timing"""
+    try:
+        points = data.get("points")
+        if not isinstance(points, list) or len(points) < 2:
+            raise HTTPException(
+                status_code=400, detail="At least two drag points are required")
+        if len(points) > DRAG_PATH_MAX_POINTS:
+            raise HTTPException(
+                status_code=400, detail=f"It's limited to {DRAG_PATH_MAX_POINTS} points per drag")
 
-        # Move the mouse to the specified position before scrolling
         try:
-            pyautogui.moveTo(actual_x, actual_y)
-            pyautogui.scroll(amplified_clicks)
-            result = {
-                "success": True,
-                "message": f"Scroll successful: ({actual_x}, {actual_y}) scrolled {amplified_clicks}",
-            }
-        except Exception as e:
-            result = {"success": False, "message": f"Scroll failed: {str(e)}"}
+            path = await asyncio.to_thread(_event_path, data, points)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if max(t for _, _, t in path) - path[0][2] > DRAG_MAX_DURATION * 1000:
+            raise HTTPException(
+                status_code=400, detail=f"Drags are limited to {DRAG_MAX_DURATION} seconds")
+
+        def play():
+            # Each request owns its drag, a concurrent one is rejected instead of reset
+            owner = object()
+            x, y, t_ms = path[0]
+            path_player.start(x, y, t_ms, data.get("button", "left"), owner=owner)
+            return path_player.end(path[1:], owner=owner)
+
+        started = time.perf_counter()
+        try:
+            stats = await asyncio.to_thread(play)
+        except RuntimeError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        # Recorded as a streamed drag so replay goes through the same path player. Both
+        # events get the start time: drag_end carries the timed points and waits for them
+        coordinates = {k: data[k] for k in ("monitor_index", "use_percentage") if k in data}
+        record_input("drag_start", {
+            **coordinates, "x": points[0][0], "y": points[0][1], "t": points[0][2],
+            "button": data.get("button", "left"),
+        }, at=started)
+        record_input("drag_end", {**coordinates, "points": points[1:]}, at=started)
+        return JSONResponse({"success": True, "message": "Drag path completed", "drag": stats})
+    except HTTPException:
+        raise
+    except Exception as e:
+        return JSONResponse({"success": False, "message": f"Drag path operation failed: {str(e)}"})
+
+
+@app.post("/remote/batch")
+async def remote_batch(data: dict):
+    """Execute an ordered list of remote input events in one request"""
+    try:
+        events = data.get("events")
+        if not isinstance(events, list) or not events:
+            raise HTTPException(
+                status_code=400, detail="Missing events parameter")
+        if len(events) > BATCH_MAX_EVENTS:
+            raise HTTPException(
+                status_code=400, detail=f"It's limited to {BATCH_MAX_EVENTS} events per batch")
+
+        stop_on_error = data.get("stop_on_error", True)
+
+        # Run on a worker thread so delays and input pauses don't block the event loop
+        result = await asyncio.to_thread(execute_input_batch, events, stop_on_error)
         return JSONResponse(result)
     except HTTPException:
         raise
     except Exception as e:
-        return JSONResponse({"success": False, "message": f"Scroll operation failed: {str(e)}"})
+        return JSONResponse({"success": False, "message": f"Batch operation failed: {str(e)}"})
+
+
+# Input-to-visible-frame latency probe, dispatches through the same path as real input
+latency_probe = LatencyProbe(
+    ui_generator.capture_region, execute_input_event, ui_generator.encode_image)
+
+
+def _probe_region(data: dict, event: dict):
+    """Screen region watched by a latency probe, in percent of the monitor or around the event"""
+    monitor_index = data.get("monitor_index", event.get("monitor_index", 0))
+    _sync_coordinate_transformer()
+    transform = coordinate_transformer.get(monitor_index)
+
+    region = data.get("region")
+    if region:
+        left_pct = float(region.get("x", 0))
+        top_pct = float(region.get("y", 0))
+        width_pct = float(region.get("width", 10))
+        height_pct = float(region.get("height", 10))
+    elif event.get("x") is not None and event.get("y") is not None and event.get("use_percentage"):
+        # Default to a box of 10% of the monitor centered on the input position
+        left_pct = float(event["x"]) - 5
+        top_pct = float(event["y"]) - 5
+        width_pct = height_pct = 10
+    else:
+        raise ValueError("A region is required when the event has no percentage position")
+
+    left_pct = min(max(left_pct, 0), 100)
+    top_pct = min(max(top_pct, 0), 100)
+    width_pct = min(max(width_pct, 1), 100 - left_pct)
+    height_pct = min(max(height_pct, 1), 100 - top_pct)
+    left, top = transform.to_screen(left_pct, top_pct, True)
+    return (
+        left,
+        top,
+        max(int(transform.width * width_pct / 100), 1),
+        max(int(transform.height * height_pct / 100), 1),
+    )
+
+
+@app.post("/debug/latency-probe")
+async def run_latency_probe(data: dict):
+    """Inject an input and measure how long until it is visible on screen, by stage"""
+    try:
+        event = data.get("event")
+        if not isinstance(event, dict) or not event.get("type"):
+            raise HTTPException(
+                status_code=400, detail="Missing event parameter")
+
+        receive_ms = None
+        if data.get("client_timestamp") is not None:
+            # Client clock based, only meaningful when clocks are in sync
+            receive_ms = time.time() * 1000 - float(data["client_timestamp"])
+
+        try:
+            region = _probe_region(data, event)
+        except (ValueError, RuntimeError) as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        timeout = min(float(data.get("timeout", 2.0)), 10.0)
+        result = await asyncio.to_thread(latency_probe.run, event, region, timeout, receive_ms)
+        result["region"] = dict(zip(("left", "top", "width", "height"), region))
+        result["timestamp"] = datetime.now().isoformat()
+        return JSONResponse(result)
+    except HTTPException:
+        raise
+    except Exception as e:
+        return JSONResponse({"success": False, "message": f"Latency probe failed: {str(e)}"})
+
+
+@app.get("/debug/latency")
+async def get_latency_histograms():
+    """Get input-to-visible-frame latency histograms by stage"""
+    return {
+        **latency_probe.get_stats(),
+        "timestamp": datetime.now().isoformat(),
+    }
+
+
+@app.post("/debug/latency/reset")
+async def reset_latency_histograms():
+    latency_probe.reset()
+    return {
+        "message": "Latency histograms are cleared",
+        "timestamp": datetime.now().isoformat(),
+    }
+
+
+@app.post("/macros/record/start")
+async def start_macro_recording(data: dict):
+    """Start recording remote input actions into a named macro"""
+    try:
+        macro_recorder.start(data.get("name", ""))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {
+        "message": f"Started recording macro: {data.get('name')}",
+        "timestamp": datetime.now().isoformat(),
+    }
+
+
+@app.post("/macros/record/stop")
+async def stop_macro_recording():
+    """Stop recording and save the macro"""
+    try:
+        macro = macro_recorder.stop()
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {
+        "message": f"Saved macro: {macro['name']}",
+        "macro": macro,
+        "timestamp": datetime.now().isoformat(),
+    }
+
+
+@app.get("/macros")
+async def list_macros():
+    """List recorded macros"""
+    return {
+        "macros": macro_recorder.list(),
+        "recording": macro_recorder.recording,
+        "timestamp": datetime.now().isoformat(),
+    }
+
+
+@app.get("/macros/{name}")
+async def get_macro(name: str):
+    """Get a recorded macro with its events"""
+    try:
+        return macro_recorder.load(name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@app.delete("/macros/{name}")
+async def delete_macro(name: str):
+    try:
+        macro_recorder.delete(name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {"message": f"Deleted macro: {name}"}
+
+
+@app.post("/macros/{name}/play")
+async def play_macro(name: str, data: dict = None):
+    """Replay a recorded macro server-side with optional speed scaling"""
+    data = data or {}
+    try:
+        speed = float(data.get("speed", 1.0))
+        result = await asyncio.to_thread(
+            macro_recorder.play, name, execute_input_event, speed, data.get(
+                "stop_on_error", False)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return JSONResponse(result)
 
 
 @app.get("/remote/mouse-position")
@@ -2761,112 +3930,44 @@ async def open_folder(data: dict):
         )
 
 
+# Precomputed per-monitor transforms, rebuilt only when the monitor topology changes
+coordinate_transformer = CoordinateTransformer()
+
+
+def _sync_coordinate_transformer():
+    """Make sure monitor info exists and the transforms match it"""
+    if not ui_generator.monitors:
+        print("Warning: Monitor list is empty, attempting to update monitor information...")
+        try:
+            ui_generator.update_monitor_info()
+        except Exception as e:
+            raise RuntimeError(f"Failed to update monitor information: {e}")
+        if not ui_generator.monitors:
+            raise RuntimeError("Unable to retrieve monitor information")
+    coordinate_transformer.sync(ui_generator.monitors)
+
+
 def convert_screenshot_coords_to_screen(
     x: float, y: float, monitor_index: int = 0, use_percentage: bool = False
 ):
     """Convert screenshot coordinates to actual screen coordinates"""
     try:
-        # Validate input parameters
-        if not isinstance(x, (int, float)) or not isinstance(y, (int, float)):
-            raise ValueError(
-                f"Coordinate parameters must be numbers, received: x={type(x)}({x}), y={type(y)}({y})"
-            )
-
-        if not isinstance(monitor_index, int) or monitor_index < 0:
-            raise ValueError(
-                f"Monitor index must be a positive integer, received: {monitor_index}")
-
-        # Get monitor information
-        if not hasattr(ui_generator, "monitors"):
-            raise RuntimeError(
-                "ui_generator.monitors attribute does not exist")
-
-        monitors = ui_generator.monitors
-        if not monitors:
-            print(
-                "Warning: Monitor list is empty, attempting to update monitor information...")
-            try:
-                ui_generator.update_monitor_info()
-                monitors = ui_generator.monitors
-                if not monitors:
-                    raise RuntimeError(
-                        "Unable to retrieve monitor information")
-            except Exception as e:
-                raise RuntimeError(
-                    f"Failed to update monitor information: {e}")
-
-        if monitor_index >= len(monitors):
-            raise ValueError(
-                f"Monitor index out of range: {monitor_index} >= {len(monitors)}")
-
-        monitor = monitors[monitor_index]
-        if not isinstance(monitor, dict):
-            raise ValueError(
-                f"Monitor information format error: {type(monitor)}")
-
-        # Validate monitor information completeness
-        required_keys = ["left", "top", "width", "height"]
-        for key in required_keys:
-            if key not in monitor or not isinstance(monitor[key], (int, float)):
-                raise ValueError(
-                    f"Monitor information missing or invalid {key}: {monitor.get(key)}")
-
-        monitor_left = int(monitor["left"])
-        monitor_top = int(monitor["top"])
-        monitor_width = int(monitor["width"])
-        monitor_height = int(monitor["height"])
-
-        # Validate monitor dimensions
-        if monitor_width <= 0 or monitor_height <= 0:
-            raise ValueError(
-                f"Invalid monitor dimensions: {monitor_width}x{monitor_height}")
-
-        if use_percentage:
-            # Percentage coordinate conversion: directly calculate actual screen position using percentage
-            if not (0 <= x <= 100 and 0 <= y <= 100):
-                raise ValueError(
-                    f"Percentage coordinates out of range: x={x}%, y={y}%")
-
-            actual_x = int(monitor_left + (x / 100.0) * monitor_width)
-            actual_y = int(monitor_top + (y / 100.0) * monitor_height)
-            print(
-                f"Percentage coordinate conversion: Monitor {monitor_index} ({monitor_left},{monitor_top}) {monitor_width}x{monitor_height}, percentage({x:.2f}%, {y:.2f}%) -> actual({actual_x}, {actual_y})"
-            )
-        else:
-            # Pixel coordinate conversion: consider screenshot scaling
-            screenshot_width = monitor.get("screenshot_width", monitor_width)
-            screenshot_height = monitor.get(
-                "screenshot_height", monitor_height)
-
-            # Validate screenshot dimensions
-            if screenshot_width <= 0 or screenshot_height <= 0:
-                screenshot_width = monitor_width
-                screenshot_height = monitor_height
-
-            # Calculate scaling factors
-            scale_x = monitor_width / screenshot_width if screenshot_width > 0 else 1
-            scale_y = monitor_height / screenshot_height if screenshot_height > 0 else 1
-
-            # Convert coordinates
-            actual_x = int(monitor_left + x * scale_x)
-            actual_y = int(monitor_top + y * scale_y)
-            print(
-                f"Pixel coordinate conversion: Monitor {monitor_index} ({monitor_left},{monitor_top}) {monitor_width}x{monitor_height}, screenshot size {screenshot_width}x{screenshot_height}, scaling factors {scale_x:.2f}x{scale_y:.2f}, pixels({x}, {y}) -> actual({actual_x}, {actual_y})"
-            )
-
-        # Validate that converted coordinates are within reasonable bounds
-        if actual_x < 0 or actual_y < 0:
-            print(
-                f"Warning: Converted coordinates are negative: ({actual_x}, {actual_y})")
+        _sync_coordinate_transformer()
+        return coordinate_transformer.convert(
+            float(x), float(y), monitor_index, use_percentage)
+    except Exception as e:
+        # Raise an exception on conversion failure for the caller to handle
+        raise RuntimeError(f"Coordinate conversion failed: {str(e)}")
 
-        return actual_x, actual_y
 
+def convert_screenshot_path_to_screen(
+    points, monitor_index: int = 0, use_percentage: bool = False
+):
+    """Convert a list of screenshot points to screen coordinates in one vectorized call"""
+    try:
+        _sync_coordinate_transformer()
+        return coordinate_transformer.convert_path(points, monitor_index, use_percentage)
     except Exception as e:
-        print(f"Coordinate conversion failed: {e}")
-        import traceback
-
-        traceback.print_exc()
-        # Raise an exception on conversion failure for the caller to handle
         raise RuntimeError(f"Coordinate conversion failed: {str(e)}")
 
 
@@ -24,30 +24,60 @@ async function uploadFiles() {
             formData.append('files', file);
         });
 
+        // Lets the per-file write progress be polled at /upload/progress/{upload_id}
+        const uploadId = Date.now().toString(36) + Math.random().toString(36).slice(2, 8);
+        // Sent in the URL: the server starts writing each file as soon as it arrives,
+        // so the target folder has to be known before the first one
+        const params = new URLSearchParams({ upload_id: uploadId });
+
         // If a folder is selected, add it to the request
         if (selectedPath !== null && selectedPath !== undefined) {
-            formData.append('folder_path', selectedPath);
+            params.set('folder_path', selectedPath);
         }
 
         const xhr = new XMLHttpRequest();
+        let percentText = '0%';
+        let savedText = '';
 
         // Listen for upload progress
         xhr.upload.addEventListener('progress', function (event) {
             if (event.lengthComputable) {
                 const percentComplete = (event.loaded / event.total) * 100;
                 progressFill.style.width = percentComplete + '%';
-                progressText.textContent = Math.round(percentComplete) + '%';
+                percentText = Math.round(percentComplete) + '%';
+                progressText.textContent = percentText + savedText;
             }
         });
 
+        // Files already written on the server while the rest are still being sent
+        const progressTimer = setInterval(async function () {
+            try {
+                const response = await fetch(`${getServerBaseUrl()}/upload/progress/${uploadId}`);
+                if (!response.ok) {
+                    return;
+                }
+                const progress = await response.json();
+                savedText = ` (saved ${progress.completed}/${selectedFiles.length})`;
+                progressText.textContent = percentText + savedText;
+            } catch (error) {
+                // Progress is informational only
+            }
+        }, 1000);
+
         // Listen for upload completion
         xhr.addEventListener('load', function () {
+            clearInterval(progressTimer);
             if (xhr.status === 200) {
                 try {
                     const response = JSON.parse(xhr.responseText);
                     addLog('Upload File', response.message, 'success');
                     showNotification(response.message, 'success', 5000);
 
+                    if (response.failed && response.failed.length > 0) {
+                        const failedNames = response.failed.map(f => `${f.original_name} (${f.error})`);
+                        addLog('Upload File', `Failed to save ${response.failed.length} files: ${failedNames.join(', ')}`, 'warning');
+                    }
+
                     // Clear selection
                     selectedFiles = [];
                     document.getElementById('fileInput').value = '';
@@ -76,6 +106,7 @@ async function uploadFiles() {
 
         // Listen for upload errors
         xhr.addEventListener('error', function () {
+            clearInterval(progressTimer);
             const errorMsg = 'Network error, upload failed';
             addLog('Upload File', errorMsg, 'error');
             showNotification(errorMsg, 'error', 5000);
@@ -84,7 +115,7 @@ async function uploadFiles() {
         });
 
         // Send request
-        xhr.open('POST', getServerBaseUrl() + '/upload/multiple');
+        xhr.open('POST', getServerBaseUrl() + '/upload/multiple?' + params.toString());
         xhr.send(formData);
 
     } catch (error) {
@@ -111,7 +142,7 @@ async function dropToUploadFiles(droppedFiles) {
     }
 
     // Extract core file upload logic
-    function uploadFiles(formData, shouldRefreshAndOpen = false, targetFolder = '') {
+    function uploadFiles(formData, folderPath = '', shouldRefreshAndOpen = false, targetFolder = '') {
         const xhr = new XMLHttpRequest();
 
         xhr.addEventListener('load', async () => {
@@ -137,7 +168,9 @@ async function dropToUploadFiles(droppedFiles) {
             logAndNotify('Upload File', 'Network error, upload failed', 'error');
         });
 
-        xhr.open('POST', `${getServerBaseUrl()}/upload/multiple`);
+        // The folder goes in the URL, the server needs it before the first file arrives
+        const query = folderPath ? `?${new URLSearchParams({ folder_path: folderPath })}` : '';
+        xhr.open('POST', `${getServerBaseUrl()}/upload/multiple${query}`);
         xhr.send(formData);
     }
 
@@ -177,8 +210,7 @@ async function dropToUploadFiles(droppedFiles) {
 
         // Scenario 1: Upload using foreground path if valid
         if (data?.path && data.path !== 'none' && data.path.trim()) {
-            formData.append('folder_path', data.path);
-            uploadFiles(formData, false); // No need to refresh or open folder
+            uploadFiles(formData, data.path, false); // No need to refresh or open folder
             return;
         }
 
@@ -195,10 +227,7 @@ async function dropToUploadFiles(droppedFiles) {
         }
 
         // Scenario 3: Upload using selected path (with post-upload actions)
-        if (selectedPath) {
-            formData.append('folder_path', selectedPath);
-        }
-        uploadFiles(formData, true, targetFolder); // Need refresh and folder opening
+        uploadFiles(formData, selectedPath || '', true, targetFolder); // Need refresh and folder opening
 
     } catch (error) {
         logAndNotify('Upload File', `Upload failed: ${error.message}`, 'error');
@@ -206,17 +235,63 @@ async function dropToUploadFiles(droppedFiles) {
 }
 
 
+// Number of files requested per page, further pages are loaded on demand
+const FILE_LIST_PAGE_SIZE = 500;
+
+// Build the /files URL for a folder, the selected one by default
+function buildFileListUrl(cursor = null, folder = selectedPath) {
+    const params = new URLSearchParams({ limit: FILE_LIST_PAGE_SIZE });
+    if (folder !== null && folder !== undefined) {
+        params.append('folder', folder);
+    }
+    if (cursor) {
+        params.append('cursor', cursor);
+    }
+    return `${getServerBaseUrl()}/files?${params.toString()}`;
+}
+
+// Append a "Load more" button that fetches the next page of the file list
+function appendLoadMoreButton(fileList, cursor, folder) {
+    const button = document.createElement('button');
+    button.className = 'btn btn-info';
+    button.style.cssText = 'width: 100%; margin-top: 8px; font-size: 12px;';
+    button.textContent = 'Load more';
+    button.onclick = async () => {
+        button.disabled = true;
+        button.textContent = 'Loading...';
+        try {
+            const response = await fetch(buildFileListUrl(cursor, folder));
+            if (!response.ok) {
+                throw new Error(`HTTP error! status: ${response.status}`);
+            }
+            const data = await response.json();
+            button.remove();
+            data.files.forEach(file => fileList.appendChild(createFileItem(file)));
+            if (data.next_cursor) {
+                appendLoadMoreButton(fileList, data.next_cursor, folder);
+            }
+            loadThumbnails(fileList, data.files, folder);
+        } catch (error) {
+            button.disabled = false;
+            button.textContent = 'Load more';
+            addLog('File Management', `Failed to load more files: ${error.message}`, 'error');
+        }
+    };
+    fileList.appendChild(button);
+}
+
 // Load file list
 async function loadFileList() {
     const fileList = document.getElementById('fileList');
 
     fileList.innerHTML = '<div class="file-list-placeholder">Loading...</div>';
 
+    // The folder this listing shows, later pages and thumbnails are requested for it
+    // even if another folder is selected meanwhile
+    const folder = selectedPath;
+
     // Build request URL, including folder path parameter
-    let url = getServerBaseUrl() + '/files';
-    if (selectedPath !== null && selectedPath !== undefined) {
-        url += `?folder=${encodeURIComponent(selectedPath)}`;
-    }
+    const url = buildFileListUrl(null, folder);
 
     // Create AbortController for timeout control
     const controller = new AbortController();
@@ -262,7 +337,7 @@ async function loadFileList() {
                 folderDisplay = 'Downloads';
             }
 
-            folderHeader.innerHTML = `<span>📁 Current Folder: ${folderDisplay} (${data.files.length} files)</span>`;
+            folderHeader.innerHTML = `<span>📁 Current Folder: ${folderDisplay} (${data.total_count} files)</span>`;
             fileList.appendChild(folderHeader);
 
             data.files.forEach(file => {
@@ -270,7 +345,12 @@ async function loadFileList() {
                 fileList.appendChild(fileItem);
             });
 
-            addLog('File Management', `Loaded ${data.files.length} files`, 'info');
+            if (data.next_cursor) {
+                appendLoadMoreButton(fileList, data.next_cursor, folder);
+            }
+            loadThumbnails(fileList, data.files, folder);
+
+            addLog('File Management', `Loaded ${data.files.length} of ${data.total_count} files`, 'info');
         } else {
             // Build complete folder path display
             let folderDisplay;
@@ -325,6 +405,48 @@ async function loadFileList() {
     }
 }
 
+// Image types the server can make thumbnails for
+const THUMBNAIL_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', '.tif', '.tiff'];
+const THUMBNAIL_SIZE = 96;
+
+function hasThumbnail(filename) {
+    const dot = filename.lastIndexOf('.');
+    return dot >= 0 && THUMBNAIL_EXTENSIONS.includes(filename.slice(dot).toLowerCase());
+}
+
+// Fetch thumbnails for the image files of one page in a single request
+async function loadThumbnails(fileList, files, folder) {
+    const filenames = files.map(file => file.filename).filter(hasThumbnail);
+    if (filenames.length === 0) {
+        return;
+    }
+    try {
+        const response = await fetch(`${getServerBaseUrl()}/thumbnails/batch`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ folder: folder, files: filenames, size: THUMBNAIL_SIZE })
+        });
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        const data = await response.json();
+        // Another folder was opened while these were rendering, its files may share names
+        if (folder !== selectedPath) {
+            return;
+        }
+        fileList.querySelectorAll('img.file-thumb[data-thumb-name]').forEach(img => {
+            const src = data.thumbnails[img.dataset.thumbName];
+            if (src) {
+                img.src = src;
+                img.style.display = '';
+                img.removeAttribute('data-thumb-name');
+            }
+        });
+    } catch (error) {
+        addLog('File Management', `Failed to load thumbnails: ${error.message}`, 'warning');
+    }
+}
+
 // Create file item
 function createFileItem(file) {
     const fileItem = document.createElement('div');
@@ -335,7 +457,12 @@ function createFileItem(file) {
     // Escape special characters in filename to prevent JavaScript syntax errors
     const escapedFilename = file.filename.replace(/\\/g, '\\\\').replace(/'/g, "\\'");
 
+    const thumbnail = hasThumbnail(file.filename)
+        ? `<img class="file-thumb" data-thumb-name="${file.filename.replace(/"/g, '&quot;')}" alt="" style="display: none;">`
+        : '';
+
     fileItem.innerHTML = `
+        ${thumbnail}
         <div class="file-info">
             <div class="file-name">${file.filename}</div>
             <div class="file-details">
@@ -389,6 +516,25 @@ async function downloadFile(filename) {
     }
 }
 
+// Download the current folder, or the given file names in it, as a streamed ZIP
+function downloadFolderZip(filenames = []) {
+    const params = new URLSearchParams();
+    if (selectedPath !== null && selectedPath !== undefined) {
+        params.append('folder', selectedPath);
+    }
+    filenames.forEach(name => params.append('files', name));
+
+    // Let the browser download manager consume the stream instead of buffering it into a blob
+    const a = document.createElement('a');
+    a.href = `${getServerBaseUrl()}/download/zip?${params.toString()}`;
+    a.download = '';
+    document.body.appendChild(a);
+    a.click();
+    document.body.removeChild(a);
+
+    addLog('File Management', 'Started ZIP download of ' + (selectedPathName || selectedPath || 'Downloads'), 'info');
+}
+
 // Delete file
 async function deleteFile(filename) {
     if (!confirm(`Are you sure you want to delete the file "${filename}"?\n\nThis action cannot be undone!`)) {
@@ -455,9 +601,15 @@ async function deleteFolder(folderPath) {
         });
 
         if (response.ok) {
-            const result = await response.json();
+            const result = await waitForDeleteJob(await response.json(), decodedPath);
+            if (result.status !== 'completed') {
+                showNotification(`Deletion ${result.status}: ${result.error || `${result.files_deleted} files were removed`}`, 'warning', 3000);
+                addLog('File Management', `Folder deletion ${result.status}: ${decodedPath} - ${result.files_deleted} files removed`, 'warning');
+                refreshPathList();
+                return;
+            }
             showNotification(`Folder "${decodedPath}" deleted successfully`, 'success', 3000);
-            addLog('File Management', `Folder deletion successful: ${decodedPath}`, 'info');
+            addLog('File Management', `Folder deletion successful: ${decodedPath} (${result.files_deleted} files)`, 'info');
 
             // If the deleted folder is the currently selected path, clear selection
             if (selectedPath === decodedPath) {
@@ -118,6 +118,81 @@ function closePathModal() {
     modalOriginalCurrentPath = null;
 }
 
+// Folder count display: null is still being counted, -1 indicates timeout or error
+function formatFolderCount(count) {
+    if (count === null || count === undefined) {
+        return '…';
+    }
+    return count === -1 ? '-' : count;
+}
+
+// Paths accepted by one /directories/counts request (SUBFOLDER_COUNT_MAX_PATHS on the server)
+const FOLDER_COUNT_CHUNK_SIZE = 1000;
+
+// Request counts for some pending cells and fill in the finished ones
+async function fetchFolderCounts(cells) {
+    const paths = cells.map(cell => decodeURIComponent(cell.dataset.countPath));
+    const response = await fetch(`${getServerBaseUrl()}/directories/counts`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ paths, timeout: 2 })
+    });
+    if (!response.ok) {
+        throw new Error(`HTTP error! status: ${response.status}`);
+    }
+    const data = await response.json();
+    cells.forEach((cell, index) => {
+        const count = data.counts[paths[index]];
+        if (count !== null && count !== undefined) {
+            cell.textContent = formatFolderCount(count);
+            cell.removeAttribute('data-count-path');
+        }
+    });
+}
+
+// Fetch the subfolder counts the listing returned as pending and fill them in
+async function fillPendingFolderCounts(pathList, rounds = 5) {
+    try {
+        for (let round = 0; round < rounds; round++) {
+            const cells = Array.from(pathList.querySelectorAll('.file-count[data-count-path]'));
+            if (cells.length === 0 || !pathList.isConnected) {
+                return;
+            }
+            // The server accepts a limited number of paths per request
+            for (let start = 0; start < cells.length; start += FOLDER_COUNT_CHUNK_SIZE) {
+                await fetchFolderCounts(cells.slice(start, start + FOLDER_COUNT_CHUNK_SIZE));
+            }
+        }
+    } catch (error) {
+        console.warn('Failed to load folder counts:', error);
+    }
+
+    // Give up on folders that are still being counted
+    pathList.querySelectorAll('.file-count[data-count-path]').forEach(cell => {
+        cell.textContent = '-';
+        cell.removeAttribute('data-count-path');
+    });
+}
+
+// Poll a background delete job until it finishes, showing its progress
+async function waitForDeleteJob(job, folderPath) {
+    let lastNotice = 0;
+    while (job.status === 'running') {
+        await new Promise(resolve => setTimeout(resolve, 500));
+        const response = await fetch(`${getServerBaseUrl()}/delete_folder/jobs/${job.job_id}`);
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        job = await response.json();
+        if (job.status === 'running' && Date.now() - lastNotice > 2000) {
+            lastNotice = Date.now();
+            const mb = (job.bytes_deleted / (1024 * 1024)).toFixed(1);
+            showNotification(`Deleting "${folderPath}": ${job.files_deleted} files (${mb}MB) removed`, 'info', 2500);
+        }
+    }
+    return job;
+}
+
 // Load system directory list
 async function loadSystemDirectories(path = '', restoreSelection = true) {
     const pathList = document.getElementById('modalPathList');
@@ -288,7 +363,8 @@ function populateSystemPathList(items, currentSelectedPath) {
         const escapedName = item.name.replace(/\\/g, '\\\\').replace(/'/g, "\\'");
 
         // Handle folder count display: -1 indicates timeout or error, display as "-"
-        const folderCountDisplay = item.file_count === -1 ? '-' : (item.file_count || 0);
+        const folderCountDisplay = formatFolderCount(item.file_count);
+        const countPathAttr = item.file_count === null ? ` data-count-path="${encodeURIComponent(item.full_path)}"` : '';
 
         html += `
             <div class="path-item" 
@@ -297,7 +373,7 @@ function populateSystemPathList(items, currentSelectedPath) {
                 <div class="path-name">
                     ${item.name}
                 </div>
-                <div class="file-count">${folderCountDisplay}</div>
+                <div class="file-count"${countPathAttr}>${folderCountDisplay}</div>
                 <div class="path-item-actions">
                     <button class="btn btn-primary" 
                             style="padding: 2px 6px; font-size: 10px; height: 20px; line-height: 1.2; border-radius: 3px; margin-right: 4px;"
@@ -311,6 +387,7 @@ function populateSystemPathList(items, currentSelectedPath) {
     });
 
     pathList.innerHTML = html;
+    fillPendingFolderCounts(pathList);
 
     // Restore selection state to match selected effect in image
     if (currentSelectedPath && currentSelectedPath.trim() !== '') {
@@ -430,9 +507,15 @@ async function deleteSystemPath(path) {
         });
 
         if (response.ok) {
-            const result = await response.json();
+            const result = await waitForDeleteJob(await response.json(), decodedPath);
+            if (result.status !== 'completed') {
+                showNotification(`Deletion ${result.status}: ${result.error || `${result.files_deleted} files were removed`}`, 'warning', 3000);
+                addLog('File management', `Deleting folder ${result.status}: ${decodedPath} - ${result.files_deleted} files removed`, 'warning');
+                refreshPathList();
+                return;
+            }
             showNotification(`Folder "${decodedPath}" deleted successfully`, 'success', 3000);
-            addLog('File management', `Successfully deleted folder: ${decodedPath}`, 'info');
+            addLog('File management', `Successfully deleted folder: ${decodedPath} (${result.files_deleted} files)`, 'info');
 
             // Clear selection if deleted path is currently selected
             if (selectedPath === decodedPath) {
@@ -622,7 +705,8 @@ function populateModalPathList(items, currentSelectedPath) {
         const escapedName = itemPath.replace(/\//g, '\\\\').replace(/'/g, "\\'");
 
         // Handle folder count display: -1 indicates timeout or error, display as "-"
-        const folderCountDisplay = item.file_count === -1 ? '-' : (item.file_count || 0);
+        const folderCountDisplay = formatFolderCount(item.file_count);
+        const countPathAttr = item.file_count === null ? ` data-count-path="${encodeURIComponent(item.full_path)}"` : '';
 
         html += `
             <div class="path-item" 
@@ -631,7 +715,7 @@ function populateModalPathList(items, currentSelectedPath) {
                 <div class="path-name">
                     ${item.name}
                 </div>
-                <div class="file-count">${folderCountDisplay}</div>
+                <div class="file-count"${countPathAttr}>${folderCountDisplay}</div>
                 <div class="path-item-actions">
                     <button class="btn btn-primary" 
                             style="padding: 2px 6px; font-size: 10px; height: 20px; line-height: 1.2; border-radius: 3px; margin-right: 4px;"
@@ -651,6 +735,7 @@ function populateModalPathList(items, currentSelectedPath) {
     });
 
     pathList.innerHTML = html;
+    fillPendingFolderCounts(pathList);
 
     // Restore selection state to match selected effect in image
     if (currentSelectedPath && currentSelectedPath.trim() !== '') {
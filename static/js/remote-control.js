@@ -6,6 +6,17 @@ let isDragging = false;
 let dragStartX = 0;
 let dragStartY = 0;
 
+// Input WebSocket for low-latency pointer moves
+let inputWs = null;
+let pendingMove = null;
+let moveFrameRequested = false;
+
+// Streamed drag state: points are buffered and flushed once per animation frame
+let dragStreaming = false;
+let dragMonitorIndex = 0;
+let dragPointBuffer = [];
+let dragFrameRequested = false;
+
 // Initialize remote control
 function initRemoteControl() {
     setupScreenshotClickEvents();
@@ -23,6 +34,7 @@ function toggleRemoteControl() {
         btn.classList.add('remote-control-active');
         btn.textContent = '🖱️ Disable Control';
         enableScreenshotControl();
+        connectInputWebSocket();
         window.addLog && window.addLog('Remote Control', 'Remote control enabled', 'success');
         window.showNotification && window.showNotification('Remote control enabled, click screenshot to operate', 'success');
     } else {
@@ -30,11 +42,78 @@ function toggleRemoteControl() {
         btn.classList.remove('remote-control-active');
         btn.textContent = '🖱️ Remote Control';
         disableScreenshotControl();
+        disconnectInputWebSocket();
         window.addLog && window.addLog('Remote Control', 'Remote control disabled', 'info');
         window.showNotification && window.showNotification('Remote control disabled', 'info');
     }
 }
 
+function getInputWebSocketUrl() {
+    return window.getWebSocketUrl().replace(/\/ws$/, '/ws/input');
+}
+
+function connectInputWebSocket() {
+    if (inputWs && inputWs.readyState <= WebSocket.OPEN) return;
+    try {
+        inputWs = new WebSocket(getInputWebSocketUrl());
+        inputWs.onopen = function () {
+            window.addLog && window.addLog('Remote Control', 'Input channel connected', 'info');
+        };
+        inputWs.onmessage = function (event) {
+            try {
+                const result = JSON.parse(event.data);
+                if (result.drag) {
+                    window.addLog && window.addLog('Remote Control', `Drag path replayed: ${result.drag.points_played} points, max lateness ${result.drag.max_lateness_ms}ms`, 'success');
+                } else if (!result.success) {
+                    window.addLog && window.addLog('Remote Control', `Input event failed: ${result.message}`, 'error');
+                }
+            } catch (e) {
+                console.error('Failed to parse input channel message:', e);
+            }
+        };
+        inputWs.onclose = function () {
+            inputWs = null;
+            // Reconnect while remote control is still enabled
+            if (isRemoteControlEnabled) {
+                setTimeout(connectInputWebSocket, 3000);
+            }
+        };
+        inputWs.onerror = function () {
+            window.addLog && window.addLog('Remote Control', 'Input channel error', 'error');
+        };
+    } catch (error) {
+        window.addLog && window.addLog('Remote Control', `Failed to create input channel: ${error.message}`, 'error');
+    }
+}
+
+function disconnectInputWebSocket() {
+    if (inputWs) {
+        const socket = inputWs;
+        inputWs = null;
+        socket.close();
+    }
+}
+
+function sendInputEvent(event) {
+    if (!inputWs || inputWs.readyState !== WebSocket.OPEN) return false;
+    inputWs.send(JSON.stringify(event));
+    return true;
+}
+
+// Send at most one pointer move per animation frame, always the latest position
+function queuePointerMove(x, y, monitorIndex) {
+    pendingMove = { type: 'move', x, y, monitor_index: monitorIndex, use_percentage: true };
+    if (moveFrameRequested) return;
+    moveFrameRequested = true;
+    requestAnimationFrame(() => {
+        moveFrameRequested = false;
+        if (pendingMove) {
+            sendInputEvent(pendingMove);
+            pendingMove = null;
+        }
+    });
+}
+
 function enableScreenshotControl() {
     const screenshots = document.querySelectorAll('.screenshot-image, .monitor-image');
     screenshots.forEach(img => {
@@ -134,6 +213,7 @@ function handleScreenshotRightClick(event) {
 function handleScreenshotMouseDown(event) {
     if (event.button === 0) {
         isDragging = true;
+        dragStreaming = false;
         const rect = event.target.getBoundingClientRect();
         const x = event.clientX - rect.left;
         const y = event.clientY - rect.top;
@@ -144,8 +224,46 @@ function handleScreenshotMouseDown(event) {
     }
 }
 
+function flushDragPoints() {
+    dragFrameRequested = false;
+    if (!dragPointBuffer.length) return;
+    sendInputEvent({ type: 'drag_move', points: dragPointBuffer, monitor_index: dragMonitorIndex, use_percentage: true });
+    dragPointBuffer = [];
+}
+
+function queueDragPoint(x, y) {
+    dragPointBuffer.push([x, y, performance.now()]);
+    if (dragFrameRequested) return;
+    dragFrameRequested = true;
+    requestAnimationFrame(flushDragPoints);
+}
+
 function handleScreenshotMouseMove(event) {
-    // Optional: Visual feedback during dragging
+    if (!isRemoteControlEnabled) return;
+    const rect = event.target.getBoundingClientRect();
+    const percentX = ((event.clientX - rect.left) / rect.width) * 100;
+    const percentY = ((event.clientY - rect.top) / rect.height) * 100;
+    if (percentX < 0 || percentX > 100 || percentY < 0 || percentY > 100) return;
+
+    const monitorIndex = getMonitorIndexFromImage(event.target);
+    if (isDragging) {
+        if (!dragStreaming) {
+            // Start streaming once the pointer moved far enough to be a drag
+            const distance = Math.sqrt((percentX - dragStartX) ** 2 + (percentY - dragStartY) ** 2);
+            if (distance <= 2) return;
+            dragMonitorIndex = monitorIndex;
+            dragPointBuffer = [];
+            dragStreaming = sendInputEvent({
+                type: 'drag_start', x: dragStartX, y: dragStartY, t: performance.now(),
+                monitor_index: monitorIndex, use_percentage: true
+            });
+            if (!dragStreaming) return;
+        }
+        queueDragPoint(percentX, percentY);
+        return;
+    }
+
+    queuePointerMove(percentX, percentY, monitorIndex);
 }
 
 function handleScreenshotMouseUp(event) {
@@ -158,6 +276,14 @@ function handleScreenshotMouseUp(event) {
     const endX = (x / rect.width) * 100;
     const endY = (y / rect.height) * 100;
 
+    if (dragStreaming) {
+        dragStreaming = false;
+        flushDragPoints();
+        const endPoint = [Math.min(Math.max(endX, 0), 100), Math.min(Math.max(endY, 0), 100), performance.now()];
+        sendInputEvent({ type: 'drag_end', id: `drag-${Date.now()}`, points: [endPoint], monitor_index: dragMonitorIndex, use_percentage: true });
+        return;
+    }
+
     const monitorIndex = getMonitorIndexFromImage(event.target);
 
     // Calculate distance using percentages
@@ -177,8 +303,15 @@ function handleScreenshotWheel(event) {
     const percentY = (y / rect.height) * 100;
 
     const monitorIndex = getMonitorIndexFromImage(event.target);
-    const clicks = event.deltaY > 0 ? -3 : 3;
-    sendRemoteScroll(percentX, percentY, clicks, monitorIndex, true);
+    const wheel = {
+        type: 'scroll', x: percentX, y: percentY,
+        delta_x: event.deltaX, delta_y: event.deltaY, delta_mode: event.deltaMode,
+        monitor_index: monitorIndex, use_percentage: true
+    };
+    // Raw wheel deltas go over the input channel, the server merges bursts of them
+    if (!sendInputEvent(wheel)) {
+        sendRemoteScroll(percentX, percentY, wheel, monitorIndex, true);
+    }
 }
 
 function preventDefaults(e) {
@@ -321,15 +454,21 @@ async function sendRemoteDrag(startX, startY, endX, endY, monitorIndex = 0, useP
     }
 }
 
-async function sendRemoteScroll(x, y, clicks, monitorIndex = 0, usePercentage = false) {
+// wheel is either a click count or { delta_x, delta_y, delta_mode } from a WheelEvent
+async function sendRemoteScroll(x, y, wheel, monitorIndex = 0, usePercentage = false) {
     try {
+        const amount = typeof wheel === 'number' ? { clicks: wheel } : {
+            delta_x: wheel.delta_x,
+            delta_y: wheel.delta_y,
+            delta_mode: wheel.delta_mode
+        };
         const response = await fetch(window.getServerBaseUrl() + '/remote/scroll', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify({
                 x,
                 y,
-                clicks,
+                ...amount,
                 monitor_index: monitorIndex,
                 use_percentage: usePercentage
             })
@@ -337,7 +476,7 @@ async function sendRemoteScroll(x, y, clicks, monitorIndex = 0, usePercentage =
         const result = await response.json();
         const coordType = usePercentage ? 'percentage' : 'pixel';
         if (result.success) {
-            window.addLog && window.addLog('Remote Control', `Scroll operation successful: ${coordType}(${x.toFixed(2)}, ${y.toFixed(2)}) scroll ${clicks}`, 'success');
+            window.addLog && window.addLog('Remote Control', `Scroll operation successful: ${coordType}(${x.toFixed(2)}, ${y.toFixed(2)}) scroll ${result.delta_y}, ${result.coalesced_events} events merged`, 'success');
         } else {
             window.addLog && window.addLog('Remote Control', `Scroll operation failed: ${result.message}`, 'error');
         }
@@ -416,9 +555,33 @@ async function sendRemoteHotkey(keys) {
     }
 }
 
+// Send an ordered list of input events in one request,
+// e.g. [{ type: 'hotkey', keys: ['ctrl', 'a'] }, { type: 'hotkey', keys: ['ctrl', 'c'], delay_ms: 50 }]
+async function sendRemoteBatch(events, stopOnError = true) {
+    try {
+        const response = await fetch(window.getServerBaseUrl() + '/remote/batch', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ events, stop_on_error: stopOnError })
+        });
+        const result = await response.json();
+        if (result.success) {
+            window.addLog && window.addLog('Remote Control', `Batch executed successfully: ${result.executed} events in ${result.duration_ms}ms`, 'success');
+        } else {
+            const failed = (result.results || []).find(r => !r.success);
+            const message = failed ? failed.message : (result.message || result.detail);
+            window.addLog && window.addLog('Remote Control', `Batch failed after ${result.executed || 0} events: ${message}`, 'error');
+        }
+        return result;
+    } catch (error) {
+        window.addLog && window.addLog('Remote Control', `Batch operation failed: ${error.message}`, 'error');
+    }
+}
+
 // Mount to window for external calls
 window.initRemoteControl = initRemoteControl;
 window.toggleRemoteControl = toggleRemoteControl;
 window.sendRemoteText = sendRemoteText;
 window.sendRemoteKey = sendRemoteKey;
-window.sendRemoteHotkey = sendRemoteHotkey;
\ No newline at end of file
+window.sendRemoteHotkey = sendRemoteHotkey;
+window.sendRemoteBatch = sendRemoteBatch;
\ No newline at end of file
@@ -0,0 +1,152 @@
+import threading
+import time
+from collections import OrderedDict
+
+from directory_listing import count_subdirectories
+
+# file_count values reported to clients
+COUNT_PENDING = None
+COUNT_ERROR = -1
+
+
+class SubfolderCounter:
+    """Count subfolders of many directories in the background
+
+    Listings return right away with counts pending and queue the counting on
+    a bounded set of worker threads; clients collect the results with a
+    follow-up call. A slow directory (network share, huge folder) only delays
+    its own count: enumeration stops at count_timeout, and a worker stuck in
+    a system call for longer than that is reported as -1 and replaced by a
+    new one, so hung shares can't take over the whole pool. At most
+    max_stuck such workers are left behind; they exit once the call returns.
+    """
+
+    def __init__(self, max_workers: int = 8, result_ttl: float = 30.0, max_results: int = 20000,
+                 count_timeout: float = 5.0, max_stuck: int = 16, max_queued: int = 5000):
+        self.max_workers = max_workers
+        # Finished counts are kept briefly so navigating back doesn't recount
+        self.result_ttl = result_ttl
+        self.max_results = max_results
+        self.count_timeout = count_timeout
+        self.max_stuck = max_stuck
+        self.max_queued = max_queued
+        self._results = {}
+        # Paths waiting for a worker, oldest first; dropped ones are queued again when asked for
+        self._queue = OrderedDict()
+        # Thread -> (path, start time) for counts in progress
+        self._running = {}
+        self._workers = 0
+        self._cond = threading.Condition()
+
+    # ---- workers
+
+    def _stuck(self, now: float):
+        return sum(1 for _, start in self._running.values() if now - start > self.count_timeout)
+
+    def _ensure_workers(self):
+        """Start workers so max_workers of them aren't stuck, called with the lock held"""
+        stuck = self._stuck(time.monotonic())
+        while (self._queue and self._workers - stuck < self.max_workers
+               and stuck <= self.max_stuck):
+            self._workers += 1
+            threading.Thread(target=self._worker, name="subfolder-count", daemon=True).start()
+
+    def _worker(self):
+        me = threading.current_thread()
+        while True:
+            with self._cond:
+                now = time.monotonic()
+                # A worker that was replaced while stuck leaves when there are enough live ones
+                if not self._queue or self._workers - self._stuck(now) > self.max_workers:
+                    self._workers -= 1
+                    return
+                path, _ = self._queue.popitem(last=False)
+                self._running[me] = (path, now)
+
+            try:
+                count = count_subdirectories(path, self.count_timeout)
+            except PermissionError:
+                count = 0
+            except Exception:
+                count = COUNT_ERROR
+
+            with self._cond:
+                self._running.pop(me, None)
+                self._store(path, count)
+                self._cond.notify_all()
+
+    def _store(self, path: str, count: int):
+        if len(self._results) >= self.max_results:
+            self._results.clear()
+        self._results[path] = (count, time.monotonic())
+
+    # ---- results
+
+    def _cached(self, path: str):
+        result = self._results.get(path)
+        if result and time.monotonic() - result[1] < self.result_ttl:
+            return result[0]
+        return COUNT_PENDING
+
+    def _is_pending(self, path: str):
+        return path in self._queue or any(p == path for p, _ in self._running.values())
+
+    def _expire_stuck(self):
+        """Report counts that outlived count_timeout as failed, called with the lock held"""
+        now = time.monotonic()
+        for path, start in self._running.values():
+            if now - start > self.count_timeout and self._cached(path) is COUNT_PENDING:
+                self._store(path, COUNT_ERROR)
+
+    def submit(self, paths, queue_limit: int = None):
+        """Queue counting for paths that have no fresh result, returns the known counts
+
+        At most queue_limit paths are queued by this call, the rest stay
+        pending until they're asked for again.
+        """
+        counts = {}
+        queued = 0
+        with self._cond:
+            self._expire_stuck()
+            for path in paths:
+                count = self._cached(path)
+                counts[path] = count
+                if count is not COUNT_PENDING or self._is_pending(path):
+                    continue
+                if queue_limit is not None and queued >= queue_limit:
+                    continue
+                self._queue[path] = True
+                queued += 1
+            while len(self._queue) > self.max_queued:
+                self._queue.popitem(last=False)
+            self._ensure_workers()
+        return counts
+
+    def collect(self, paths, timeout: float = 2.0):
+        """Wait up to timeout for the counts of paths, unfinished ones stay pending"""
+        self.submit(paths)
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                self._expire_stuck()
+                waiting = [p for p in paths if self._cached(p) is COUNT_PENDING]
+                remaining = deadline - time.monotonic()
+                if not waiting or remaining <= 0:
+                    break
+                # Paths dropped from a full queue are queued again
+                for path in waiting:
+                    if not self._is_pending(path):
+                        self._queue[path] = True
+                self._ensure_workers()
+                self._cond.wait(min(remaining, 0.5))
+            return {path: self._cached(path) for path in paths}
+
+    def get_stats(self):
+        with self._cond:
+            return {
+                "queued": len(self._queue),
+                "running": len(self._running),
+                "stuck": self._stuck(time.monotonic()),
+                "workers": self._workers,
+                "cached": len(self._results),
+            }
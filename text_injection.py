@@ -0,0 +1,129 @@
+import time
+
+
+class Clipboard:
+    """Plain-text clipboard access, win32clipboard on Windows and pyperclip elsewhere"""
+
+    def __init__(self):
+        try:
+            import win32clipboard
+
+            self._win32 = win32clipboard
+        except ImportError:
+            self._win32 = None
+
+    @staticmethod
+    def _pyperclip():
+        try:
+            import pyperclip
+        except ImportError:
+            raise RuntimeError(
+                "Clipboard access needs pywin32 on Windows or pyperclip elsewhere")
+        return pyperclip
+
+    def get_text(self):
+        if self._win32 is None:
+            return self._pyperclip().paste()
+        clipboard = self._win32
+        clipboard.OpenClipboard()
+        try:
+            if clipboard.IsClipboardFormatAvailable(clipboard.CF_UNICODETEXT):
+                return clipboard.GetClipboardData(clipboard.CF_UNICODETEXT)
+            return None
+        finally:
+            clipboard.CloseClipboard()
+
+    def set_text(self, text: str):
+        if self._win32 is None:
+            self._pyperclip().copy(text)
+            return
+        clipboard = self._win32
+        clipboard.OpenClipboard()
+        try:
+            clipboard.EmptyClipboard()
+            clipboard.SetClipboardData(clipboard.CF_UNICODETEXT, text)
+        finally:
+            clipboard.CloseClipboard()
+
+
+class TextInjector:
+    """Type text into the focused window, picking the fastest reliable strategy
+
+    Strategies:
+        keys       one key event per character through the backend (ASCII only on pyautogui)
+        unicode    Unicode key events sent in chunks, one backend call per chunk (SendInput)
+        clipboard  put the text on the clipboard and paste it with Ctrl+V
+    """
+
+    STRATEGIES = ("auto", "keys", "unicode", "clipboard")
+
+    def __init__(self, backend, clipboard=None, clipboard_threshold: int = 200,
+                 chunk_size: int = 256, chunk_pause: float = 0.005, restore_delay: float = 0.3):
+        self.backend = backend
+        self.clipboard = clipboard or Clipboard()
+        # Texts longer than this are pasted instead of typed
+        self.clipboard_threshold = clipboard_threshold
+        self.chunk_size = chunk_size
+        # Short pause between chunks so the target application can drain its input queue
+        self.chunk_pause = chunk_pause
+        # How long to wait after pasting before the previous clipboard content is restored
+        self.restore_delay = restore_delay
+
+    def choose_strategy(self, text: str):
+        if len(text) > self.clipboard_threshold:
+            return "clipboard"
+        if self.backend.name == "sendinput":
+            return "unicode"
+        # pyautogui can only type characters that exist on the keyboard layout
+        return "keys" if text.isascii() else "clipboard"
+
+    def inject(self, text: str, strategy: str = "auto"):
+        """Type text and return the strategy used and the achieved throughput"""
+        if strategy not in self.STRATEGIES:
+            raise ValueError(
+                f"Invalid text strategy: {strategy}, expected one of {', '.join(self.STRATEGIES)}")
+        if strategy == "auto":
+            strategy = self.choose_strategy(text)
+
+        previous_clipboard = None
+        start = time.perf_counter()
+        if strategy == "clipboard":
+            previous_clipboard = self._paste(text)
+        elif strategy == "unicode":
+            for i in range(0, len(text), self.chunk_size):
+                if i:
+                    time.sleep(self.chunk_pause)
+                self.backend.type_text(text[i:i + self.chunk_size])
+        else:
+            self.backend.type_text(text)
+        elapsed = time.perf_counter() - start
+
+        if previous_clipboard is not None:
+            self._restore_clipboard(previous_clipboard)
+
+        return {
+            "strategy": strategy,
+            "characters": len(text),
+            "duration_ms": round(elapsed * 1000, 2),
+            "chars_per_second": round(len(text) / elapsed, 1) if elapsed > 0 else None,
+        }
+
+    def _paste(self, text: str):
+        """Paste text through the clipboard, returns the previous clipboard text"""
+        try:
+            previous = self.clipboard.get_text()
+        except Exception as e:
+            print(f"Failed to read clipboard before paste: {e}")
+            previous = None
+
+        self.clipboard.set_text(text)
+        self.backend.hotkey("ctrl", "v")
+        return previous
+
+    def _restore_clipboard(self, previous: str):
+        # The target reads the clipboard asynchronously, give it time before restoring
+        time.sleep(self.restore_delay)
+        try:
+            self.clipboard.set_text(previous)
+        except Exception as e:
+            print(f"Failed to restore clipboard after paste: {e}")
@@ -0,0 +1,190 @@
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from PIL import Image, ImageOps
+
+THUMBNAIL_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".bmp", ".webp", ".tif", ".tiff"}
+
+
+def is_thumbnail_supported(filename: str):
+    return os.path.splitext(filename)[1].lower() in THUMBNAIL_EXTENSIONS
+
+
+class ThumbnailCache:
+    """JPEG thumbnails on disk, bounded by total size with least-recently-used eviction"""
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._files = OrderedDict()
+        self._total = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        # Oldest first, so existing thumbnails are evicted in modification order
+        found = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".jpg"):
+                continue
+            try:
+                stat_result = os.stat(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            found.append((stat_result.st_mtime, name[:-len(".jpg")], stat_result.st_size))
+        for _, key, size in sorted(found):
+            self._files[key] = size
+            self._total += size
+
+    def _path(self, key: str):
+        return os.path.join(self.cache_dir, f"{key}.jpg")
+
+    def get(self, key: str):
+        with self._lock:
+            if key not in self._files:
+                return None
+            self._files.move_to_end(key)
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except OSError:
+            with self._lock:
+                self._total -= self._files.pop(key, 0)
+            return None
+
+    def put(self, key: str, data: bytes):
+        path = self._path(key)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+        evicted = []
+        with self._lock:
+            self._total -= self._files.pop(key, 0)
+            self._files[key] = len(data)
+            self._total += len(data)
+            while self._total > self.max_bytes and len(self._files) > 1:
+                old_key, old_size = self._files.popitem(last=False)
+                self._total -= old_size
+                evicted.append(old_key)
+        for old_key in evicted:
+            try:
+                os.remove(self._path(old_key))
+            except OSError:
+                pass
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "thumbnails": len(self._files),
+                "size_mb": round(self._total / (1024 * 1024), 2),
+                "max_size_mb": round(self.max_bytes / (1024 * 1024), 2),
+            }
+
+
+class ThumbnailService:
+    """Generate image thumbnails on a worker pool, cached by path, mtime and size"""
+
+    def __init__(self, cache_dir: str, max_cache_bytes: int = 200 * 1024 * 1024,
+                 max_workers: int = 4, max_source_bytes: int = 100 * 1024 * 1024,
+                 quality: int = 80):
+        self.cache = ThumbnailCache(cache_dir, max_cache_bytes)
+        self.max_source_bytes = max_source_bytes
+        self.quality = quality
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="thumbnail")
+        # Concurrent requests for the same thumbnail share one render
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self.generated = 0
+        self.cache_hits = 0
+        self.failures = 0
+
+    @staticmethod
+    def cache_key(path: str, stat_result: os.stat_result, size: int):
+        raw = f"{os.path.abspath(path)}|{stat_result.st_mtime_ns}|{stat_result.st_size}|{size}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _render(self, path: str, size: int):
+        with Image.open(path) as img:
+            # For JPEG this makes the decoder scale by 1/2..1/8 while decoding
+            img.draft("RGB", (size * 2, size * 2))
+            img = ImageOps.exif_transpose(img)
+            if img.mode in ("RGBA", "LA", "P"):
+                img = img.convert("RGBA")
+                background = Image.new("RGB", img.size, (255, 255, 255))
+                background.paste(img, mask=img.getchannel("A"))
+                img = background
+            elif img.mode != "RGB":
+                img = img.convert("RGB")
+            img.thumbnail((size, size), Image.LANCZOS, reducing_gap=2.0)
+            buffer = io.BytesIO()
+            img.save(buffer, format="JPEG", quality=self.quality, optimize=True)
+            return buffer.getvalue()
+
+    def _generate(self, key: str, path: str, size: int):
+        try:
+            data = self._render(path, size)
+            self.cache.put(key, data)
+            self.generated += 1
+            return data
+        except Exception:
+            self.failures += 1
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def submit(self, path: str, size: int):
+        """Future resolving to (cache_key, jpeg_bytes) for the thumbnail of path"""
+        stat_result = os.stat(path)
+        if stat_result.st_size > self.max_source_bytes:
+            raise ValueError("Image is too large for a thumbnail")
+        key = self.cache_key(path, stat_result, size)
+        data = self.cache.get(key)
+        if data is not None:
+            self.cache_hits += 1
+            future = Future()
+            future.set_result((key, data))
+            return future
+
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is None:
+                future = self._executor.submit(
+                    lambda: (key, self._generate(key, path, size)))
+                self._in_flight[key] = future
+        return future
+
+    def get(self, path: str, size: int):
+        return self.submit(path, size).result()
+
+    def get_many(self, paths, size: int, timeout: float = 30.0):
+        """Thumbnails for many paths rendered in parallel; failures map to None"""
+        futures = {}
+        for path in paths:
+            try:
+                futures[path] = self.submit(path, size)
+            except (OSError, ValueError):
+                futures[path] = None
+        results = {}
+        for path, future in futures.items():
+            try:
+                results[path] = future.result(timeout=timeout) if future else None
+            except Exception:
+                results[path] = None
+        return results
+
+    def get_stats(self):
+        return {
+            **self.cache.get_stats(),
+            "generated": self.generated,
+            "cache_hits": self.cache_hits,
+            "failures": self.failures,
+        }
@@ -0,0 +1,334 @@
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import multipart
+from multipart.multipart import parse_options_header
+
+
+class ByteBudget:
+    """Counting semaphore over bytes, bounds the data of a part received but not yet written"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.in_flight = 0
+        self.peak = 0
+        self._cond = threading.Condition()
+
+    def try_acquire(self, amount: int):
+        """Reserve amount without waiting, returns the reserved amount or None"""
+        amount = min(amount, self.capacity)
+        with self._cond:
+            if self.in_flight and self.in_flight + amount > self.capacity:
+                return None
+            self.in_flight += amount
+            self.peak = max(self.peak, self.in_flight)
+        return amount
+
+    def acquire(self, amount: int):
+        # A chunk larger than the whole budget goes alone instead of waiting forever
+        amount = min(amount, self.capacity)
+        with self._cond:
+            while self.in_flight and self.in_flight + amount > self.capacity:
+                self._cond.wait()
+            self.in_flight += amount
+            self.peak = max(self.peak, self.in_flight)
+        return amount
+
+    def release(self, amount: int):
+        with self._cond:
+            self.in_flight -= amount
+            self._cond.notify_all()
+
+
+class UploadInterruptedError(Exception):
+    pass
+
+
+class PartStream:
+    """File-like reader over the data of one multipart part as it arrives
+
+    The request handler puts chunks in as the body is parsed and a writer
+    thread reads them out; each chunk holds its share of the stream's own
+    byte budget until the writer takes it. Once the writer stops (finished
+    or failed), further chunks are dropped.
+    """
+
+    def __init__(self, budget: ByteBudget):
+        self.budget = budget
+        self._queue = queue.Queue()
+        self._buffer = b""
+        self._eof = False
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def put(self, data: bytes, reserved: int):
+        with self._lock:
+            if not self._closed:
+                self._queue.put((data, reserved))
+                return
+        self.budget.release(reserved)
+
+    def end(self):
+        self._queue.put(None)
+
+    def abort(self, error: Exception):
+        self._queue.put(error)
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def read(self, size: int):
+        """Up to size bytes, fewer only at the end of the part"""
+        chunks = []
+        length = 0
+        while length < size and not self._eof:
+            if not self._buffer:
+                item = self._queue.get()
+                if item is None:
+                    self._eof = True
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                data, reserved = item
+                self.budget.release(reserved)
+                self._buffer = data
+            take = self._buffer[:size - length]
+            self._buffer = self._buffer[len(take):]
+            chunks.append(take)
+            length += len(take)
+        return b"".join(chunks)
+
+    def close(self):
+        """Called by the writer when it stops, releases whatever is still queued"""
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, tuple):
+                self.budget.release(item[1])
+
+
+class StreamingMultipartParser:
+    """Incremental multipart/form-data parser built on python-multipart
+
+    feed(chunk) returns the events found in the chunk, in order:
+    ("field", name, value), ("file", name, filename), ("data", bytes) and
+    ("end",) for the end of a file part. File data is never accumulated.
+    finish() is called after the last chunk and fails if the body was cut short.
+    """
+
+    def __init__(self, content_type: str):
+        _, params = parse_options_header(content_type)
+        boundary = params.get(b"boundary")
+        if not boundary:
+            raise ValueError("Missing boundary in multipart request")
+        charset = params.get(b"charset", b"utf-8")
+        self._charset = charset.decode("latin-1") if isinstance(charset, bytes) else charset
+        self._events = []
+        self._header_name = b""
+        self._header_value = b""
+        self._disposition = b""
+        self._field = None
+        self._is_file = False
+        self._value = b""
+        self._complete = False
+        self._parser = multipart.MultipartParser(boundary, {
+            "on_part_begin": self._on_part_begin,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_end": self._on_end,
+        })
+
+    def _decode(self, value: bytes):
+        try:
+            return value.decode(self._charset)
+        except (UnicodeDecodeError, LookupError):
+            return value.decode("latin-1")
+
+    def _on_part_begin(self):
+        self._disposition = b""
+        self._field = None
+        self._is_file = False
+        self._value = b""
+
+    def _on_header_field(self, data, start, end):
+        self._header_name += data[start:end]
+
+    def _on_header_value(self, data, start, end):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        if self._header_name.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self):
+        _, options = parse_options_header(self._disposition)
+        if b"name" not in options:
+            raise ValueError('The Content-Disposition header field "name" must be provided')
+        self._field = self._decode(options[b"name"])
+        if b"filename" in options:
+            self._is_file = True
+            self._events.append(("file", self._field, self._decode(options[b"filename"])))
+
+    def _on_part_data(self, data, start, end):
+        if self._is_file:
+            self._events.append(("data", bytes(data[start:end])))
+        else:
+            self._value += data[start:end]
+
+    def _on_part_end(self):
+        if self._is_file:
+            self._events.append(("end",))
+        else:
+            self._events.append(("field", self._field, self._decode(self._value)))
+
+    def _on_end(self):
+        self._complete = True
+
+    def feed(self, chunk: bytes):
+        self._parser.write(chunk)
+        events, self._events = self._events, []
+        return events
+
+    def finish(self):
+        if not self._complete:
+            raise ValueError("Incomplete multipart request body")
+
+
+class UploadProgress:
+    """Per-file progress of one multi-file upload, files are added as their parts arrive"""
+
+    def __init__(self, upload_id: str):
+        self.upload_id = upload_id
+        self.files = []
+        self.bytes_received = 0
+        self.started = time.time()
+        self.finished = None
+
+    def add(self, name: str, status: str = "receiving"):
+        self.files.append({"name": name, "status": status, "bytes_written": 0})
+        return len(self.files) - 1
+
+    def update(self, index: int, **fields):
+        self.files[index].update(fields)
+
+    def to_dict(self):
+        statuses = [f["status"] for f in self.files]
+        return {
+            "upload_id": self.upload_id,
+            "total": len(self.files),
+            "completed": statuses.count("saved"),
+            "failed": statuses.count("failed"),
+            "bytes_received": self.bytes_received,
+            "bytes_written": sum(f["bytes_written"] for f in self.files),
+            "done": self.finished is not None,
+            "files": [dict(f) for f in self.files],
+        }
+
+
+class UploadPipeline:
+    """Write the parts of a multi-file upload to disk while the request is still arriving
+
+    Each file part is handed to a writer on a thread pool as soon as its
+    headers are parsed, so earlier files are written while later ones are
+    still being received. Every part buffers at most max_buffered_bytes
+    that its writer hasn't taken yet; past that the handler stops reading
+    the request body. The budget is per part, not shared: a part whose
+    writer is still waiting for a pool thread only holds up its own
+    request, never the writers that are running.
+    """
+
+    def __init__(self, save, max_workers: int = 4, max_buffered_bytes: int = 16 * 1024 * 1024,
+                 keep_finished: int = 50):
+        # save(source, file_path, max_bytes, progress) -> (size, sha256_hex)
+        self.save = save
+        self.max_workers = max_workers
+        self.max_buffered_bytes = max_buffered_bytes
+        self.keep_finished = keep_finished
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="upload")
+        self._progress = {}
+        # Streams whose writer hasn't finished, for the buffered bytes statistic
+        self._streams = set()
+        self._peak_buffered = 0
+        self._lock = threading.Lock()
+
+    def begin(self, upload_id: str):
+        progress = UploadProgress(upload_id)
+        with self._lock:
+            self._progress[upload_id] = progress
+            finished = [p for p in self._progress.values() if p.finished]
+            if len(finished) > self.keep_finished:
+                finished.sort(key=lambda p: p.finished)
+                for stale in finished[:len(finished) - self.keep_finished]:
+                    del self._progress[stale.upload_id]
+        return progress
+
+    def get_progress(self, upload_id: str):
+        with self._lock:
+            progress = self._progress.get(upload_id)
+        return progress.to_dict() if progress else None
+
+    def _write(self, progress, index, stream, file_path, max_bytes):
+        try:
+            progress.update(index, status="writing")
+
+            def on_progress(written):
+                progress.update(index, bytes_written=written)
+
+            file_size, file_hash = self.save(stream, file_path, max_bytes, on_progress)
+            progress.update(index, status="saved",
+                            bytes_written=file_size, sha256=file_hash)
+            return file_size, file_hash
+        except Exception as e:
+            progress.update(index, status="failed", error=str(e))
+            raise
+        finally:
+            stream.close()
+            with self._lock:
+                self._streams.discard(stream)
+                self._peak_buffered = max(self._peak_buffered, stream.budget.peak)
+
+    def start_file(self, progress: UploadProgress, name: str, file_path: str, max_bytes: int):
+        """Start writing one file part, returns (stream, future of (size, sha256_hex))"""
+        index = progress.add(name)
+        stream = PartStream(ByteBudget(self.max_buffered_bytes))
+        with self._lock:
+            self._streams.add(stream)
+        future = self._executor.submit(
+            self._write, progress, index, stream, file_path, max_bytes)
+        return stream, future
+
+    async def feed(self, stream: PartStream, data: bytes):
+        """Hand part data to its writer, waiting while the part's buffer is full"""
+        if stream.closed:
+            return
+        reserved = stream.budget.try_acquire(len(data))
+        if reserved is None:
+            reserved = await asyncio.to_thread(stream.budget.acquire, len(data))
+        stream.put(data, reserved)
+
+    def get_stats(self):
+        with self._lock:
+            streams = list(self._streams)
+            peak = self._peak_buffered
+        return {
+            "max_workers": self.max_workers,
+            "max_buffered_bytes_per_file": self.max_buffered_bytes,
+            "receiving_files": len(streams),
+            "buffered_bytes": sum(s.budget.in_flight for s in streams),
+            "peak_buffered_bytes_per_file": max([peak] + [s.budget.peak for s in streams]),
+        }
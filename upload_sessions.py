@@ -0,0 +1,256 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+
+
+class ChecksumMismatchError(ValueError):
+    pass
+
+
+def merge_range(ranges, start: int, end: int):
+    """Insert [start, end) into a sorted list of disjoint ranges, merging overlaps"""
+    merged = []
+    for range_start, range_end in ranges:
+        if range_end < start or range_start > end:
+            merged.append([range_start, range_end])
+        else:
+            start = min(start, range_start)
+            end = max(end, range_end)
+    merged.append([start, end])
+    merged.sort()
+    return merged
+
+
+class UploadSession:
+    def __init__(self, filename: str, size: int, upload_dir: str, sha256: str = None):
+        self.id = uuid.uuid4().hex
+        self.filename = filename
+        self.size = size
+        self.sha256 = sha256.lower() if sha256 else None
+        self.upload_dir = upload_dir
+        self.part_path = os.path.join(upload_dir, f"{PART_FILE_PREFIX}{self.id}{PART_FILE_SUFFIX}")
+        # Sorted, disjoint [start, end) byte ranges already on disk
+        self.ranges = []
+        self.created = time.time()
+        self.updated = self.created
+        self.lock = threading.Lock()
+
+    @property
+    def received(self):
+        return sum(end - start for start, end in self.ranges)
+
+    @property
+    def complete(self):
+        return self.ranges == [[0, self.size]] or (self.size == 0 and not self.ranges)
+
+    def to_dict(self):
+        return {
+            "session_id": self.id,
+            "filename": self.filename,
+            "size": self.size,
+            "received": self.received,
+            "committed_ranges": [list(r) for r in self.ranges],
+            # The first gap is where a client resumes sequential uploading
+            "next_offset": self.ranges[0][1] if self.ranges and self.ranges[0][0] == 0 else 0,
+            "complete": self.complete,
+            "created": self.created,
+            "updated": self.updated,
+        }
+
+
+# Prefix and suffix of the partial files of sessions and of streamed uploads
+PART_FILE_PREFIX = ".upload-"
+PART_FILE_SUFFIX = ".part"
+
+
+class UploadSessionManager:
+    """Resumable uploads: chunks are written at their offsets and tracked as committed ranges
+
+    Partial files live next to their targets so finishing is a rename. The
+    folders that received one are remembered in state_file, so the garbage
+    collection also finds files left behind when the server was stopped
+    mid-upload, after a restart.
+    """
+
+    def __init__(self, max_size: int, session_ttl: float = 6 * 3600, gc_interval: float = 300,
+                 state_file: str = None):
+        self.max_size = max_size
+        # Sessions without activity for this long are removed with their partial data
+        self.session_ttl = session_ttl
+        self.gc_interval = gc_interval
+        self.state_file = state_file
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._gc_thread = None
+        self._part_dirs = set()
+        if state_file and os.path.exists(state_file):
+            try:
+                with open(state_file, "r", encoding="utf-8") as f:
+                    self._part_dirs = set(json.load(f))
+            except (OSError, ValueError, TypeError) as e:
+                print(f"Failed to load upload folders from {state_file}: {e}")
+
+    def _save_part_dirs(self):
+        if not self.state_file:
+            return
+        with self._lock:
+            directories = sorted(self._part_dirs)
+        temp_path = self.state_file + ".tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(directories, f, ensure_ascii=False)
+            os.replace(temp_path, self.state_file)
+        except OSError as e:
+            print(f"Failed to save upload folders to {self.state_file}: {e}")
+
+    def track_directory(self, directory: str):
+        """Remember a folder that partial upload files are written to"""
+        directory = os.path.abspath(directory)
+        with self._lock:
+            if directory in self._part_dirs:
+                return
+            self._part_dirs.add(directory)
+        self._save_part_dirs()
+
+    def start_gc(self):
+        """Start the background garbage collection of abandoned sessions"""
+        if self._gc_thread and self._gc_thread.is_alive():
+            return
+        self._gc_thread = threading.Thread(
+            target=self._gc_loop, name="upload-session-gc", daemon=True)
+        self._gc_thread.start()
+
+    def _gc_loop(self):
+        while True:
+            time.sleep(self.gc_interval)
+            try:
+                removed = self.collect_garbage()
+                if removed:
+                    print(f"Removed {removed} expired upload sessions and leftover part files")
+            except Exception as e:
+                print(f"Upload session garbage collection failed: {e}")
+
+    def collect_garbage(self):
+        cutoff = time.time() - self.session_ttl
+        with self._lock:
+            expired = [s for s in self._sessions.values() if s.updated < cutoff]
+        for session in expired:
+            try:
+                self.abort(session.id)
+            except FileNotFoundError:
+                # Finalized or aborted in the meantime
+                pass
+        return len(expired) + self._remove_leftover_parts(cutoff)
+
+    def _remove_leftover_parts(self, cutoff: float):
+        """Delete partial files no session owns that weren't written to since cutoff"""
+        with self._lock:
+            directories = list(self._part_dirs)
+            live = {s.part_path for s in self._sessions.values()}
+        removed = 0
+        missing = []
+        for directory in directories:
+            try:
+                with os.scandir(directory) as it:
+                    entries = [e for e in it if e.name.startswith(PART_FILE_PREFIX)
+                               and e.name.endswith(PART_FILE_SUFFIX)]
+            except FileNotFoundError:
+                missing.append(directory)
+                continue
+            except OSError:
+                continue
+            for entry in entries:
+                # Streamed uploads in progress keep their temp file's mtime current
+                try:
+                    if entry.path in live or entry.stat().st_mtime >= cutoff:
+                        continue
+                    os.remove(entry.path)
+                    removed += 1
+                except OSError:
+                    continue
+        if missing:
+            with self._lock:
+                self._part_dirs.difference_update(missing)
+            self._save_part_dirs()
+        return removed
+
+    def create(self, filename: str, size: int, upload_dir: str, sha256: str = None):
+        if not filename or os.path.basename(filename) != filename:
+            raise ValueError("Invalid filename")
+        if size < 0:
+            raise ValueError("Invalid file size")
+        if size > self.max_size:
+            raise ValueError(
+                f"The file size is over {self.max_size // (1024 * 1024)}MB limit")
+
+        session = UploadSession(filename, size, upload_dir, sha256)
+        self.track_directory(upload_dir)
+        # Preallocate so chunks can be written at any offset
+        with open(session.part_path, "wb") as f:
+            f.truncate(size)
+        with self._lock:
+            self._sessions[session.id] = session
+        return session
+
+    def get(self, session_id: str):
+        with self._lock:
+            session = self._sessions.get(session_id)
+        if session is None:
+            raise FileNotFoundError(f"Upload session not found: {session_id}")
+        return session
+
+    def write(self, session_id: str, offset: int, data: bytes):
+        """Write data at offset and commit its range"""
+        session = self.get(session_id)
+        if offset < 0 or offset + len(data) > session.size:
+            raise ValueError(
+                f"Chunk [{offset}, {offset + len(data)}) is outside the file size {session.size}")
+        with open(session.part_path, "r+b") as f:
+            f.seek(offset)
+            f.write(data)
+        with session.lock:
+            session.ranges = merge_range(
+                session.ranges, offset, offset + len(data))
+            session.updated = time.time()
+        return session
+
+    def finalize(self, session_id: str, target_path: str, chunk_size: int = 1024 * 1024):
+        """Verify the whole file and move it into place, returns (size, sha256_hex)"""
+        session = self.get(session_id)
+        if not session.complete:
+            raise RuntimeError(
+                f"Upload is incomplete: {session.received}/{session.size} bytes received")
+
+        sha256 = hashlib.sha256()
+        with open(session.part_path, "rb") as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                sha256.update(chunk)
+        digest = sha256.hexdigest()
+        if session.sha256 and digest != session.sha256:
+            raise ChecksumMismatchError(
+                f"Checksum mismatch: expected {session.sha256}, got {digest}")
+
+        os.replace(session.part_path, target_path)
+        with self._lock:
+            self._sessions.pop(session_id, None)
+        return session.size, digest
+
+    def abort(self, session_id: str):
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is None:
+            raise FileNotFoundError(f"Upload session not found: {session_id}")
+        try:
+            os.remove(session.part_path)
+        except OSError:
+            pass
+
+    def list(self):
+        with self._lock:
+            return [s.to_dict() for s in self._sessions.values()]
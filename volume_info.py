@@ -0,0 +1,210 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import NamedTuple
+
+# GetDriveType results
+DRIVE_TYPES = {
+    0: "unknown",
+    1: "invalid",
+    2: "removable",
+    3: "fixed",
+    4: "network",
+    5: "cdrom",
+    6: "ramdisk",
+}
+
+WM_DEVICECHANGE = 0x0219
+DBT_DEVICEARRIVAL = 0x8000
+DBT_DEVICEREMOVECOMPLETE = 0x8004
+
+
+class VolumeInfo(NamedTuple):
+    drive: str
+    label: str
+    filesystem: str
+    drive_type: str
+    total_bytes: int
+    free_bytes: int
+    # False when the drive letter exists but the volume can't be read (no media, disconnected share)
+    available: bool
+    updated: float
+
+    def to_dict(self):
+        return {
+            "drive": self.drive,
+            "label": self.label,
+            "filesystem": self.filesystem,
+            "drive_type": self.drive_type,
+            "total_gb": round(self.total_bytes / (1024 ** 3), 2),
+            "free_gb": round(self.free_bytes / (1024 ** 3), 2),
+            "available": self.available,
+            "updated": self.updated,
+        }
+
+
+class VolumeService:
+    """Cached drive enumeration for Windows
+
+    Drives come from GetLogicalDriveStrings and are described with
+    GetVolumeInformation and GetDiskFreeSpaceEx on a thread pool, each with a
+    timeout, so a disconnected network drive can't stall the listing. Readers
+    always get the cached snapshot; it's refreshed in the background when a
+    device-change message arrives, when the drive letter mask changes, and
+    every refresh_interval seconds.
+    """
+
+    def __init__(self, refresh_interval: float = 60.0, poll_interval: float = 2.0,
+                 probe_timeout: float = 2.0):
+        self.refresh_interval = refresh_interval
+        self.poll_interval = poll_interval
+        self.probe_timeout = probe_timeout
+        self._volumes = {}
+        self._lock = threading.Lock()
+        self._refresh_requested = threading.Event()
+        self._refreshed = threading.Event()
+        self._executor = ThreadPoolExecutor(
+            max_workers=8, thread_name_prefix="volume-probe")
+        # Probes that timed out keep running, don't queue another for the same drive
+        self._probing = {}
+        self._drive_mask = None
+        self.refresh_count = 0
+        self.last_refresh_ms = 0
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(
+            target=self._refresh_loop, name="volume-refresh", daemon=True)
+        self._thread.start()
+        threading.Thread(
+            target=self._device_listener, name="volume-device-events", daemon=True).start()
+
+    def request_refresh(self):
+        self._refresh_requested.set()
+
+    def get_volumes(self, wait_timeout: float = 3.0):
+        """Cached volumes sorted by drive letter, waits once for the first enumeration"""
+        if not self._refreshed.is_set():
+            self.request_refresh()
+            self._refreshed.wait(wait_timeout)
+        with self._lock:
+            return [self._volumes[drive] for drive in sorted(self._volumes)]
+
+    def _refresh_loop(self):
+        last_full_refresh = 0.0
+        while True:
+            requested = self._refresh_requested.wait(self.poll_interval)
+            self._refresh_requested.clear()
+            try:
+                mask = self._logical_drive_mask()
+                due = time.monotonic() - last_full_refresh >= self.refresh_interval
+                if requested or due or mask != self._drive_mask:
+                    self._drive_mask = mask
+                    self.refresh()
+                    last_full_refresh = time.monotonic()
+            except Exception as e:
+                print(f"Volume refresh failed: {e}")
+            finally:
+                self._refreshed.set()
+
+    @staticmethod
+    def _logical_drive_mask():
+        import win32api
+
+        return win32api.GetLogicalDrives()
+
+    @staticmethod
+    def _logical_drives():
+        import win32api
+
+        return [d for d in win32api.GetLogicalDriveStrings().split("\x00") if d]
+
+    def _probe(self, drive: str):
+        import win32api
+        import win32file
+
+        drive_type = DRIVE_TYPES.get(win32file.GetDriveType(drive), "unknown")
+        try:
+            label, _, _, _, filesystem = win32api.GetVolumeInformation(drive)
+            _, total_bytes, free_bytes = win32file.GetDiskFreeSpaceEx(drive)
+            return VolumeInfo(drive, label, filesystem, drive_type,
+                              total_bytes, free_bytes, True, time.time())
+        except Exception:
+            # Empty card reader or optical drive, or an unreachable network share
+            return VolumeInfo(drive, "", "", drive_type, 0, 0, False, time.time())
+        finally:
+            with self._lock:
+                self._probing.pop(drive, None)
+
+    def refresh(self):
+        """Enumerate drives and probe them in parallel, slow ones keep their previous info"""
+        start = time.perf_counter()
+        drives = self._logical_drives()
+
+        futures = {}
+        with self._lock:
+            for drive in drives:
+                future = self._probing.get(drive)
+                if future is None:
+                    future = self._executor.submit(self._probe, drive)
+                    self._probing[drive] = future
+                futures[drive] = future
+        wait(futures.values(), timeout=self.probe_timeout)
+
+        volumes = {}
+        with self._lock:
+            for drive, future in futures.items():
+                if future.done() and future.exception() is None:
+                    volumes[drive] = future.result()
+                elif drive in self._volumes:
+                    volumes[drive] = self._volumes[drive]
+                else:
+                    volumes[drive] = VolumeInfo(drive, "", "", "unknown", 0, 0, False, time.time())
+            self._volumes = volumes
+            self.refresh_count += 1
+            self.last_refresh_ms = round((time.perf_counter() - start) * 1000, 2)
+
+    def _device_listener(self):
+        """Hidden window that turns WM_DEVICECHANGE arrivals and removals into refreshes"""
+        try:
+            import win32api
+            import win32gui
+
+            def wnd_proc(hwnd, msg, wparam, lparam):
+                if msg == WM_DEVICECHANGE and wparam in (DBT_DEVICEARRIVAL, DBT_DEVICEREMOVECOMPLETE):
+                    self.request_refresh()
+                return win32gui.DefWindowProc(hwnd, msg, wparam, lparam)
+
+            window_class = win32gui.WNDCLASS()
+            window_class.lpfnWndProc = wnd_proc
+            window_class.lpszClassName = "SecondSightVolumeEvents"
+            window_class.hInstance = win32api.GetModuleHandle(None)
+            class_atom = win32gui.RegisterClass(window_class)
+            # Top-level (not message-only) so it receives broadcast device messages
+            win32gui.CreateWindow(class_atom, "SecondSightVolumeEvents", 0, 0, 0, 0, 0,
+                                  0, 0, window_class.hInstance, None)
+            win32gui.PumpMessages()
+        except Exception as e:
+            # Drive mask polling still notices added and removed drives
+            print(f"Device change notifications unavailable: {e}")
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "volumes": len(self._volumes),
+                "refresh_count": self.refresh_count,
+                "last_refresh_ms": self.last_refresh_ms,
+                "probes_in_progress": len(self._probing),
+            }
+
+
+def create_volume_service():
+    """VolumeService on Windows, None elsewhere (the root listing is "/" there)"""
+    if os.name != "nt":
+        return None
+    service = VolumeService()
+    service.start()
+    return service
@@ -0,0 +1,137 @@
+import asyncio
+import os
+import queue
+import threading
+import zipfile
+
+# Formats that are already compressed, deflating them again costs CPU for no gain
+COMPRESSED_EXTENSIONS = {
+    ".zip", ".rar", ".7z", ".gz", ".tgz", ".bz2", ".xz", ".zst", ".cab",
+    ".jar", ".apk", ".docx", ".xlsx", ".pptx", ".odt", ".ods", ".odp",
+    ".jpg", ".jpeg", ".png", ".gif", ".webp", ".heic", ".avif",
+    ".mp3", ".aac", ".ogg", ".flac", ".m4a", ".opus",
+    ".mp4", ".mkv", ".avi", ".mov", ".webm", ".wmv", ".m4v",
+    ".pdf",
+}
+
+
+class ZipStreamCancelled(Exception):
+    pass
+
+
+class _QueueWriter:
+    """Unseekable file object that hands written bytes to a bounded queue"""
+
+    def __init__(self, chunks: queue.Queue, cancelled: threading.Event, chunk_size: int):
+        self._chunks = chunks
+        self._cancelled = cancelled
+        self._chunk_size = chunk_size
+        self._buffer = bytearray()
+        self._position = 0
+
+    def write(self, data):
+        if self._cancelled.is_set():
+            raise ZipStreamCancelled()
+        self._buffer.extend(data)
+        self._position += len(data)
+        if len(self._buffer) >= self._chunk_size:
+            self.flush()
+        return len(data)
+
+    def tell(self):
+        # zipfile records header offsets with tell(), even on unseekable streams
+        return self._position
+
+    def flush(self):
+        if self._buffer:
+            self._put(bytes(self._buffer))
+            self._buffer.clear()
+
+    def _put(self, item):
+        # Blocks while the client is slower than the compressor, which bounds memory
+        while not self._cancelled.is_set():
+            try:
+                self._chunks.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                pass
+        raise ZipStreamCancelled()
+
+
+def iter_folder_entries(folder: str, prefix: str = ""):
+    """Yield (path, arcname) for every file and empty directory under folder, lazily"""
+    for root, dirs, files in os.walk(folder):
+        dirs.sort()
+        relative = os.path.relpath(root, folder)
+        base = prefix if relative == "." else os.path.join(prefix, relative)
+        if not dirs and not files and base:
+            yield root, base.replace(os.sep, "/") + "/"
+        for name in sorted(files):
+            yield os.path.join(root, name), os.path.join(base, name).replace(os.sep, "/")
+
+
+def write_zip(entries, fileobj, compresslevel: int = 6):
+    """Write entries to fileobj as a ZIP, returns (files_written, files_skipped)"""
+    written = 0
+    skipped = 0
+    with zipfile.ZipFile(fileobj, "w", zipfile.ZIP_DEFLATED,
+                         compresslevel=compresslevel, allowZip64=True) as zf:
+        for path, arcname in entries:
+            try:
+                if arcname.endswith("/"):
+                    zf.writestr(zipfile.ZipInfo.from_file(path, arcname), b"")
+                    continue
+                ext = os.path.splitext(path)[1].lower()
+                compress_type = zipfile.ZIP_STORED if ext in COMPRESSED_EXTENSIONS else zipfile.ZIP_DEFLATED
+                zf.write(path, arcname, compress_type=compress_type)
+                written += 1
+            except ZipStreamCancelled:
+                raise
+            except OSError as e:
+                # Locked or unreadable files are left out instead of aborting the whole archive
+                print(f"Skipping {path} in zip stream: {e}")
+                skipped += 1
+    return written, skipped
+
+
+async def stream_zip(entries, chunk_size: int = 256 * 1024, max_queued_chunks: int = 16):
+    """Async generator of ZIP bytes, the archive is built on a worker thread as it is sent"""
+    chunks = queue.Queue(maxsize=max_queued_chunks)
+    cancelled = threading.Event()
+    done = object()
+
+    def produce():
+        writer = _QueueWriter(chunks, cancelled, chunk_size)
+        try:
+            write_zip(entries, writer)
+            writer.flush()
+            writer._put(done)
+        except ZipStreamCancelled:
+            pass
+        except Exception as e:
+            print(f"Zip stream failed: {e}")
+            try:
+                writer._put(e)
+            except ZipStreamCancelled:
+                pass
+
+    def next_chunk():
+        while True:
+            try:
+                return chunks.get(timeout=0.5)
+            except queue.Empty:
+                if cancelled.is_set():
+                    return done
+
+    threading.Thread(target=produce, name="zip-stream", daemon=True).start()
+    try:
+        while True:
+            item = await asyncio.to_thread(next_chunk)
+            if item is done:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        # Stops the producer if the client disconnected before the end
+        cancelled.set()